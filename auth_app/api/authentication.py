@@ -1,4 +1,4 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
 
 
 class CookieJWTAuthentication(JWTAuthentication):
@@ -9,3 +9,11 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         validated_token = self.get_validated_token(raw_token)
         return self.get_user(validated_token), validated_token
+
+
+class CookieJWTStatelessAuthentication(CookieJWTAuthentication, JWTStatelessUserAuthentication):
+    """
+    Cookie JWT authentication that trusts the validated token instead of
+    loading the user from the database. Used by the streaming endpoints,
+    which only need to know that the request is authenticated.
+    """
@@ -38,6 +38,22 @@ else:
     print(f"Superuser '{username}' already exists.")
 EOF
 
-python manage.py rqworker default &
+# Transcode workers: one per allowed concurrent encode. The first one only
+# listens on 'high', so short titles never wait behind long encodes, and
+# also runs the RQ scheduler. The others take the queues in priority order;
+# at least one of them is always started.
+ENCODE_WORKERS=$(python manage.py shell -c "from django.conf import settings; print(settings.VIDEO_MAX_CONCURRENT_ENCODES)")
+python manage.py rqworker high --with-scheduler &
+python manage.py rqworker high default low &
+i=2
+while [ "$i" -lt "$ENCODE_WORKERS" ]; do
+  python manage.py rqworker high default low &
+  i=$((i + 1))
+done
 
+# SERVER_INTERFACE=asgi serves the async views through uvicorn workers,
+# so streaming to slow clients does not hold one worker per transfer.
+if [ "${SERVER_INTERFACE:-wsgi}" = "asgi" ]; then
+  exec gunicorn core.asgi:application --bind 0.0.0.0:8000 -k uvicorn_worker.UvicornWorker
+fi
 exec gunicorn core.wsgi:application --bind 0.0.0.0:8000
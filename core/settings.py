@@ -141,6 +141,13 @@ CACHES = {
 }
 
 RQ_QUEUES = {
+    'high': {
+        'HOST': os.environ.get("REDIS_HOST", default="redis"),
+        'PORT': os.environ.get("REDIS_PORT", default=6379),
+        'DB': os.environ.get("REDIS_DB", default=0),
+        'DEFAULT_TIMEOUT': 900,
+        'REDIS_CLIENT_KWARGS': {},
+    },
     'default': {
         'HOST': os.environ.get("REDIS_HOST", default="redis"),
         'PORT': os.environ.get("REDIS_PORT", default=6379),
@@ -148,7 +155,124 @@ RQ_QUEUES = {
         'DEFAULT_TIMEOUT': 900,
         'REDIS_CLIENT_KWARGS': {},
     },
+    'low': {
+        'HOST': os.environ.get("REDIS_HOST", default="redis"),
+        'PORT': os.environ.get("REDIS_PORT", default=6379),
+        'DB': os.environ.get("REDIS_DB", default=0),
+        'DEFAULT_TIMEOUT': 900,
+        'REDIS_CLIENT_KWARGS': {},
+    },
+}
+
+
+# Video processing settings
+
+# 'single_pass' decodes the source once for all renditions,
+# 'sequential' runs one ffmpeg process per rendition,
+# 'fan_out' enqueues one job per rendition across all RQ workers,
+# 'chunked' splits long sources at keyframes and encodes the pieces in parallel.
+VIDEO_TRANSCODE_MODE = os.environ.get('VIDEO_TRANSCODE_MODE', default='single_pass')
+VIDEO_HLS_SEGMENT_SECONDS = int(os.environ.get('VIDEO_HLS_SEGMENT_SECONDS', 10))
+VIDEO_CHUNK_SECONDS = int(os.environ.get('VIDEO_CHUNK_SECONDS', 300))
+# 'mpegts' writes one .ts file per segment, 'fmp4' one fragmented MP4
+# file per rendition addressed with byte ranges.
+VIDEO_HLS_SEGMENT_TYPE = os.environ.get('VIDEO_HLS_SEGMENT_TYPE', default='mpegts')
+# Watch while transcoding: the lowest rendition (and the audio) is written
+# as growing EVENT playlist and the video becomes playable ('streamable')
+# once its first segment is complete. Not available in 'chunked' mode.
+VIDEO_WATCH_WHILE_TRANSCODING = os.environ.get('VIDEO_WATCH_WHILE_TRANSCODING', 'False') == 'True'
+# Bitrate of the shared audio rendition referenced by all video renditions.
+VIDEO_AUDIO_BITRATE = os.environ.get('VIDEO_AUDIO_BITRATE', default='128k')
+
+# Encoding profiles: x264 preset, constant rate factor and the bitrate cap
+# (kbit/s) of a 1080p rendition; smaller renditions are capped by pixel count.
+VIDEO_ENCODING_PROFILES = {
+    'speed': {'preset': 'veryfast', 'crf': 23, 'maxrate_1080p': 6000},
+    'balanced': {'preset': 'medium', 'crf': 23, 'maxrate_1080p': 5000},
+    'size': {'preset': 'slow', 'crf': 26, 'maxrate_1080p': 4000},
 }
+VIDEO_ENCODING_PROFILE = os.environ.get('VIDEO_ENCODING_PROFILE', default='balanced')
+# Per-title encoding: a short sample is encoded first to lower the bitrate
+# caps of simple content.
+VIDEO_PER_TITLE_ENCODING = os.environ.get('VIDEO_PER_TITLE_ENCODING', 'False') == 'True'
+VIDEO_COMPLEXITY_SAMPLE_SECONDS = 10
+# HLS delivery: 'direct' streams files through Django, 'x-accel' (nginx) and
+# 'x-sendfile' (Apache, lighttpd) only authorize the request and let the
+# proxy send the file. VIDEO_DELIVERY_INTERNAL_URL is the internal nginx
+# location that aliases MEDIA_ROOT.
+VIDEO_DELIVERY_MODE = os.environ.get('VIDEO_DELIVERY_MODE', default='direct')
+VIDEO_DELIVERY_INTERNAL_URL = os.environ.get('VIDEO_DELIVERY_INTERNAL_URL', default='/protected-media/')
+# Browser caching of HLS files. Segments and sprites are immutable once
+# written, playlists are revalidated after a short time. Use 'public' only if
+# a shared cache in front of Django enforces authentication itself.
+VIDEO_CACHE_CONTROL_SCOPE = os.environ.get('VIDEO_CACHE_CONTROL_SCOPE', default='private')
+VIDEO_SEGMENT_MAX_AGE = int(os.environ.get('VIDEO_SEGMENT_MAX_AGE', 60 * 60 * 24 * 365))
+VIDEO_PLAYLIST_MAX_AGE = int(os.environ.get('VIDEO_PLAYLIST_MAX_AGE', 10))
+# Signed segment URLs: media playlists point to an endpoint that checks an
+# HMAC instead of the JWT. URLs stay valid for one to two TTL windows, which
+# must cover a viewing session since players do not reload VOD playlists.
+VIDEO_SIGNED_URLS = os.environ.get('VIDEO_SIGNED_URLS', 'True') == 'True'
+VIDEO_SIGNED_URL_TTL = int(os.environ.get('VIDEO_SIGNED_URL_TTL', 60 * 60 * 4))
+# Two-tier cache of HLS paths and playlist bodies: a per-process LRU
+# (entries, seconds) in front of the Redis cache (seconds).
+VIDEO_LOCAL_CACHE_SIZE = int(os.environ.get('VIDEO_LOCAL_CACHE_SIZE', 1024))
+VIDEO_LOCAL_CACHE_TTL = int(os.environ.get('VIDEO_LOCAL_CACHE_TTL', 30))
+VIDEO_STREAM_CACHE_TIMEOUT = int(os.environ.get('VIDEO_STREAM_CACHE_TIMEOUT', 60 * 60))
+# Unknown video ids are remembered for a short time (seconds), so repeated
+# requests for them do not reach the database either.
+VIDEO_STREAM_MISS_TIMEOUT = int(os.environ.get('VIDEO_STREAM_MISS_TIMEOUT', 30))
+# Per-process cache of popular segment bytes (see video_app.segmentcache):
+# total and per-file size in bytes (0 disables it), requests before a
+# segment is admitted, and master playlist requests after which the first
+# segments of every rendition of a title are read ahead.
+VIDEO_SEGMENT_CACHE_BYTES = int(os.environ.get('VIDEO_SEGMENT_CACHE_BYTES', 256 * 1024 * 1024))
+VIDEO_SEGMENT_CACHE_MAX_ITEM_BYTES = int(os.environ.get('VIDEO_SEGMENT_CACHE_MAX_ITEM_BYTES', 8 * 1024 * 1024))
+VIDEO_SEGMENT_CACHE_ADMIT_HITS = int(os.environ.get('VIDEO_SEGMENT_CACHE_ADMIT_HITS', 2))
+VIDEO_SEGMENT_CACHE_TRENDING_PLAYS = int(os.environ.get('VIDEO_SEGMENT_CACHE_TRENDING_PLAYS', 5))
+VIDEO_SEGMENT_CACHE_WARM_SEGMENTS = int(os.environ.get('VIDEO_SEGMENT_CACHE_WARM_SEGMENTS', 3))
+# Application server: 'wsgi' runs gunicorn with sync workers, 'asgi' runs it
+# with uvicorn workers and serves the catalog and streaming endpoints with
+# async views (see backend.entrypoint.sh).
+SERVER_INTERFACE = os.environ.get('SERVER_INTERFACE', default='wsgi')
+VIDEO_ASYNC_VIEWS = os.environ.get('VIDEO_ASYNC_VIEWS', str(SERVER_INTERFACE == 'asgi')) == 'True'
+# Running encodes that have not reported progress for this long are flagged as stalled.
+VIDEO_PROGRESS_STALL_SECONDS = int(os.environ.get('VIDEO_PROGRESS_STALL_SECONDS', 120))
+# Delay before retrying a transcode whose content is being encoded by another upload.
+VIDEO_DEDUP_RETRY_SECONDS = int(os.environ.get('VIDEO_DEDUP_RETRY_SECONDS', 60))
+# Catalog page size (default and maximum of the 'limit' parameter).
+VIDEO_CATALOG_PAGE_SIZE = int(os.environ.get('VIDEO_CATALOG_PAGE_SIZE', 100))
+VIDEO_CATALOG_MAX_PAGE_SIZE = int(os.environ.get('VIDEO_CATALOG_MAX_PAGE_SIZE', 500))
+# Lifetime (seconds) of rendered catalog pages; changes invalidate them earlier.
+VIDEO_CATALOG_CACHE_TIMEOUT = int(os.environ.get('VIDEO_CATALOG_CACHE_TIMEOUT', 60 * 60))
+# Request metrics of the catalog and streaming endpoints (see video_app.metrics).
+# Workers buffer their counts and add them to Redis every few seconds. The
+# Prometheus endpoint /api/metrics/ is only served if a bearer token is set.
+VIDEO_METRICS_ENABLED = os.environ.get('VIDEO_METRICS_ENABLED', 'True') == 'True'
+VIDEO_METRICS_FLUSH_SECONDS = float(os.environ.get('VIDEO_METRICS_FLUSH_SECONDS', 5))
+VIDEO_METRICS_TOKEN = os.environ.get('VIDEO_METRICS_TOKEN', default='')
+
+# Transcode scheduling. Costs are measured in "1080p seconds" (input duration
+# times the ladder's pixel count relative to 1080p). The entrypoint starts one
+# RQ worker per concurrent encode (at least two), one of them reserved for the
+# 'high' queue of short titles.
+VIDEO_MAX_CONCURRENT_ENCODES = int(os.environ.get(
+    'VIDEO_MAX_CONCURRENT_ENCODES', default=max(2, (os.cpu_count() or 1) // 4)
+))
+VIDEO_SCHEDULER_SHORT_COST = float(os.environ.get('VIDEO_SCHEDULER_SHORT_COST', 600))
+VIDEO_SCHEDULER_LONG_COST = float(os.environ.get('VIDEO_SCHEDULER_LONG_COST', 3600))
+VIDEO_ENCODE_SECONDS_PER_COST = float(os.environ.get('VIDEO_ENCODE_SECONDS_PER_COST', 1.0))
+VIDEO_SCHEDULER_TIMEOUT_FACTOR = 3
+VIDEO_SCHEDULER_MIN_TIMEOUT = 900
+
+# Trickplay sprite sheets (scrub previews)
+VIDEO_TRICKPLAY_ENABLED = os.environ.get('VIDEO_TRICKPLAY_ENABLED', 'True') == 'True'
+VIDEO_TRICKPLAY_INTERVAL = int(os.environ.get('VIDEO_TRICKPLAY_INTERVAL', 10))
+VIDEO_TRICKPLAY_WIDTH = 160
+VIDEO_TRICKPLAY_COLUMNS = 10
+VIDEO_TRICKPLAY_ROWS = 10
+
+# Responsive catalog thumbnails
+VIDEO_THUMBNAIL_WIDTHS = (320, 640, 1280)
 
 
 # Password validation
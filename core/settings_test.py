@@ -1,5 +1,10 @@
 from .settings import *
 
+# The streaming tests authenticate through REST framework's test client,
+# which only reaches the synchronous views; the async views have their own
+# tests, independent of the deployment's SERVER_INTERFACE.
+VIDEO_ASYNC_VIEWS = False
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -15,7 +20,13 @@ CACHES = {
 }
 
 RQ_QUEUES = {
+    'high': {
+        'USE_REDIS': False,
+    },
     'default': {
         'USE_REDIS': False,
-    }
+    },
+    'low': {
+        'USE_REDIS': False,
+    },
 }
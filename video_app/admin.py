@@ -6,7 +6,23 @@ Admin configuration for the Video model in the Django admin interface.
 """
 
 from django.contrib import admin
-from .models import Video
+from .models import Video, VideoSource
+from .progress import get_progress
+
+
+class VideoSourceInline(admin.StackedInline):
+    """
+    Shows the probed source properties of a video as read-only inline.
+    """
+    model = VideoSource
+    can_delete = False
+    readonly_fields = (
+        'duration', 'width', 'height', 'frame_rate', 'bit_rate',
+        'video_codec', 'audio_codec', 'complexity', 'probed_at',
+    )
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Video)
@@ -15,16 +31,32 @@ class VideoAdmin(admin.ModelAdmin):
     Customizes the admin interface for the Video model.
     Displays metadata, enables search and filtering, and marks creation time as read-only.
     """
-    list_display = ('title', 'category', 'created_at')
+    list_display = ('title', 'category', 'hls_status', 'created_at')
     search_fields = ('title', 'description', 'category')
-    list_filter = ('category', 'created_at')
-    readonly_fields = ('created_at',)
+    list_filter = ('category', 'hls_status', 'created_at')
+    readonly_fields = ('created_at', 'hls_status', 'transcode_progress')
+    inlines = (VideoSourceInline,)
 
     fieldsets = (
         (None, {
             'fields': ('title', 'description', 'category', 'thumbnail', 'video')
         }),
         ('Meta', {
-            'fields': ('created_at',),
+            'fields': ('created_at', 'hls_status', 'transcode_progress'),
         }),
     )
+
+    @admin.display(description='Transcode progress')
+    def transcode_progress(self, obj):
+        """
+        Summarizes the live progress of the video's encoding jobs.
+        """
+        parts = []
+        for label, record in get_progress(obj.pk).items():
+            if record is None:
+                parts.append(f'{label}: queued')
+                continue
+            state = 'stalled' if record.get('stalled') else record['state']
+            percent = f"{record['percent']}%" if record['percent'] is not None else '?'
+            parts.append(f"{label}: {percent} {state}, {record['fps'] or 0:.0f} fps, {record['speed'] or 0:.2f}x")
+        return '; '.join(parts) or '-'
@@ -0,0 +1,227 @@
+"""
+video_app.api.async_views
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Async versions of the catalog and streaming endpoints for ASGI
+deployments (``SERVER_INTERFACE=asgi``).
+
+Django REST framework views are synchronous, so these are plain Django
+async views. They authenticate with the stateless cookie JWT, which only
+validates the token and needs no I/O, resolve HLS paths and manifest
+indexes through the async cache and ORM APIs and stream file bodies with
+``async_file_response``. The file resolvers of ``video_app.api.files``
+stat, read and rewrite playlists, so they run in worker threads too.
+Under ASGI a worker thus serves many slow clients concurrently instead
+of holding a thread per transfer. Routes and responses are the same as
+those of ``video_app.api.views``.
+"""
+
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+
+from auth_app.api.authentication import CookieJWTStatelessAuthentication
+from video_app.catalog import acatalog_page, catalog_response
+from video_app.models import Video
+from video_app.signing import verify
+from video_app.streamcache import astream_files
+from .files import (
+    master_file,
+    media_playlist_file,
+    segment_file,
+    signed_segment_file,
+    sprite_file,
+    thumbnail_track_file,
+)
+from .streaming import async_file_response
+
+
+def jwt_required(view):
+    """
+    Decorates an async view so that it requires a valid access token cookie.
+
+    Unauthenticated requests are answered with ``401`` and the same body
+    Django REST framework would send.
+
+    Args:
+        view (coroutine function): The view to protect.
+
+    Returns:
+        coroutine function: The wrapped view, setting ``request.user``.
+    """
+    authenticator = CookieJWTStatelessAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = authenticator.authenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+        except (AuthenticationFailed, NotAuthenticated) as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+            response = JsonResponse(detail, status=401)
+            response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+            return response
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    return require_safe(wrapper)
+
+
+@jwt_required
+async def video_list(request):
+    """
+    Returns one page of the catalog with the same parameters, body and
+    headers as ``VideoListView``, from the same cache.
+    """
+    try:
+        page = await acatalog_page(request)
+    except ValueError as exc:
+        return JsonResponse({'detail': str(exc)}, status=400)
+    return catalog_response(request, page)
+
+
+@jwt_required
+async def stream_master(request, movie_id):
+    """
+    Streams the multivariant HLS playlist (master.m3u8) of a video.
+
+    Args:
+        movie_id (int): ID of the video.
+
+    Returns:
+        HttpResponse: .m3u8 file response with correct content type.
+    Raises:
+        Http404: If video or master playlist is not found.
+    """
+    try:
+        path, content_type, options = await sync_to_async(master_file)(
+            *(await astream_files(movie_id)), movie_id,
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@jwt_required
+async def stream_m3u8(request, movie_id, resolution):
+    """
+    Streams the HLS media playlist (.m3u8) for a given video and resolution.
+
+    Args:
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+
+    Returns:
+        HttpResponse: .m3u8 file response with correct content type.
+    Raises:
+        Http404: If video or HLS file is not found.
+    """
+    try:
+        path, content_type, options = await sync_to_async(media_playlist_file)(
+            *(await astream_files(movie_id)), movie_id, resolution, request.user.id,
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@jwt_required
+async def stream_segment(request, movie_id, resolution, segment):
+    """
+    Streams a single HLS video segment for a given video and resolution.
+
+    Args:
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        segment (str): Filename of the segment (e.g. '000.ts' or '480p.mp4').
+
+    Returns:
+        HttpResponse: Binary segment stream, partial (206) for range requests.
+    Raises:
+        Http404: If video or segment file is not found.
+    """
+    try:
+        path, content_type, options = await sync_to_async(segment_file)(
+            *(await astream_files(movie_id)), movie_id, resolution, segment,
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@require_safe
+async def stream_signed_segment(request, movie_id, resolution, segment):
+    """
+    Streams a single HLS segment authorized by the signature in its URL.
+
+    Args:
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        segment (str): Filename of the segment (e.g. '480p0.ts').
+
+    Returns:
+        HttpResponse: Binary segment stream, partial (206) for range
+        requests, or 403 if the signature is missing, invalid or expired.
+    Raises:
+        Http404: If the names are invalid or video or segment is not found.
+    """
+    now = time.time()
+    if not verify(request.GET, movie_id, now):
+        return HttpResponseForbidden()
+    try:
+        path, content_type, options = await sync_to_async(signed_segment_file)(
+            *(await astream_files(movie_id)), movie_id, resolution, segment, int(request.GET['exp']), now,
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@jwt_required
+async def stream_thumbnails(request, movie_id):
+    """
+    Streams the WebVTT thumbnail track of a video.
+
+    Args:
+        movie_id (int): ID of the video.
+
+    Returns:
+        HttpResponse: .vtt file response.
+    Raises:
+        Http404: If video or thumbnail track is not found.
+    """
+    try:
+        path, content_type, options = await sync_to_async(thumbnail_track_file)(
+            *(await astream_files(movie_id)),
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@jwt_required
+async def stream_sprite(request, movie_id, sprite):
+    """
+    Streams one trickplay sprite sheet (JPEG) of a video.
+
+    Args:
+        movie_id (int): ID of the video.
+        sprite (str): Filename of the sprite sheet (e.g. 'sprite0.jpg').
+
+    Returns:
+        HttpResponse: JPEG file response.
+    Raises:
+        Http404: If the name is invalid or video or sprite is not found.
+    """
+    try:
+        path, content_type, options = await sync_to_async(sprite_file)(
+            *(await astream_files(movie_id)), sprite,
+        )
+        return await async_file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
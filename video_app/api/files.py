@@ -0,0 +1,226 @@
+"""
+video_app.api.files
+~~~~~~~~~~~~~~~~~~~
+
+Resolves the files behind the streaming endpoints.
+
+Each function maps the URL arguments of an endpoint, the HLS directory
+and the manifest index of the video to the file to send, its content type
+and the options of ``file_response``. They are shared by the WSGI views in
+``video_app.api.views`` and the ASGI views in ``video_app.api.async_views``,
+which only differ in how they authenticate, look up the HLS directory and
+send the body.
+
+Names missing from the index are rejected with ``Http404`` before any file
+system access. Segments and sprites are sent with the size and
+modification time from the index; playlists are still stat'ed, since they
+may be rewritten in place. Popular segments are sent from the in-memory
+``video_app.segmentcache``, and master playlist requests count as playback
+starts that decide which titles are warmed.
+
+Playlists and segments of renditions that are still being encoded (see
+``manifest.LiveIndex``) are revalidated on every request and bypass the
+segment cache, since the playlists grow and fMP4 segments share one file
+that is still being appended to.
+"""
+
+import re
+from functools import partial
+
+from django.conf import settings
+from django.http import Http404
+from django.urls import reverse
+
+from video_app.hls import MASTER_PLAYLIST
+from video_app.segmentcache import segment_cache
+from video_app.signing import sign_playlist, signed_expiry, signed_query
+from video_app.streamcache import playlist_body
+from video_app.trickplay import THUMBNAIL_TRACK, TRICKPLAY_DIR
+from .streaming import PLAYLIST_CONTENT_TYPE, FileStat, segment_content_type
+
+LIVE_CACHE_CONTROL = 'no-cache'
+
+SPRITE_RE = re.compile(r'^sprite\d+\.jpg$')
+RENDITION_RE = re.compile(r'^[\w-]+$')
+SEGMENT_RE = re.compile(r'^\w[\w-]*\.(ts|mp4|m4s)$')
+
+
+def indexed_file(index: dict, name: str):
+    """
+    Looks a file up in the manifest index of a video.
+
+    Args:
+        index (dict): Manifest index (see ``streamcache.manifest_index``).
+        name (str): Path of the file relative to the HLS directory.
+
+    Returns:
+        FileStat: Size and modification time of the file.
+    Raises:
+        Http404: If the file is not part of the video's HLS output.
+    """
+    try:
+        return FileStat(*index[name])
+    except KeyError:
+        raise Http404()
+
+
+def is_live(index: dict, resolution: str):
+    """
+    Returns whether a rendition of a video is still being encoded.
+    """
+    return resolution in getattr(index, 'live', ())
+
+
+def master_file(output_dir: str, index: dict, movie_id: int):
+    """
+    Resolves the multivariant playlist of a video.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+        movie_id (int): ID of the video.
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If the video has no master playlist.
+    """
+    indexed_file(index, MASTER_PLAYLIST)
+    segment_cache.record_play(movie_id, output_dir, index)
+    path = f"{output_dir}/{MASTER_PLAYLIST}"
+    options = {'load': partial(playlist_body, movie_id, MASTER_PLAYLIST, path)}
+    if getattr(index, 'live', None):
+        options['cache_header'] = LIVE_CACHE_CONTROL
+    return path, PLAYLIST_CONTENT_TYPE, options
+
+
+def media_playlist_file(output_dir: str, index: dict, movie_id: int, resolution: str, user_id: int):
+    """
+    Resolves the media playlist of a rendition. With ``VIDEO_SIGNED_URLS``
+    its segment URIs are rewritten to signed URLs of the given user.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        user_id (int): ID of the requesting user.
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If the rendition does not exist.
+    """
+    indexed_file(index, f"{resolution}/index.m3u8")
+    path = f"{output_dir}/{resolution}/index.m3u8"
+    load = partial(playlist_body, movie_id, f"{resolution}/index.m3u8", path)
+    options = {'load': load}
+    if is_live(index, resolution):
+        options['cache_header'] = LIVE_CACHE_CONTROL
+    if not settings.VIDEO_SIGNED_URLS:
+        return path, PLAYLIST_CONTENT_TYPE, options
+
+    expires = signed_expiry()
+    query = signed_query(user_id, movie_id, expires)
+    prefix = reverse('stream-signed-segment', args=[movie_id, resolution, '_']).rsplit('/', 1)[0]
+    options['load'] = lambda stat: sign_playlist(load(stat), prefix, query)
+    options['variant'] = f"{user_id}-{expires}"
+    return path, PLAYLIST_CONTENT_TYPE, options
+
+
+def segment_file(output_dir: str, index: dict, movie_id: int, resolution: str, segment: str):
+    """
+    Resolves a segment of a rendition.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        segment (str): Filename of the segment (e.g. '480p0.ts').
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If the segment does not exist.
+    """
+    name = f"{resolution}/{segment}"
+    stat = indexed_file(index, name)
+    path = f"{output_dir}/{name}"
+    if is_live(index, resolution):
+        return path, segment_content_type(segment), {'stat': stat}
+    load = partial(segment_cache.load, (movie_id, name), path)
+    return path, segment_content_type(segment), {'immutable': True, 'stat': stat, 'load': load}
+
+
+def signed_segment_file(
+    output_dir: str, index: dict, movie_id: int, resolution: str, segment: str,
+    expires: int, now: float,
+):
+    """
+    Resolves a segment requested through a signed URL, which may be cached
+    publicly until the URL expires.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        segment (str): Filename of the segment (e.g. '480p0.ts').
+        expires (int): Expiry of the signed URL as UNIX timestamp.
+        now (float): Current UNIX time.
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If resolution or segment name is invalid or the segment
+            does not exist.
+    """
+    if not RENDITION_RE.match(resolution) or not SEGMENT_RE.match(segment):
+        raise Http404()
+    name = f"{resolution}/{segment}"
+    stat = indexed_file(index, name)
+    path = f"{output_dir}/{name}"
+    if is_live(index, resolution):
+        return path, segment_content_type(segment), {'cache_header': LIVE_CACHE_CONTROL, 'stat': stat}
+    load = partial(segment_cache.load, (movie_id, name), path)
+    cache_header = f"public, max-age={expires - int(now)}, immutable"
+    options = {'cache_header': cache_header, 'stat': stat, 'load': load}
+    return path, segment_content_type(segment), options
+
+
+def thumbnail_track_file(output_dir: str, index: dict):
+    """
+    Resolves the WebVTT thumbnail track of a video.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If the video has no thumbnail track.
+    """
+    indexed_file(index, f"{TRICKPLAY_DIR}/{THUMBNAIL_TRACK}")
+    return f"{output_dir}/{TRICKPLAY_DIR}/{THUMBNAIL_TRACK}", "text/vtt", {}
+
+
+def sprite_file(output_dir: str, index: dict, sprite: str):
+    """
+    Resolves a trickplay sprite sheet of a video.
+
+    Args:
+        output_dir (str): HLS directory of the video.
+        index (dict): Manifest index of the video.
+        sprite (str): Filename of the sprite sheet (e.g. 'sprite0.jpg').
+
+    Returns:
+        tuple: ``(path, content_type, options)`` for ``file_response``.
+    Raises:
+        Http404: If the name is invalid or the sprite does not exist.
+    """
+    if not SPRITE_RE.match(sprite):
+        raise Http404()
+    stat = indexed_file(index, f"{TRICKPLAY_DIR}/{sprite}")
+    return f"{output_dir}/{TRICKPLAY_DIR}/{sprite}", "image/jpeg", {'immutable': True, 'stat': stat}
@@ -7,14 +7,19 @@ Defines the serializer for the Video model used in API responses.
 
 from rest_framework import serializers
 from video_app.models import Video
+from video_app.thumbnails import thumbnail_srcset
 
 
 class VideoSerializer(serializers.ModelSerializer):
     """
-    Serializes the Video model with an additional field for
-    absolute thumbnail URL generation.
+    Serializes the Video model with additional fields for
+    absolute thumbnail URL and thumbnail srcset generation.
+
+    An optional ``fields`` argument limits the output to the given fields
+    (sparse fieldsets of the catalog, see ``video_app.catalog``).
     """
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Video
@@ -24,9 +29,16 @@ class VideoSerializer(serializers.ModelSerializer):
             'title',
             'description',
             'thumbnail_url',
+            'thumbnail_srcset',
             'category'
         ]
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def get_thumbnail_url(self, obj):
         """
         Returns an absolute URL to the video's thumbnail image.
@@ -39,3 +51,15 @@ class VideoSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         return request.build_absolute_uri(obj.thumbnail.url)
+
+    def get_thumbnail_srcset(self, obj):
+        """
+        Returns srcset strings of the thumbnail variants per image format.
+
+        Args:
+            obj (Video): The video instance.
+
+        Returns:
+            dict: Mapping of format (e.g. 'webp') to srcset string.
+        """
+        return thumbnail_srcset(obj, self.context.get('request'))
@@ -0,0 +1,273 @@
+"""
+video_app.api.streaming
+~~~~~~~~~~~~~~~~~~~~~~~
+
+Response helpers for HLS delivery.
+
+Segments of fragmented MP4 renditions live in one file per rendition and
+are requested with HTTP ``Range`` headers, so file responses honour a
+single byte range and answer it with ``206 Partial Content``.
+
+With ``VIDEO_DELIVERY_MODE`` set to ``x-accel`` or ``x-sendfile`` Django
+only authorizes the request and resolves the file; the response carries an
+internal redirect header and the reverse proxy sends the bytes (including
+range requests), so no Python worker is tied up for the transfer.
+
+Every file carries an ``ETag`` and ``Last-Modified`` so revalidations are
+answered with ``304 Not Modified``. Segments and sprites never change once
+written and are cached as ``immutable``; playlists only briefly.
+
+``async_file_response`` serves the ASGI views: the response is prepared
+in a worker thread and the body is read block by block in worker threads,
+so a slow client never blocks the event loop.
+"""
+
+import asyncio
+import os
+import re
+from collections import namedtuple
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+
+SEGMENT_CONTENT_TYPES = {
+    '.ts': "video/MP2T",
+    '.mp4': "video/mp4",
+    '.m4s': "video/iso.segment",
+}
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Size and modification time of a file as known from the manifest index,
+# used in place of an ``os.stat_result``.
+FileStat = namedtuple('FileStat', ['st_size', 'st_mtime_ns'])
+
+# Read size of the async file body; larger than FileResponse's default so
+# that a segment needs only a few thread hops.
+ASYNC_BLOCK_SIZE = 256 * 1024
+
+
+def segment_content_type(segment: str):
+    """
+    Returns the content type for a segment file name.
+
+    Args:
+        segment (str): File name of the segment (e.g. '480p3.ts').
+
+    Returns:
+        str: MIME type of the segment container.
+    """
+    return SEGMENT_CONTENT_TYPES.get(os.path.splitext(segment)[1], "application/octet-stream")
+
+
+def parse_range(header: str, size: int):
+    """
+    Parses a single-range HTTP ``Range`` header.
+
+    Args:
+        header (str): Value of the ``Range`` request header.
+        size (int): Size of the requested file in bytes.
+
+    Returns:
+        tuple: ``(start, end)`` inclusive byte positions, or ``None`` if the
+        header is malformed or uses several ranges (served as full file).
+    Raises:
+        ValueError: If the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def offload_response(path: str, content_type: str):
+    """
+    Returns an empty response that hands the delivery of a file over to
+    the reverse proxy (``X-Accel-Redirect`` or ``X-Sendfile``).
+
+    Args:
+        path (str): Path of the file to send.
+        content_type (str): Content type of the response.
+
+    Returns:
+        HttpResponse: Response carrying the internal redirect header.
+    Raises:
+        FileNotFoundError: If the file does not exist or lies outside
+            ``MEDIA_ROOT``.
+    """
+    path = os.path.realpath(path)
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    if not os.path.isfile(path) or os.path.commonpath([path, media_root]) != media_root:
+        raise FileNotFoundError(path)
+
+    response = HttpResponse(content_type=content_type)
+    if settings.VIDEO_DELIVERY_MODE == 'x-accel':
+        relative = os.path.relpath(path, media_root).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.VIDEO_DELIVERY_INTERNAL_URL.rstrip('/') + '/' + quote(relative)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def cache_control(immutable: bool = False):
+    """
+    Returns the ``Cache-Control`` value of an HLS file.
+
+    Args:
+        immutable (bool): Whether the file never changes once written
+            (segments, sprites), as opposed to playlists.
+
+    Returns:
+        str: Header value, e.g. ``'private, max-age=31536000, immutable'``.
+    """
+    scope = settings.VIDEO_CACHE_CONTROL_SCOPE
+    if immutable:
+        return f'{scope}, max-age={settings.VIDEO_SEGMENT_MAX_AGE}, immutable'
+    return f'{scope}, max-age={settings.VIDEO_PLAYLIST_MAX_AGE}'
+
+
+def _direct_response(request, path: str, content_type: str, stat, etag: str, last_modified: int,
+                     load=None):
+    """
+    Streams a file from Django, honouring a single byte range. A range
+    guarded by a non-matching ``If-Range`` is ignored and the whole file sent.
+    Content produced by ``load`` (cached or rewritten playlists) is sent
+    from memory instead of the file.
+    """
+    content = load(stat) if load is not None else None
+    size = len(content) if content is not None else stat.st_size
+
+    range_header = request.headers.get('Range', '')
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        range_header = ''
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if content is not None:
+        if byte_range is None:
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = HttpResponse(content[start:end + 1], status=206, content_type=content_type)
+    elif byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        with open(path, 'rb') as file:
+            file.seek(start)
+            response = HttpResponse(file.read(end - start + 1), status=206, content_type=content_type)
+    if byte_range is not None:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def file_response(
+    request, path: str, content_type: str, immutable: bool = False,
+    load=None, variant: str = None, cache_header: str = None, stat=None,
+):
+    """
+    Sends a file with validators (``ETag``, ``Last-Modified``) and cache
+    headers and answers conditional requests with ``304 Not Modified``.
+
+    Files are streamed by Django, honouring a single byte range, or handed
+    over to the reverse proxy outside the ``direct`` delivery mode. Content
+    that differs from the file (a ``variant``) is always sent by Django.
+
+    Args:
+        request (HttpRequest): The current request.
+        path (str): Path of the file to send.
+        content_type (str): Content type of the response.
+        immutable (bool): Whether the file never changes once written.
+        load (callable, optional): Returns the content to send for the
+            file's ``os.stat_result``, e.g. a cached or rewritten playlist.
+        variant (str, optional): Distinguishes different content produced
+            from the same file (e.g. signed playlists) in the ``ETag``.
+        cache_header (str, optional): ``Cache-Control`` value overriding
+            the one derived from ``immutable``.
+        stat (FileStat, optional): Size and modification time of the file
+            from the manifest index; the file is stat'ed if omitted.
+
+    Returns:
+        HttpResponse: ``200`` with the whole file, ``206`` with the requested
+        range, ``304`` if the client's copy is current or ``416`` if the
+        range lies outside the file.
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    stat = stat or os.stat(path)
+    etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+    etag = f'"{etag}-{variant}"' if variant else f'"{etag}"'
+    last_modified = stat.st_mtime_ns // 10 ** 9
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.VIDEO_DELIVERY_MODE != 'direct' and variant is None:
+            response = offload_response(path, content_type)
+        else:
+            response = _direct_response(request, path, content_type, stat, etag, last_modified, load)
+
+    if response.status_code in (200, 206, 304):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = cache_header or cache_control(immutable)
+    return response
+
+
+async def _read_blocks(file, block_size: int):
+    while True:
+        block = await asyncio.to_thread(file.read, block_size)
+        if not block:
+            break
+        yield block
+
+
+async def async_file_response(request, path: str, content_type: str, **options):
+    """
+    Async variant of ``file_response`` for the ASGI views.
+
+    Headers, conditional and range handling are the same. Whole files
+    streamed by Django get an async body that reads the file in worker
+    threads; offloaded and in-memory responses are returned as they are.
+
+    Args:
+        request (HttpRequest): The current request.
+        path (str): Path of the file to send.
+        content_type (str): Content type of the response.
+        **options: Further arguments of ``file_response``.
+
+    Returns:
+        HttpResponse: See ``file_response``.
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    response = await sync_to_async(file_response)(request, path, content_type, **options)
+    file = getattr(response, 'file_to_stream', None)
+    if file is not None:
+        # The file stays registered with the response and is closed with it.
+        response.streaming_content = _read_blocks(file, ASYNC_BLOCK_SIZE)
+    return response
@@ -2,14 +2,44 @@
 video_app.api.urls
 ~~~~~~~~~~~~~~~~~~
 
-Defines API routes for listing videos and streaming HLS content (playlists and segments).
+Defines API routes for listing videos and streaming HLS content
+(master playlist, media playlists, segments and signed segments).
+
+With ``VIDEO_ASYNC_VIEWS`` the catalog and streaming routes are served by
+the async views of ``video_app.api.async_views``. Either way their requests
+are recorded by ``video_app.metrics`` and scraped from ``metrics/``.
 """
 
+from django.conf import settings
 from django.urls import path
-from .views import VideoListView, stream_m3u8, stream_segment
+
+from video_app.metrics import instrument
+from . import async_views, views
+
+if settings.VIDEO_ASYNC_VIEWS:
+    video_list = async_views.video_list
+    stream = async_views
+else:
+    video_list = views.VideoListView.as_view()
+    stream = views
 
 urlpatterns = [
-    path('video/', VideoListView.as_view(), name='video-list'),
-    path('video/<int:movie_id>/<str:resolution>/index.m3u8', stream_m3u8, name='stream-m3u8'),
-    path('video/<int:movie_id>/<str:resolution>/<str:segment>/', stream_segment, name='stream-segment'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('video/', instrument('video_list')(video_list), name='video-list'),
+    path('video/<int:movie_id>/status/', views.transcode_status, name='transcode-status'),
+    path('video/<int:movie_id>/trickplay/thumbnails.vtt', stream.stream_thumbnails, name='stream-thumbnails'),
+    path('video/<int:movie_id>/trickplay/<str:sprite>', stream.stream_sprite, name='stream-sprite'),
+    path('video/<int:movie_id>/master.m3u8', instrument('master')(stream.stream_master), name='stream-master'),
+    path(
+        'video/<int:movie_id>/signed/<str:resolution>/<str:segment>',
+        instrument('signed_segment')(stream.stream_signed_segment), name='stream-signed-segment',
+    ),
+    path(
+        'video/<int:movie_id>/<str:resolution>/index.m3u8',
+        instrument('playlist')(stream.stream_m3u8), name='stream-m3u8',
+    ),
+    path(
+        'video/<int:movie_id>/<str:resolution>/<str:segment>/',
+        instrument('segment')(stream.stream_segment), name='stream-segment',
+    ),
 ]
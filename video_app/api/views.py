@@ -5,85 +5,276 @@ video_app.api.views
 This module provides API endpoints for listing videos, 
 streaming HLS playlists (m3u8), and individual video segments (ts files).
 
-All endpoints require JWT-based authentication.
+The multivariant ``master.m3u8`` lists every rendition with its measured
+bandwidth, so players can switch renditions adaptively.
+
+All endpoints require JWT-based authentication. Depending on
+``VIDEO_DELIVERY_MODE`` files are streamed by Django or handed over to
+the reverse proxy once the request is authorized.
+
+The streaming endpoints trust the validated token instead of loading the
+user, and resolve HLS paths and playlists through the two-tier cache in
+``video_app.streamcache``, so serving a playlist or segment runs no SQL.
+Requested names are checked against the manifest index of the video
+(see ``video_app.manifest``) before the file system is touched.
+
+With ``VIDEO_SIGNED_URLS`` media playlists point to the signed segment
+endpoint, which checks an HMAC in the URL instead of a JWT
+(see ``video_app.signing``).
+
+``video_app.api.async_views`` provides async versions of the catalog and
+streaming endpoints for ASGI deployments.
+
+``metrics`` exposes the request metrics of all workers to Prometheus
+(see ``video_app.metrics``).
 """
 
-import os
-from django.http import FileResponse, Http404
+import hmac
+import time
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
+from video_app.catalog import catalog_page, catalog_response
+from video_app.metrics import render
 from video_app.models import Video
+from video_app.progress import get_progress
+from video_app.signing import verify
+from video_app.streamcache import stream_files
+from auth_app.api.authentication import CookieJWTStatelessAuthentication
+from .files import (
+    master_file,
+    media_playlist_file,
+    segment_file,
+    signed_segment_file,
+    sprite_file,
+    thumbnail_track_file,
+)
+from .streaming import file_response
 
 
 class VideoListView(APIView):
     """
-    Returns a list of available videos with metadata and thumbnail URLs.
+    Returns one page of the catalog, newest first: metadata, thumbnail URLs
+    and srcset strings of the pre-resized thumbnail variants per image
+    format. ``cursor``, ``limit``, ``fields`` and ``category`` select the
+    page, its fields and category (see ``video_app.catalog``); the next page
+    is linked in the ``Link`` header. Rendered pages are served from the
+    cache and revalidated with their ``ETag``.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        videos = Video.objects.all()
-        data = [
-            {
-                "id": video.id,
-                "created_at": video.created_at,
-                "title": video.title,
-                "description": video.description,
-                "thumbnail_url": request.build_absolute_uri(video.thumbnail.url),
-                "category": video.category
-            }
-            for video in videos
-        ]
-        return Response(data)
+        try:
+            page = catalog_page(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=400)
+        return catalog_response(request, page)
 
 
 @api_view(['GET'])
+@authentication_classes([CookieJWTStatelessAuthentication])
+@permission_classes([IsAuthenticated])
+def stream_master(request, movie_id):
+    """
+    Streams the multivariant HLS playlist (master.m3u8) of a video,
+    which references all available renditions.
+
+    Args:
+        movie_id (int): ID of the video.
+
+    Returns:
+        HttpResponse: .m3u8 file response with correct content type.
+    Raises:
+        Http404: If video or master playlist is not found.
+    """
+    try:
+        path, content_type, options = master_file(*stream_files(movie_id), movie_id)
+        return file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@api_view(['GET'])
+@authentication_classes([CookieJWTStatelessAuthentication])
 @permission_classes([IsAuthenticated])
 def stream_m3u8(request, movie_id, resolution):
     """
-    Streams the HLS master playlist (.m3u8) for a given video and resolution.
+    Streams the HLS media playlist (.m3u8) for a given video and resolution.
+
+    With ``VIDEO_SIGNED_URLS`` the segment URIs are rewritten to signed
+    URLs of the requesting user.
 
     Args:
         movie_id (int): ID of the video.
         resolution (str): Resolution folder (e.g. '480p').
 
     Returns:
-        FileResponse: .m3u8 file response with correct content type.
+        HttpResponse: .m3u8 file response with correct content type.
     Raises:
         Http404: If video or HLS file is not found.
     """
     try:
-        video = Video.objects.get(pk=movie_id)
-        base = os.path.splitext(video.video.path)[0]
-        hls_path = f"{base}_hls/{resolution}/index.m3u8"
-        return FileResponse(open(hls_path, 'rb'), content_type="application/vnd.apple.mpegurl")
+        path, content_type, options = media_playlist_file(
+            *stream_files(movie_id), movie_id, resolution, request.user.id,
+        )
+        return file_response(request, path, content_type, **options)
     except (Video.DoesNotExist, FileNotFoundError):
         raise Http404()
 
 
 @api_view(['GET'])
+@authentication_classes([CookieJWTStatelessAuthentication])
 @permission_classes([IsAuthenticated])
 def stream_segment(request, movie_id, resolution, segment):
     """
-    Streams a single HLS video segment (.ts file) for a given video and resolution.
+    Streams a single HLS video segment for a given video and resolution.
+
+    Segments are either .ts files or, for fragmented MP4 renditions, byte
+    ranges of one .mp4 file per rendition requested via the Range header.
 
     Args:
         movie_id (int): ID of the video.
         resolution (str): Resolution folder (e.g. '480p').
-        segment (str): Filename of the segment (e.g. '000.ts').
+        segment (str): Filename of the segment (e.g. '000.ts' or '480p.mp4').
 
     Returns:
-        FileResponse: Binary .ts file stream.
+        HttpResponse: Binary segment stream, partial (206) for range requests.
     Raises:
         Http404: If video or segment file is not found.
     """
+    try:
+        path, content_type, options = segment_file(*stream_files(movie_id), movie_id, resolution, segment)
+        return file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@require_safe
+def stream_signed_segment(request, movie_id, resolution, segment):
+    """
+    Streams a single HLS segment authorized by the signature in its URL.
+
+    Plain Django view without authentication or database access: the
+    signature binds user, video and expiry, and the HLS directory comes
+    from the stream cache. Responses may be cached publicly until the
+    URL expires.
+
+    Args:
+        movie_id (int): ID of the video.
+        resolution (str): Resolution folder (e.g. '480p').
+        segment (str): Filename of the segment (e.g. '480p0.ts').
+
+    Returns:
+        HttpResponse: Binary segment stream, partial (206) for range
+        requests, or 403 if the signature is missing, invalid or expired.
+    Raises:
+        Http404: If the names are invalid or video or segment is not found.
+    """
+    now = time.time()
+    if not verify(request.GET, movie_id, now):
+        return HttpResponseForbidden()
+    try:
+        path, content_type, options = signed_segment_file(
+            *stream_files(movie_id), movie_id, resolution, segment, int(request.GET['exp']), now,
+        )
+        return file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transcode_status(request, movie_id):
+    """
+    Returns the HLS processing state of a video together with the live
+    progress (position, fps, speed) of each of its encoding jobs.
+
+    Args:
+        movie_id (int): ID of the video.
+
+    Returns:
+        Response: hls_status and per-job progress records.
+    Raises:
+        Http404: If the video is not found.
+    """
     try:
         video = Video.objects.get(pk=movie_id)
-        base = os.path.splitext(video.video.path)[0]
-        segment_path = f"{base}_hls/{resolution}/{segment}"
-        return FileResponse(open(segment_path, 'rb'), content_type="video/MP2T")
+    except Video.DoesNotExist:
+        raise Http404()
+
+    return Response({
+        "id": video.id,
+        "hls_status": video.hls_status,
+        "jobs": get_progress(video.id),
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([CookieJWTStatelessAuthentication])
+@permission_classes([IsAuthenticated])
+def stream_thumbnails(request, movie_id):
+    """
+    Streams the WebVTT thumbnail track that maps playback positions
+    to regions of the trickplay sprite sheets.
+
+    Args:
+        movie_id (int): ID of the video.
+
+    Returns:
+        HttpResponse: .vtt file response.
+    Raises:
+        Http404: If video or thumbnail track is not found.
+    """
+    try:
+        path, content_type, options = thumbnail_track_file(*stream_files(movie_id))
+        return file_response(request, path, content_type, **options)
     except (Video.DoesNotExist, FileNotFoundError):
         raise Http404()
+
+
+@api_view(['GET'])
+@authentication_classes([CookieJWTStatelessAuthentication])
+@permission_classes([IsAuthenticated])
+def stream_sprite(request, movie_id, sprite):
+    """
+    Streams one trickplay sprite sheet (JPEG) of a video.
+
+    Args:
+        movie_id (int): ID of the video.
+        sprite (str): Filename of the sprite sheet (e.g. 'sprite0.jpg').
+
+    Returns:
+        HttpResponse: JPEG file response.
+    Raises:
+        Http404: If the name is invalid or video or sprite is not found.
+    """
+    try:
+        path, content_type, options = sprite_file(*stream_files(movie_id), sprite)
+        return file_response(request, path, content_type, **options)
+    except (Video.DoesNotExist, FileNotFoundError):
+        raise Http404()
+
+
+@require_safe
+def metrics(request):
+    """
+    Serves the request metrics of the catalog and streaming endpoints in
+    the Prometheus text format. Scrapers authenticate with the bearer token
+    ``VIDEO_METRICS_TOKEN``; without a token the endpoint does not exist.
+
+    Returns:
+        HttpResponse: The metrics exposition, or 403 for a wrong token.
+    Raises:
+        Http404: If no metrics token is configured.
+    """
+    if not settings.VIDEO_METRICS_TOKEN:
+        raise Http404()
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token.encode(), settings.VIDEO_METRICS_TOKEN.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,197 @@
+"""
+video_app.benchmark
+~~~~~~~~~~~~~~~~~~~
+
+Benchmarks of the transcoding pipeline on synthetic sources.
+
+Test clips are generated with ffmpeg's ``lavfi`` sources (``testsrc2``
+for video, ``sine`` for audio), so runs are reproducible on any host
+without sample media. Synthetic clips always carry an audio track. Every clip is transcoded under each requested mode
+and encoding profile (see ``VIDEO_ENCODING_PROFILES``), and wall time, CPU time of the ffmpeg processes,
+realtime factor and the output size of every rendition are recorded.
+
+Used by the ``benchmark_transcode`` management command and the tests
+marked ``benchmark``. Jobs that would be fanned out over RQ workers run
+one after another here, so ``fan_out`` and ``chunked`` report the total
+work of a transcode rather than its latency on a cluster.
+"""
+
+import os
+import platform
+import resource
+import shutil
+import tempfile
+import time
+
+import ffmpeg
+from django.conf import settings
+from django.test import override_settings
+
+from video_app.hls import AUDIO_RENDITION, write_master_playlist
+from video_app.probe import build_ladder
+from video_app.tasks import (
+    convert_to_hls,
+    encode_chunk,
+    encode_rendition,
+    encode_trickplay,
+    hls_output_dir,
+    split_source,
+    stitch_chunks,
+)
+
+MODES = ('single_pass', 'sequential', 'fan_out', 'chunked')
+SOURCE_SIZES = ('640x360', '1280x720', '1920x1080')
+SOURCE_DURATIONS = (10, 60)
+
+
+def build_synthetic_source(path: str, size: str, duration: int, frame_rate: int = 25):
+    """
+    Builds the ffmpeg graph that renders a synthetic test clip.
+
+    Args:
+        path (str): Destination of the MP4 file.
+        size (str): Frame size (e.g. '1280x720').
+        duration (int): Length of the clip in seconds.
+        frame_rate (int): Frames per second.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    video = ffmpeg.input(f'testsrc2=size={size}:rate={frame_rate}:duration={duration}', f='lavfi')
+    audio = ffmpeg.input(f'sine=frequency=440:duration={duration}', f='lavfi')
+    return ffmpeg.output(
+        video, audio, path,
+        vcodec='h264', acodec='aac', pix_fmt='yuv420p', preset='ultrafast',
+    )
+
+
+def rendition_bytes(output_dir: str, ladder: dict):
+    """
+    Sums up the size of every rendition's playlist and media files,
+    including the shared audio rendition.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        dict: Mapping of rendition name (and ``audio``) to size in bytes.
+    """
+    sizes = {}
+    for res in [*ladder, AUDIO_RENDITION]:
+        res_dir = os.path.join(output_dir, res)
+        sizes[res] = sum(
+            os.path.getsize(os.path.join(res_dir, name)) for name in os.listdir(res_dir)
+        ) if os.path.isdir(res_dir) else 0
+    return sizes
+
+
+def transcode(source: str, mode: str, ladder: dict):
+    """
+    Runs a complete transcode in the current process, the way the RQ
+    jobs of the given mode would run it.
+
+    Args:
+        source (str): The full path to the source video file.
+        mode (str): Transcoding mode (see ``VIDEO_TRANSCODE_MODE``).
+        ladder (dict): Mapping of rendition name to frame size.
+    """
+    trickplay = settings.VIDEO_TRICKPLAY_ENABLED
+    if mode == 'fan_out':
+        for index, (res, size) in enumerate(ladder.items()):
+            encode_rendition(source, res, size, trickplay and index == 0, audio=index == 0)
+    elif mode == 'chunked':
+        for chunk in split_source(source, settings.VIDEO_CHUNK_SECONDS):
+            encode_chunk(chunk, ladder)
+        if trickplay:
+            encode_trickplay(source, ladder)
+        stitch_chunks(source, ladder)
+    else:
+        convert_to_hls(source, mode, ladder, audio=True)
+    write_master_playlist(hls_output_dir(source), ladder)
+
+
+def _child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(source: str, duration: float, mode: str, profile: str, ladder: dict):
+    """
+    Transcodes a source once and measures the run.
+
+    Args:
+        source (str): The full path to the source video file.
+        duration (float): Length of the source in seconds.
+        mode (str): Transcoding mode.
+        profile (str): Name of the encoding profile.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        dict: mode, profile, wall_seconds, cpu_seconds, realtime_factor
+        (seconds of video encoded per second) and rendition_bytes.
+    """
+    output_dir = hls_output_dir(source)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    with override_settings(VIDEO_ENCODING_PROFILE=profile):
+        cpu_start, wall_start = _child_cpu_seconds(), time.perf_counter()
+        transcode(source, mode, ladder)
+        wall = time.perf_counter() - wall_start
+        cpu = _child_cpu_seconds() - cpu_start
+
+    return {
+        'mode': mode,
+        'profile': profile,
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        'realtime_factor': round(duration / wall, 3) if wall else None,
+        'rendition_bytes': rendition_bytes(output_dir, ladder),
+    }
+
+
+def run_benchmark(sizes=SOURCE_SIZES, durations=SOURCE_DURATIONS, modes=MODES, profiles=None,
+                  work_dir: str = None):
+    """
+    Benchmarks every combination of synthetic source, mode and encoding profile.
+
+    Args:
+        sizes (iterable): Frame sizes of the synthetic sources.
+        durations (iterable): Lengths of the synthetic sources in seconds.
+        modes (iterable): Transcoding modes to run.
+        profiles (iterable, optional): Encoding profiles to run, all
+            configured profiles if omitted.
+        work_dir (str, optional): Directory for sources and output, a
+            temporary directory that is removed afterwards if omitted.
+
+    Returns:
+        dict: ``host`` (machine, CPU count, Python version) and ``results``,
+        one entry per source with its runs.
+    """
+    profiles = profiles or list(settings.VIDEO_ENCODING_PROFILES)
+    report = {
+        'host': {
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+        },
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = work_dir or temp_dir
+        for size in sizes:
+            width, height = (int(value) for value in size.split('x'))
+            ladder = build_ladder(width, height)
+            for duration in durations:
+                source = os.path.join(work_dir, f'synthetic_{size}_{duration}s.mp4')
+                build_synthetic_source(source, size, duration).run(overwrite_output=True, quiet=True)
+                report['results'].append({
+                    'source': {'size': size, 'duration': duration, 'ladder': ladder},
+                    'runs': [
+                        measure(source, duration, mode, profile, ladder)
+                        for mode in modes
+                        for profile in profiles
+                    ],
+                })
+    return report
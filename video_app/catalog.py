@@ -0,0 +1,299 @@
+"""
+video_app.catalog
+~~~~~~~~~~~~~~~~~
+
+Keyset pagination, sparse fieldsets and filtering of the video catalog.
+
+The catalog is ordered newest first by ``(created_at, id)``. A page is
+read with one indexed range scan that starts after the last row of the
+previous page, named by an opaque ``cursor``, instead of an ``OFFSET``
+that scans every skipped row, so every page costs the same however large
+the catalog grows. ``category`` filters on the composite index
+``(category, created_at, id)``.
+
+``fields`` selects the response fields; only the columns they need are
+loaded and thumbnail variants are only prefetched for ``thumbnail_srcset``.
+
+Query parameters:
+    cursor: ``next`` cursor of the previous page.
+    limit: Page size, ``VIDEO_CATALOG_PAGE_SIZE`` by default and at most
+        ``VIDEO_CATALOG_MAX_PAGE_SIZE``.
+    fields: Comma separated response fields, all by default.
+    category: Only videos of this category.
+
+Rendered pages are cached (Redis in production) per page, filter and host
+under a versioned key together with a strong ``ETag`` of the body. The
+catalog only changes when videos or their thumbnail variants are saved or
+deleted; the signals then bump the version, so all cached pages are
+replaced at once and the old ones simply expire.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.renderers import JSONRenderer
+
+from video_app.api.serializers import VideoSerializer
+from video_app.metrics import record_cache
+from video_app.models import Video
+
+CATALOG_VERSION_KEY = 'catalog-version'
+
+# Catalog responses depend on the user's session and are revalidated on
+# every load, which the ETag turns into a 304 while nothing changed.
+CATALOG_CACHE_CONTROL = 'private, no-cache'
+
+# Response fields of a catalog entry and the model columns they are built from.
+CATALOG_FIELDS = {
+    'id': ('id',),
+    'created_at': ('created_at',),
+    'title': ('title',),
+    'description': ('description',),
+    'thumbnail_url': ('thumbnail',),
+    'thumbnail_srcset': (),
+    'category': ('category',),
+}
+
+
+def encode_cursor(video: Video):
+    """
+    Returns the opaque cursor pointing after a video.
+
+    Args:
+        video (Video): Last video of a page.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    position = f'{video.created_at.isoformat()}|{video.pk}'
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decodes a cursor created by ``encode_cursor``.
+
+    Args:
+        cursor (str): The cursor from the query string.
+
+    Returns:
+        tuple: ``(created_at, id)`` of the last video of the previous page.
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = position.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor.')
+
+
+def parse_fields(value: str = None):
+    """
+    Parses the ``fields`` query parameter.
+
+    Args:
+        value (str, optional): Comma separated field names.
+
+    Returns:
+        list: Requested fields in catalog order, all fields if omitted.
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not value:
+        return list(CATALOG_FIELDS)
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(CATALOG_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return [name for name in CATALOG_FIELDS if name in requested]
+
+
+def parse_limit(value: str = None):
+    """
+    Parses the ``limit`` query parameter.
+
+    Args:
+        value (str, optional): Requested page size.
+
+    Returns:
+        int: Page size between 1 and ``VIDEO_CATALOG_MAX_PAGE_SIZE``.
+    Raises:
+        ValueError: If the value is not a positive integer.
+    """
+    if not value:
+        return settings.VIDEO_CATALOG_PAGE_SIZE
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError('limit must be a positive integer.')
+    return min(int(value), settings.VIDEO_CATALOG_MAX_PAGE_SIZE)
+
+
+def catalog_query(params):
+    """
+    Builds the catalog query for the query parameters of a request.
+
+    Args:
+        params (QueryDict): Query parameters (see module docstring).
+
+    Returns:
+        tuple: ``(queryset, fields, limit)``; the queryset yields up to
+        ``limit + 1`` videos, the extra one only tells that a next page
+        exists.
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+    fields = parse_fields(params.get('fields'))
+    limit = parse_limit(params.get('limit'))
+
+    columns = {'id', 'created_at'}
+    for name in fields:
+        columns.update(CATALOG_FIELDS[name])
+    queryset = Video.objects.only(*columns).order_by('-created_at', '-id')
+    if 'thumbnail_srcset' in fields:
+        queryset = queryset.prefetch_related('thumbnail_variants')
+
+    category = params.get('category')
+    if category:
+        queryset = queryset.filter(category=category)
+    cursor = params.get('cursor')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset[:limit + 1], fields, limit
+
+
+def next_link(request, videos: list, limit: int):
+    """
+    Returns the ``Link`` header value pointing to the next page.
+
+    Args:
+        request (HttpRequest): The current request.
+        videos (list): Videos fetched for the page (up to ``limit + 1``).
+        limit (int): Page size.
+
+    Returns:
+        str: ``<url>; rel="next"``, or ``None`` on the last page.
+    """
+    if len(videos) <= limit:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = encode_cursor(videos[limit - 1])
+    return f'<{request.build_absolute_uri("?" + params.urlencode())}>; rel="next"'
+
+
+def _new_version():
+    # A lost version key must never fall back to a version whose pages
+    # are still cached, so versions start from the clock.
+    return time.time_ns()
+
+
+def bump_catalog_version():
+    """
+    Invalidates all cached catalog pages by moving to a new version.
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, _new_version(), None)
+
+
+def _page_key(version: int, request, fields: list, limit: int):
+    params = [
+        request.build_absolute_uri('/'),
+        request.GET.get('cursor', ''),
+        request.GET.get('category', ''),
+        ','.join(fields),
+        limit,
+    ]
+    digest = hashlib.sha256(json.dumps(params).encode()).hexdigest()
+    return f'catalog-page:{version}:{digest}'
+
+
+def _render_page(request, videos: list, fields: list, limit: int):
+    data = VideoSerializer(videos[:limit], many=True, fields=fields, context={'request': request}).data
+    body = JSONRenderer().render(data)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return body, etag, next_link(request, videos, limit)
+
+
+def catalog_page(request):
+    """
+    Returns the rendered catalog page of a request, from the cache if the
+    catalog has not changed since it was rendered.
+
+    Args:
+        request (HttpRequest): The catalog request (see module docstring
+            for its query parameters).
+
+    Returns:
+        tuple: ``(body, etag, link)``, the JSON body, its strong ``ETag``
+        and the ``Link`` header of the next page (``None`` on the last).
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    queryset, fields, limit = catalog_query(request.GET)
+    version = cache.get_or_set(CATALOG_VERSION_KEY, _new_version, None)
+    key = _page_key(version, request, fields, limit)
+    page = cache.get(key)
+    record_cache('catalog', page is not None)
+    if page is None:
+        page = _render_page(request, list(queryset), fields, limit)
+        cache.set(key, page, settings.VIDEO_CATALOG_CACHE_TIMEOUT)
+    return page
+
+
+async def acatalog_page(request):
+    """
+    Async variant of ``catalog_page`` for the ASGI views.
+
+    Args:
+        request (HttpRequest): The catalog request.
+
+    Returns:
+        tuple: ``(body, etag, link)``, see ``catalog_page``.
+    Raises:
+        ValueError: If a query parameter is invalid.
+    """
+    queryset, fields, limit = catalog_query(request.GET)
+    version = await cache.aget_or_set(CATALOG_VERSION_KEY, _new_version, None)
+    key = _page_key(version, request, fields, limit)
+    page = await cache.aget(key)
+    record_cache('catalog', page is not None)
+    if page is None:
+        page = _render_page(request, [video async for video in queryset], fields, limit)
+        await cache.aset(key, page, settings.VIDEO_CATALOG_CACHE_TIMEOUT)
+    return page
+
+
+def catalog_response(request, page: tuple):
+    """
+    Builds the response of a rendered catalog page, ``304 Not Modified``
+    if the client's copy carries the same ``ETag``.
+
+    Args:
+        request (HttpRequest): The catalog request.
+        page (tuple): ``(body, etag, link)`` from ``catalog_page``.
+
+    Returns:
+        HttpResponse: JSON response with ``ETag``, ``Cache-Control`` and,
+        unless it is the last page, ``Link`` header.
+    """
+    body, etag, link = page
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = CATALOG_CACHE_CONTROL
+    if link:
+        response['Link'] = link
+    return response
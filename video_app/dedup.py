@@ -0,0 +1,89 @@
+"""
+video_app.dedup
+~~~~~~~~~~~~~~~
+
+Content-hash based deduplication of transcodes.
+
+Uploads are fingerprinted with a streaming SHA-256. If a finished HLS
+output for the same content already exists it is hard-linked instead of
+encoded again, and a cache lock (Redis ``SET NX`` in production) makes sure
+only one transcode per content hash runs at a time.
+"""
+
+import hashlib
+import os
+import shutil
+
+from django.core.cache import cache
+
+HASH_CHUNK_SIZE = 1024 * 1024
+LOCK_TTL = 60 * 60 * 12
+
+
+def content_hash(path: str):
+    """
+    Computes the SHA-256 of a file without loading it into memory.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _lock_key(digest: str):
+    return f'transcode-lock:{digest}'
+
+
+def acquire_lock(digest: str, video_id: int):
+    """
+    Tries to become the only transcode of a content hash.
+
+    Args:
+        digest (str): Content hash of the source.
+        video_id (int): Primary key of the video that wants to transcode.
+
+    Returns:
+        bool: True if the lock was acquired (or is already held by the video).
+    """
+    return cache.add(_lock_key(digest), video_id, LOCK_TTL) or cache.get(_lock_key(digest)) == video_id
+
+
+def release_lock(digest: str, video_id: int):
+    """
+    Releases the transcode lock of a content hash if the video holds it.
+
+    Args:
+        digest (str): Content hash of the source.
+        video_id (int): Primary key of the video holding the lock.
+    """
+    if digest and cache.get(_lock_key(digest)) == video_id:
+        cache.delete(_lock_key(digest))
+
+
+def _link_or_copy(source: str, destination: str):
+    """
+    Hard-links a file, falling back to a copy across file systems.
+    """
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def link_output(source_dir: str, target_dir: str):
+    """
+    Recreates an existing HLS output tree for another video using hard links,
+    so identical content occupies disk space only once.
+
+    Args:
+        source_dir (str): HLS directory of the already transcoded video.
+        target_dir (str): HLS directory of the duplicate upload.
+    """
+    shutil.copytree(source_dir, target_dir, copy_function=_link_or_copy, dirs_exist_ok=True)
@@ -0,0 +1,132 @@
+"""
+video_app.encoding
+~~~~~~~~~~~~~~~~~~
+
+Encoding profiles and per-title complexity analysis.
+
+A profile (see ``VIDEO_ENCODING_PROFILES``) sets the x264 preset, the
+constant rate factor and a bitrate cap for a 1080p rendition; smaller
+renditions get a cap proportional to their pixel count. CRF keeps the
+quality constant while the cap (``maxrate``/``bufsize``) bounds the peak
+bitrate a player has to sustain.
+
+With ``VIDEO_PER_TITLE_ENCODING`` a short sample of the source is encoded
+at low resolution first. Its bitrate, relative to that of demanding
+content, is the title's complexity and scales the caps down, so simple
+content such as lectures or animation is stored and streamed with far
+fewer bytes.
+"""
+
+import ffmpeg
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from video_app.scheduler import rendition_weight
+
+COMPLEXITY_SAMPLE_HEIGHT = 360
+COMPLEXITY_SAMPLE_CRF = 23
+# Bitrate of the complexity sample for demanding content (sports, film grain).
+COMPLEXITY_REFERENCE_KBPS = 1800
+COMPLEXITY_FLOOR = 0.3
+
+
+def encoding_profile(name: str = None):
+    """
+    Returns an encoding profile from the settings.
+
+    Args:
+        name (str, optional): Profile name, defaults to
+            ``settings.VIDEO_ENCODING_PROFILE``.
+
+    Returns:
+        dict: The profile with ``preset``, ``crf`` and ``maxrate_1080p`` (kbit/s).
+
+    Raises:
+        ImproperlyConfigured: If no profile of that name is defined.
+    """
+    name = name or settings.VIDEO_ENCODING_PROFILE
+    try:
+        return settings.VIDEO_ENCODING_PROFILES[name]
+    except KeyError:
+        raise ImproperlyConfigured(f'Unknown encoding profile: {name}')
+
+
+def video_options(size: str, complexity: float = None, profile: str = None):
+    """
+    Returns the x264 options of a rendition.
+
+    Args:
+        size (str): Frame size of the rendition (e.g. '1280x720').
+        complexity (float, optional): Complexity of the title between
+            ``COMPLEXITY_FLOOR`` and 1. Full caps are used if omitted.
+        profile (str, optional): Profile name, defaults to
+            ``settings.VIDEO_ENCODING_PROFILE``.
+
+    Returns:
+        dict: ffmpeg output options (preset, crf, maxrate, bufsize).
+    """
+    options = encoding_profile(profile)
+    maxrate = options['maxrate_1080p'] * rendition_weight(size) * (complexity or 1.0)
+    maxrate = max(1, int(round(maxrate)))
+    return {
+        'preset': options['preset'],
+        'crf': options['crf'],
+        'maxrate': f'{maxrate}k',
+        'bufsize': f'{maxrate * 2}k',
+    }
+
+
+def build_complexity_sample(source: str, start: float, seconds: float):
+    """
+    Builds the ffmpeg graph that encodes the complexity sample to stdout.
+
+    Args:
+        source (str): The full path to the source video file.
+        start (float): Offset of the sample in seconds.
+        seconds (float): Length of the sample in seconds.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    return (
+        ffmpeg
+        .input(source, ss=start, t=seconds)
+        .video
+        .filter('scale', -2, COMPLEXITY_SAMPLE_HEIGHT)
+        .output('pipe:', f='h264', vcodec='libx264', preset='ultrafast', crf=COMPLEXITY_SAMPLE_CRF)
+    )
+
+
+def measure_complexity(source: str, duration: float):
+    """
+    Estimates how hard a title is to compress by encoding a short sample
+    from the middle of it.
+
+    Args:
+        source (str): The full path to the source video file.
+        duration (float): Length of the source in seconds.
+
+    Returns:
+        float: Complexity between ``COMPLEXITY_FLOOR`` and 1.
+    """
+    seconds = min(settings.VIDEO_COMPLEXITY_SAMPLE_SECONDS, duration)
+    start = max(0.0, (duration - seconds) / 2)
+    data, _ = build_complexity_sample(source, start, seconds).run(capture_stdout=True, quiet=True)
+    return complexity_from_sample(len(data), seconds)
+
+
+def complexity_from_sample(sample_bytes: int, seconds: float):
+    """
+    Converts the size of a complexity sample into a complexity score.
+
+    Args:
+        sample_bytes (int): Size of the encoded sample.
+        seconds (float): Length of the sample in seconds.
+
+    Returns:
+        float: Complexity between ``COMPLEXITY_FLOOR`` and 1.
+    """
+    if not seconds:
+        return 1.0
+    kbps = sample_bytes * 8 / 1000 / seconds
+    return round(min(1.0, max(COMPLEXITY_FLOOR, kbps / COMPLEXITY_REFERENCE_KBPS)), 3)
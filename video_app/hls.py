@@ -0,0 +1,194 @@
+"""
+video_app.hls
+~~~~~~~~~~~~~
+
+Helpers for reading and writing HLS playlists produced by the
+transcoding pipeline.
+"""
+
+import math
+import os
+import shutil
+
+from video_app.probe import probe_codecs
+
+MASTER_PLAYLIST = 'master.m3u8'
+# Name the fan-in job writes the final master playlist to before it is
+# indexed and moved over the live one.
+STAGED_MASTER_PLAYLIST = 'master.m3u8.staged'
+AUDIO_RENDITION = 'audio'
+AUDIO_GROUP_ID = 'audio'
+
+
+def measure_rendition(res_dir: str):
+    """
+    Measures the bitrate of an encoded rendition from its segments.
+
+    Args:
+        res_dir (str): Directory holding the rendition's playlist and segments.
+
+    Returns:
+        dict: ``bandwidth`` (peak segment bitrate) and ``average_bandwidth``
+        in bits per second, plus the path of the first ``segment``.
+    """
+    segments = parse_media_playlist(os.path.join(res_dir, 'index.m3u8'))
+    peak = 0
+    total_bits = 0
+    total_duration = 0.0
+    for duration, uri, byterange in segments:
+        if byterange:
+            bits = byterange[1] * 8
+        else:
+            bits = os.path.getsize(os.path.join(res_dir, uri)) * 8
+        if duration:
+            peak = max(peak, bits / duration)
+        total_bits += bits
+        total_duration += duration or 0
+
+    return {
+        'bandwidth': math.ceil(peak),
+        'average_bandwidth': math.ceil(total_bits / total_duration) if total_duration else 0,
+        'segment': os.path.join(res_dir, segments[0][1]) if segments else None,
+    }
+
+
+def write_master_playlist(output_dir: str, resolutions: dict, name: str = MASTER_PLAYLIST):
+    """
+    Writes the multivariant ``master.m3u8`` that references every rendition.
+
+    ``BANDWIDTH`` and ``AVERAGE-BANDWIDTH`` are measured from the encoded
+    segments and ``CODECS`` is probed from them, so players can pick and
+    switch renditions without downloading any media first.
+
+    If a shared audio rendition exists it is declared as ``#EXT-X-MEDIA``
+    audio group; every variant references it, and its bitrate and codec
+    are added to the variant's, since a player fetches both.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+        resolutions (dict): Mapping of rendition name to frame size.
+        name (str): File name of the playlist in ``output_dir``.
+
+    Returns:
+        str: Path of the written master playlist.
+    """
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+
+    audio = {'bandwidth': 0, 'average_bandwidth': 0, 'codecs': []}
+    audio_dir = os.path.join(output_dir, AUDIO_RENDITION)
+    has_audio = os.path.isfile(os.path.join(audio_dir, 'index.m3u8'))
+    if has_audio:
+        audio.update(measure_rendition(audio_dir))
+        if audio['segment']:
+            audio['codecs'] = probe_codecs(audio['segment'])
+        lines.append(
+            f'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="{AUDIO_GROUP_ID}",NAME="Default",'
+            f'DEFAULT=YES,AUTOSELECT=YES,URI="{AUDIO_RENDITION}/index.m3u8"'
+        )
+
+    for res, size in resolutions.items():
+        measured = measure_rendition(os.path.join(output_dir, res))
+        attributes = [
+            f"BANDWIDTH={measured['bandwidth'] + audio['bandwidth']}",
+            f"AVERAGE-BANDWIDTH={measured['average_bandwidth'] + audio['average_bandwidth']}",
+            f'RESOLUTION={size}',
+        ]
+        if measured['segment']:
+            codecs = probe_codecs(measured['segment']) + audio['codecs']
+            attributes.append('CODECS="{}"'.format(','.join(codecs)))
+        if has_audio:
+            attributes.append(f'AUDIO="{AUDIO_GROUP_ID}"')
+        lines.append('#EXT-X-STREAM-INF:' + ','.join(attributes))
+        lines.append(f'{res}/index.m3u8')
+
+    path = os.path.join(output_dir, name)
+    with open(path, 'w') as playlist:
+        playlist.write('\n'.join(lines) + '\n')
+    return path
+
+
+def parse_media_playlist(path: str):
+    """
+    Reads the segments of a media playlist.
+
+    Args:
+        path (str): Path of an ``index.m3u8`` media playlist.
+
+    Returns:
+        list: ``(duration, uri, byterange)`` tuples in playlist order.
+        ``byterange`` is an ``(offset, length)`` tuple for segments stored
+        inside a single file (``#EXT-X-BYTERANGE``), otherwise ``None``.
+    """
+    segments = []
+    duration = None
+    byterange = None
+    next_offset = {}
+    with open(path) as playlist:
+        for line in playlist:
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                duration = float(line[len('#EXTINF:'):].split(',')[0])
+            elif line.startswith('#EXT-X-BYTERANGE:'):
+                byterange = line[len('#EXT-X-BYTERANGE:'):]
+            elif line and not line.startswith('#'):
+                if byterange is not None:
+                    length, _, offset = byterange.partition('@')
+                    offset = int(offset) if offset else next_offset.get(line, 0)
+                    next_offset[line] = offset + int(length)
+                    byterange = (offset, int(length))
+                segments.append((duration, line, byterange))
+                duration = None
+                byterange = None
+    return segments
+
+
+def stitch_chunk_playlists(output_dir: str, chunk_dirs: list, res: str):
+    """
+    Joins the HLS output of independently encoded chunks into one
+    continuous media playlist for a rendition.
+
+    Segments are moved into ``<output_dir>/<res>/`` and renumbered so the
+    numbering runs across chunk boundaries. Because every chunk starts its
+    timestamps at zero, an ``#EXT-X-DISCONTINUITY`` tag is placed before the
+    first segment of every chunk but the first one.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+        chunk_dirs (list): HLS output directories of the chunks, in order.
+        res (str): Rendition name (e.g. '720p').
+
+    Returns:
+        str: Path of the stitched media playlist.
+    """
+    res_dir = os.path.join(output_dir, res)
+    os.makedirs(res_dir, exist_ok=True)
+
+    entries = []
+    durations = []
+    for chunk_index, chunk_dir in enumerate(chunk_dirs):
+        chunk_res_dir = os.path.join(chunk_dir, res)
+        for segment_index, (duration, uri, _) in enumerate(
+            parse_media_playlist(os.path.join(chunk_res_dir, 'index.m3u8'))
+        ):
+            name = f'{res}{len(durations)}.ts'
+            shutil.move(os.path.join(chunk_res_dir, uri), os.path.join(res_dir, name))
+            if chunk_index and not segment_index:
+                entries.append('#EXT-X-DISCONTINUITY')
+            entries.append(f'#EXTINF:{duration:.6f},')
+            entries.append(name)
+            durations.append(duration)
+
+    lines = [
+        '#EXTM3U',
+        '#EXT-X-VERSION:3',
+        f'#EXT-X-TARGETDURATION:{math.ceil(max(durations, default=0))}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+        *entries,
+        '#EXT-X-ENDLIST',
+    ]
+
+    path = os.path.join(res_dir, 'index.m3u8')
+    with open(path, 'w') as playlist:
+        playlist.write('\n'.join(lines) + '\n')
+    return path
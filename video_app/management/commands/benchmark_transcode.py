@@ -0,0 +1,62 @@
+"""
+video_app.management.commands.benchmark_transcode
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Management command that benchmarks the transcoding pipeline on synthetic
+sources and prints (or writes) the report as JSON.
+
+Example:
+    python manage.py benchmark_transcode --sizes 1280x720 --durations 30 \\
+        --modes single_pass,sequential --profiles speed,size --output report.json
+"""
+
+import json
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from video_app.benchmark import MODES, SOURCE_DURATIONS, SOURCE_SIZES, run_benchmark
+
+
+def _csv(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks HLS transcoding on synthetic lavfi sources and reports the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=_csv, default=list(SOURCE_SIZES),
+                            help='Comma-separated frame sizes of the synthetic sources.')
+        parser.add_argument('--durations', type=_csv, default=[str(d) for d in SOURCE_DURATIONS],
+                            help='Comma-separated source lengths in seconds.')
+        parser.add_argument('--modes', type=_csv, default=list(MODES),
+                            help='Comma-separated transcoding modes.')
+        parser.add_argument('--profiles', type=_csv,
+                            help='Comma-separated encoding profiles, all configured profiles by default.')
+        parser.add_argument('--output', help='Write the report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['modes']) - set(MODES)
+        if unknown:
+            raise CommandError(f'Unknown transcoding mode(s): {", ".join(sorted(unknown))}')
+        unknown = set(options['profiles'] or []) - set(settings.VIDEO_ENCODING_PROFILES)
+        if unknown:
+            raise CommandError(f'Unknown encoding profile(s): {", ".join(sorted(unknown))}')
+        try:
+            durations = [int(duration) for duration in options['durations']]
+        except ValueError:
+            raise CommandError('Durations must be whole seconds.')
+        if shutil.which('ffmpeg') is None:
+            raise CommandError('ffmpeg was not found on PATH.')
+
+        report = run_benchmark(options['sizes'], durations, options['modes'], options['profiles'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+            self.stdout.write(self.style.SUCCESS(f'Benchmark report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,49 @@
+"""
+video_app.management.commands.index_hls
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Management command that writes the HLS manifest index of videos with
+HLS output on disk, e.g. of videos transcoded before manifests existed.
+The streaming endpoints reject every file of a video without a manifest.
+
+Videos transcoded before the status was tracked are still ``pending``;
+they are indexed as well and marked ``ready``. Videos that are being
+transcoded or failed are skipped, since their output is incomplete.
+
+Example:
+    python manage.py index_hls            # videos without a manifest
+    python manage.py index_hls --rebuild  # all videos with HLS output
+"""
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from video_app.manifest import write_manifest
+from video_app.models import Video
+from video_app.tasks import hls_output_dir
+
+
+class Command(BaseCommand):
+    help = 'Writes the HLS manifest index of videos with HLS output.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rebuild existing manifests as well.')
+
+    def handle(self, *args, **options):
+        videos = Video.objects.filter(
+            hls_status__in=(Video.HLSStatus.PENDING, Video.HLSStatus.READY),
+        )
+        if not options['rebuild']:
+            videos = videos.filter(hls_manifest__isnull=True)
+
+        for video in videos:
+            output_dir = hls_output_dir(video.video.path)
+            if not os.path.isdir(output_dir):
+                self.stderr.write(f'{video.pk}: no HLS output at {output_dir}')
+                continue
+            manifest = write_manifest(video.pk, output_dir)
+            Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.READY)
+            self.stdout.write(f'{video.pk}: {manifest}')
+        self.stdout.write(self.style.SUCCESS('Manifests written.'))
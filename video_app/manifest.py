@@ -0,0 +1,165 @@
+"""
+video_app.manifest
+~~~~~~~~~~~~~~~~~~
+
+Persistent index of a video's HLS output.
+
+When a transcode finishes, every file below the HLS directory (playlists,
+segments, the audio rendition and trickplay files) is recorded with its
+size, modification time, duration and checksum in an ``HlsManifest``. The
+streaming endpoints look requested names up in this index (cached in
+``video_app.streamcache``) before touching the disk, so names that were
+never written, including path traversal attempts, are rejected without a
+syscall, and the sizes for range and cache headers come from the index.
+
+While a video is watched during transcoding (``VIDEO_WATCH_WHILE_TRANSCODING``)
+its manifest only holds the master playlist and names the ``live``
+renditions. A ``LiveIndex`` accepts the playlists of those renditions and
+exactly the segments their playlists already list, which the muxer only
+does once a segment is complete. The fan-in job indexes the final master
+playlist under a staged name and only then moves it over the live one, so
+the live index stays current until the final manifest is stored.
+"""
+
+import hashlib
+import os
+
+from video_app.hls import MASTER_PLAYLIST, STAGED_MASTER_PLAYLIST, parse_media_playlist
+from video_app.models import HlsManifest
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_checksum(path: str):
+    """
+    Computes the SHA-256 checksum of a file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hex encoded digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LiveIndex(dict):
+    """
+    Manifest index of a video whose ``live`` renditions are still being
+    encoded. Names of those renditions are resolved against their growing
+    playlists on lookup; all other names behave as in a plain index.
+    """
+
+    def __init__(self, index: dict, output_dir: str, live: list):
+        super().__init__(index)
+        self.output_dir = output_dir
+        self.live = list(live)
+
+    def __missing__(self, name: str):
+        rendition, _, filename = name.partition('/')
+        if rendition not in self.live or not filename or '/' in filename:
+            raise KeyError(name)
+        playlist = os.path.join(self.output_dir, rendition, 'index.m3u8')
+        try:
+            if filename != 'index.m3u8':
+                if filename not in {uri for _, uri, _ in parse_media_playlist(playlist)}:
+                    raise KeyError(name)
+            stat = os.stat(os.path.join(self.output_dir, rendition, filename))
+        except FileNotFoundError:
+            raise KeyError(name)
+        return stat.st_size, stat.st_mtime_ns
+
+    def is_current(self):
+        """
+        Returns whether the master playlist is still the one indexed. The
+        fan-in job replaces it when the transcode finishes, so a cached
+        live index can be told apart from the final manifest.
+        """
+        try:
+            stat = os.stat(os.path.join(self.output_dir, MASTER_PLAYLIST))
+        except FileNotFoundError:
+            return False
+        return self.get(MASTER_PLAYLIST) == (stat.st_size, stat.st_mtime_ns)
+
+
+def _file_record(path: str, duration: float = None):
+    stat = os.stat(path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'duration': duration,
+        'sha256': file_checksum(path),
+    }
+
+
+def _segment_durations(output_dir: str, rendition: str):
+    durations = {}
+    for duration, uri, _ in parse_media_playlist(os.path.join(output_dir, rendition, 'index.m3u8')):
+        name = f'{rendition}/{uri}'
+        durations[name] = round(durations.get(name, 0.0) + (duration or 0.0), 6)
+    return durations
+
+
+def build_manifest(output_dir: str):
+    """
+    Indexes the files of an HLS output directory. A staged master
+    playlist is recorded as ``master.m3u8``, which it is moved to next.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+
+    Returns:
+        tuple: ``(renditions, files)``, the names of all directories with
+        a media playlist and the per-file records keyed by the path
+        relative to ``output_dir`` (always with '/' separators).
+    """
+    renditions = sorted(
+        name for name in os.listdir(output_dir)
+        if os.path.isfile(os.path.join(output_dir, name, 'index.m3u8'))
+    )
+    durations = {}
+    for rendition in renditions:
+        durations.update(_segment_durations(output_dir, rendition))
+
+    files = {}
+    for root, _, names in os.walk(output_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, output_dir).replace(os.sep, '/')
+            files[relative] = _file_record(path, durations.get(relative))
+    if STAGED_MASTER_PLAYLIST in files:
+        files[MASTER_PLAYLIST] = files.pop(STAGED_MASTER_PLAYLIST)
+    return renditions, files
+
+
+def write_manifest(video_id: int, output_dir: str, original: HlsManifest = None, live: list = None):
+    """
+    Stores the manifest of a video's HLS output.
+
+    Args:
+        video_id (int): Primary key of the video.
+        output_dir (str): The HLS root directory of the video.
+        original (HlsManifest, optional): Manifest of identical output the
+            files were linked from, copied instead of reading the files.
+        live (list, optional): Renditions that are still being encoded.
+            Only the master playlist is indexed then.
+
+    Returns:
+        HlsManifest: The stored manifest.
+    """
+    if original is not None:
+        renditions, files = original.renditions, original.files
+    elif live:
+        renditions = list(live)
+        files = {MASTER_PLAYLIST: _file_record(os.path.join(output_dir, MASTER_PLAYLIST))}
+    else:
+        renditions, files = build_manifest(output_dir)
+    manifest, _ = HlsManifest.objects.update_or_create(
+        video_id=video_id,
+        defaults={'renditions': renditions, 'files': files, 'live': list(live or [])},
+    )
+    return manifest
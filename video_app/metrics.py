@@ -0,0 +1,307 @@
+"""
+video_app.metrics
+~~~~~~~~~~~~~~~~~
+
+Request metrics of the catalog and streaming endpoints in the Prometheus
+text format.
+
+``instrument`` wraps a view (sync or async) and records per endpoint and
+resolution the request count by status, the response time as histogram,
+the bytes sent by Django and the rate of ``404`` responses. The segment,
+playlist, manifest and catalog caches count their hits and misses with
+``record_cache``.
+
+Every worker process adds its observations to a local buffer, which is
+added to one Redis hash every ``VIDEO_METRICS_FLUSH_SECONDS`` with a single
+pipelined round trip, so the counts of all gunicorn workers are aggregated
+without touching Redis on every request. Without a Redis cache (e.g. in
+tests) the totals of the process are kept in memory. Percentiles are
+computed by Prometheus from the histogram buckets, e.g.
+``histogram_quantile(0.99, rate(videoflix_http_request_duration_seconds_bucket[5m]))``.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+METRICS_KEY = 'videoflix:stream-metrics'
+
+# Upper bounds (seconds) of the response time histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Resolution labels are taken from the URL, so anything that is not a
+# rendition name is reported as 'other' to keep the number of series bounded.
+RESOLUTION_RE = re.compile(r'^(\d{3,4}p|audio)$')
+
+LE_RE = re.compile(r',?le="([^"]*)"')
+
+FAMILIES = {
+    'videoflix_http_requests_total': (
+        'counter', 'Requests by endpoint, resolution and status code.',
+    ),
+    'videoflix_http_request_duration_seconds': (
+        'histogram', 'Response time of the view in seconds.',
+    ),
+    'videoflix_http_response_bytes_total': (
+        'counter', 'Response body bytes sent by Django (not by an offloading proxy).',
+    ),
+    'videoflix_http_not_found_total': (
+        'counter', 'Requests answered with 404 by endpoint and resolution.',
+    ),
+    'videoflix_cache_requests_total': (
+        'counter', 'Lookups of the segment, playlist, manifest and catalog caches by result.',
+    ),
+}
+
+
+def _series(name: str, **labels):
+    rendered = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return f'{name}{{{rendered}}}'
+
+
+class MetricsBuffer:
+    """
+    Per-process buffer of metric increments that is periodically added to
+    the shared Redis hash (or to the process totals without Redis).
+    """
+
+    def __init__(self):
+        self._pending = defaultdict(int)
+        self._totals = defaultdict(int)
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, increments: dict):
+        """
+        Adds increments keyed by series to the buffer.
+        """
+        with self._lock:
+            for series, amount in increments.items():
+                self._pending[series] += amount
+
+    def flush_due(self):
+        """
+        Returns whether the buffer has not been flushed for
+        ``VIDEO_METRICS_FLUSH_SECONDS``.
+        """
+        return time.monotonic() - self._flushed_at >= settings.VIDEO_METRICS_FLUSH_SECONDS
+
+    def flush(self):
+        """
+        Adds the buffered increments to the shared totals. Increments that
+        could not be written to Redis stay buffered for the next flush.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        if not _uses_redis():
+            with self._lock:
+                for series, amount in pending.items():
+                    self._totals[series] += amount
+            return
+
+        try:
+            pipeline = get_redis_connection('default').pipeline(transaction=False)
+            for series, amount in pending.items():
+                if isinstance(amount, int):
+                    pipeline.hincrby(METRICS_KEY, series, amount)
+                else:
+                    pipeline.hincrbyfloat(METRICS_KEY, series, amount)
+            pipeline.execute()
+        except RedisError:
+            self.add(pending)
+
+    def totals(self):
+        """
+        Flushes the buffer and returns the aggregated totals of all workers.
+
+        Returns:
+            dict: Mapping of series to its value.
+        """
+        self.flush()
+        if not _uses_redis():
+            with self._lock:
+                return dict(self._totals)
+        values = get_redis_connection('default').hgetall(METRICS_KEY)
+        return {series.decode(): float(value) for series, value in values.items()}
+
+    def clear(self):
+        """
+        Drops the buffered increments and totals of this process.
+        """
+        with self._lock:
+            self._pending.clear()
+            self._totals.clear()
+            self._flushed_at = time.monotonic()
+
+
+def _uses_redis():
+    return settings.CACHES['default']['BACKEND'].startswith('django_redis')
+
+
+stream_metrics = MetricsBuffer()
+
+
+def observe(endpoint: str, resolution: str, status: int, sent: int, seconds: float):
+    """
+    Records one answered request.
+
+    Args:
+        endpoint (str): Name of the endpoint (e.g. 'segment').
+        resolution (str): Resolution from the URL, '' if it has none.
+        status (int): Status code of the response.
+        sent (int): Body bytes sent by Django.
+        seconds (float): Time spent in the view.
+    """
+    if resolution and not RESOLUTION_RE.match(resolution):
+        resolution = 'other'
+    labels = {'endpoint': endpoint, 'resolution': resolution}
+
+    increments = {
+        _series('videoflix_http_requests_total', status=status, **labels): 1,
+        _series('videoflix_http_request_duration_seconds_sum', endpoint=endpoint): seconds,
+        _series('videoflix_http_request_duration_seconds_count', endpoint=endpoint): 1,
+        _series('videoflix_http_request_duration_seconds_bucket', endpoint=endpoint, le='+Inf'): 1,
+    }
+    for bound in LATENCY_BUCKETS:
+        if seconds <= bound:
+            increments[_series('videoflix_http_request_duration_seconds_bucket', endpoint=endpoint, le=bound)] = 1
+    if status == 404:
+        increments[_series('videoflix_http_not_found_total', **labels)] = 1
+    if sent:
+        increments[_series('videoflix_http_response_bytes_total', **labels)] = sent
+    stream_metrics.add(increments)
+
+
+def _body_size(response):
+    if response is None:
+        return 0
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    if not getattr(response, 'is_rendered', True):
+        # REST framework responses are rendered by the handler after the
+        # view returns; rendering is idempotent, so it happens here instead.
+        response.render()
+    return len(response.content)
+
+
+def record_cache(cache: str, hit: bool):
+    """
+    Counts a lookup of one of the streaming caches.
+
+    Args:
+        cache (str): Name of the cache ('segment', 'playlist', 'manifest'
+            or 'catalog').
+        hit (bool): Whether the entry was found.
+    """
+    if settings.VIDEO_METRICS_ENABLED:
+        result = 'hit' if hit else 'miss'
+        stream_metrics.add({_series('videoflix_cache_requests_total', cache=cache, result=result): 1})
+
+
+def instrument(endpoint: str):
+    """
+    Decorates a view so that its requests are recorded under ``endpoint``.
+
+    Works for sync and async views. ``Http404`` raised by the view is
+    counted as ``404``, any other exception as ``500``, and re-raised. Without ``VIDEO_METRICS_ENABLED`` the view is
+    returned unchanged.
+
+    Args:
+        endpoint (str): Name of the endpoint in the metrics.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(view):
+        if not settings.VIDEO_METRICS_ENABLED:
+            return view
+
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                started = time.perf_counter()
+                response, status = None, 500
+                try:
+                    response = await view(request, *args, **kwargs)
+                    status = response.status_code
+                    return response
+                except Http404:
+                    status = 404
+                    raise
+                finally:
+                    observe(
+                        endpoint, kwargs.get('resolution', ''), status, _body_size(response),
+                        time.perf_counter() - started,
+                    )
+                    if stream_metrics.flush_due():
+                        await sync_to_async(stream_metrics.flush)()
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started = time.perf_counter()
+            response, status = None, 500
+            try:
+                response = view(request, *args, **kwargs)
+                status = response.status_code
+                return response
+            except Http404:
+                status = 404
+                raise
+            finally:
+                observe(
+                    endpoint, kwargs.get('resolution', ''), status, _body_size(response),
+                    time.perf_counter() - started,
+                )
+                if stream_metrics.flush_due():
+                    stream_metrics.flush()
+
+        return wrapper
+
+    return decorator
+
+
+def _sort_key(series: str):
+    le = LE_RE.search(series)
+    return LE_RE.sub('', series), float(le.group(1)) if le else 0.0
+
+
+def _format(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def render():
+    """
+    Renders the aggregated metrics of all workers in the Prometheus text
+    exposition format.
+
+    Returns:
+        str: The exposition, one sample per line.
+    """
+    totals = stream_metrics.totals()
+    lines = []
+    for family, (kind, description) in FAMILIES.items():
+        series = [
+            name for name in totals
+            if name.split('{', 1)[0] in (family, f'{family}_bucket', f'{family}_sum', f'{family}_count')
+        ]
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        lines.extend(f'{name} {_format(totals[name])}' for name in sorted(series, key=_sort_key))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0005_video_hls_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration', models.FloatField()),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('frame_rate', models.FloatField()),
+                ('bit_rate', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('video_codec', models.CharField(max_length=50)),
+                ('audio_codec', models.CharField(blank=True, max_length=50)),
+                ('probed_at', models.DateTimeField(auto_now=True)),
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='source_info', to='video_app.video')),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0007_video_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveIntegerField()),
+                ('format', models.CharField(max_length=10)),
+                ('image', models.ImageField(upload_to='thumbnails/variants/')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thumbnail_variants', to='video_app.video')),
+            ],
+            options={
+                'ordering': ('width',),
+            },
+        ),
+    ]
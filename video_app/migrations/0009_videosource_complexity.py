@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0008_thumbnailvariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videosource',
+            name='complexity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0009_videosource_complexity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HlsManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('renditions', models.JSONField(default=list)),
+                ('files', models.JSONField(default=dict)),
+                ('written_at', models.DateTimeField(auto_now=True)),
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hls_manifest', to='video_app.video')),
+            ],
+        ),
+    ]
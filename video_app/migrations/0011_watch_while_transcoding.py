@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_app', '0010_hlsmanifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hlsmanifest',
+            name='live',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='video',
+            name='hls_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('streamable', 'Streamable'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
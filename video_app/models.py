@@ -12,14 +12,33 @@ from django.db import models
 class Video(models.Model):
     """
     Represents a video uploaded to the platform, including metadata,
-    thumbnail, original video file, and creation timestamp.
+    thumbnail, original video file, creation timestamp and HLS processing state.
     """
+
+    class HLSStatus(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        PROCESSING = 'processing', 'Processing'
+        STREAMABLE = 'streamable', 'Streamable'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
     title = models.CharField(max_length=255)
     description = models.TextField()
     category = models.CharField(max_length=100)
     thumbnail = models.ImageField(upload_to="thumbnails/")
     video = models.FileField(upload_to="videos/")
     created_at = models.DateTimeField(auto_now_add=True)
+    hls_status = models.CharField(
+        max_length=20, choices=HLSStatus.choices, default=HLSStatus.PENDING
+    )
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+
+    class Meta:
+        # Keyset pagination of the catalog (see video_app.catalog).
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='video_catalog_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='video_category_catalog_idx'),
+        ]
 
     def hls_directory(self):
         """
@@ -38,3 +57,80 @@ class Video(models.Model):
             str: The video title.
         """
         return self.title
+
+
+class VideoSource(models.Model):
+    """
+    Technical properties of an uploaded source file, recorded by ffprobe
+    before transcoding. Used to build the rendition ladder. ``complexity``
+    is only measured with per-title encoding (see ``video_app.encoding``).
+    """
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name='source_info')
+    duration = models.FloatField()
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    frame_rate = models.FloatField()
+    bit_rate = models.PositiveBigIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=50)
+    audio_codec = models.CharField(max_length=50, blank=True)
+    complexity = models.FloatField(null=True, blank=True)
+    probed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns the string representation of the source info.
+
+        Returns:
+            str: Frame size and codec of the source.
+        """
+        return f'{self.width}x{self.height} {self.video_codec}'
+
+
+class ThumbnailVariant(models.Model):
+    """
+    A resized, re-encoded copy of a video's thumbnail used for
+    responsive images in the catalog.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='thumbnail_variants')
+    width = models.PositiveIntegerField()
+    format = models.CharField(max_length=10)
+    image = models.ImageField(upload_to='thumbnails/variants/')
+
+    class Meta:
+        ordering = ('width',)
+
+    def __str__(self):
+        """
+        Returns the string representation of the variant.
+
+        Returns:
+            str: Width and format of the variant.
+        """
+        return f'{self.width}w {self.format}'
+
+
+class HlsManifest(models.Model):
+    """
+    Index of every file of a video's finished HLS output, written by the
+    transcoder (see ``video_app.manifest``). ``files`` maps the path of a
+    file relative to the HLS directory to its ``size``, ``mtime_ns``,
+    ``duration`` (media files only) and ``sha256``.
+
+    While a video is watched during transcoding, ``live`` names the
+    renditions whose playlists are still growing; their files are looked up
+    in those playlists instead of ``files``.
+    """
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name='hls_manifest')
+    renditions = models.JSONField(default=list)
+    files = models.JSONField(default=dict)
+    live = models.JSONField(default=list, blank=True)
+    written_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Returns the string representation of the manifest.
+
+        Returns:
+            str: Number of renditions and files.
+        """
+        return f'{len(self.renditions)} renditions, {len(self.files)} files'
@@ -0,0 +1,140 @@
+"""
+video_app.probe
+~~~~~~~~~~~~~~~
+
+Source inspection with ffprobe and construction of the rendition ladder.
+
+The ladder is derived from the probed source: renditions are never
+larger than the source and keep its aspect ratio. Each rung is a 16:9
+bounding box (e.g. 1280x720 for 720p) the rendition is fitted into, so
+widescreen sources keep their full width.
+"""
+
+from fractions import Fraction
+
+import ffmpeg
+
+LADDER_RUNGS = (480, 720, 1080)
+
+H264_PROFILES = {
+    'Constrained Baseline': '42E0',
+    'Baseline': '4200',
+    'Main': '4D40',
+    'Extended': '5800',
+    'High': '6400',
+}
+
+AAC_OBJECT_TYPES = {
+    'LC': 2,
+    'HE-AAC': 5,
+    'HE-AACv2': 29,
+}
+
+
+def _even(value: float):
+    """
+    Rounds a frame dimension to the nearest even number, as required by h264.
+    """
+    return max(2, int(round(value / 2)) * 2)
+
+
+def _rotation(stream: dict):
+    """
+    Returns the display rotation of a video stream in degrees.
+    """
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return abs(int(side_data['rotation'])) % 360
+    return abs(int(stream.get('tags', {}).get('rotate', 0))) % 360
+
+
+def probe_source(path: str):
+    """
+    Inspects a source video file with ffprobe.
+
+    Args:
+        path (str): The full path to the source video file.
+
+    Returns:
+        dict: duration, width, height (as displayed), frame_rate, bit_rate,
+        video_codec and audio_codec of the source.
+    """
+    info = ffmpeg.probe(path)
+    streams = info.get('streams', [])
+    video = next(stream for stream in streams if stream['codec_type'] == 'video')
+    audio = next((stream for stream in streams if stream['codec_type'] == 'audio'), None)
+
+    width, height = int(video['width']), int(video['height'])
+    if _rotation(video) in (90, 270):
+        width, height = height, width
+
+    frame_rate = Fraction(video.get('avg_frame_rate') or '0/1')
+    if not frame_rate:
+        frame_rate = Fraction(video.get('r_frame_rate') or '0/1')
+
+    fmt = info.get('format', {})
+    return {
+        'duration': float(fmt.get('duration') or video.get('duration') or 0),
+        'width': width,
+        'height': height,
+        'frame_rate': round(float(frame_rate), 3),
+        'bit_rate': int(fmt.get('bit_rate') or video.get('bit_rate') or 0) or None,
+        'video_codec': video.get('codec_name', ''),
+        'audio_codec': audio.get('codec_name', '') if audio else '',
+    }
+
+
+def build_ladder(width: int, height: int):
+    """
+    Builds the rendition ladder for a source of the given frame size.
+
+    Every rung fits the source into its 16:9 bounding box (9:16 for
+    portrait sources), so a 1920x800 source gets a 1080p rendition of
+    1920x800 rather than a 720p one by its shorter edge. Once the source
+    fits into a box it becomes the top rung at its own size; rungs above
+    are skipped. A source below the smallest rung is named after its
+    shorter edge (e.g. '360p').
+
+    Args:
+        width (int): Displayed width of the source.
+        height (int): Displayed height of the source.
+
+    Returns:
+        dict: Mapping of rendition name (e.g. '720p') to frame size
+        (e.g. '1280x720'), ordered from lowest to highest.
+    """
+    portrait = height > width
+    ladder = {}
+    for rung in LADDER_RUNGS:
+        box_width, box_height = _even(rung * 16 / 9), rung
+        if portrait:
+            box_width, box_height = box_height, box_width
+        if width <= box_width and height <= box_height:
+            name = f'{rung}p' if ladder else f'{min(rung, _even(min(width, height)))}p'
+            ladder[name] = f'{_even(width)}x{_even(height)}'
+            break
+        scale = min(box_width / width, box_height / height)
+        ladder[f'{rung}p'] = f'{_even(width * scale)}x{_even(height * scale)}'
+    return ladder
+
+
+def probe_codecs(path: str):
+    """
+    Builds the RFC 6381 codec identifiers of an encoded segment, as used
+    by the ``CODECS`` attribute of a multivariant playlist.
+
+    Args:
+        path (str): Path of an encoded HLS segment.
+
+    Returns:
+        list: Codec identifiers, e.g. ``['avc1.640028', 'mp4a.40.2']``.
+    """
+    codecs = []
+    for stream in ffmpeg.probe(path).get('streams', []):
+        if stream.get('codec_name') == 'h264':
+            profile = H264_PROFILES.get(stream.get('profile'), '6400')
+            codecs.append(f"avc1.{profile}{int(stream.get('level', 40)):02X}")
+        elif stream.get('codec_name') == 'aac':
+            object_type = AAC_OBJECT_TYPES.get(stream.get('profile'), 2)
+            codecs.append(f'mp4a.40.{object_type}')
+    return codecs
@@ -0,0 +1,152 @@
+"""
+video_app.progress
+~~~~~~~~~~~~~~~~~~
+
+Live progress telemetry for transcoding jobs.
+
+ffmpeg is started with ``-progress pipe:1`` and its key/value progress
+blocks are parsed while it runs. Every block is published to the cache
+(Redis in production) per video and job label, so the status endpoint and
+the admin can show position, fps and speed of every running encode and
+spot encodes that stopped reporting.
+"""
+
+import time
+
+import ffmpeg
+from django.conf import settings
+from django.core.cache import cache
+
+PROGRESS_TTL = 60 * 60 * 24
+
+
+def _progress_key(video_id: int, label: str):
+    return f'transcode-progress:{video_id}:{label}'
+
+
+def _labels_key(video_id: int):
+    return f'transcode-progress:{video_id}:labels'
+
+
+def _number(value: str):
+    """
+    Converts an ffmpeg progress value to float, ``None`` for 'N/A'.
+    """
+    try:
+        return float(value.rstrip('x'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def snapshot(stats: dict, duration: float = None):
+    """
+    Converts one raw ffmpeg progress block into a progress record.
+
+    Args:
+        stats (dict): Key/value pairs of the latest progress block.
+        duration (float, optional): Length of the encoded input in seconds.
+
+    Returns:
+        dict: out_time (s), fps, speed (realtime factor), percent
+        (if the duration is known), state and updated_at timestamp.
+    """
+    out_time_us = _number(stats.get('out_time_us') or stats.get('out_time_ms'))
+    out_time = out_time_us / 1000000 if out_time_us is not None else None
+
+    percent = None
+    if duration and out_time is not None:
+        percent = round(min(out_time / duration, 1.0) * 100, 1)
+
+    return {
+        'out_time': out_time,
+        'fps': _number(stats.get('fps')),
+        'speed': _number(stats.get('speed')),
+        'percent': percent,
+        'state': 'finished' if stats.get('progress') == 'end' else 'running',
+        'updated_at': time.time(),
+    }
+
+
+def register_jobs(video_id: int, labels: list):
+    """
+    Announces the encoding jobs of a video, so their progress can be listed.
+
+    Args:
+        video_id (int): Primary key of the video.
+        labels (list): Labels of the encoding jobs (e.g. rendition names).
+    """
+    cache.delete_many([_progress_key(video_id, label) for label in labels])
+    cache.set(_labels_key(video_id), list(labels), PROGRESS_TTL)
+
+
+def publish(video_id: int, label: str, record: dict):
+    """
+    Stores the latest progress record of an encoding job.
+    """
+    cache.set(_progress_key(video_id, label), record, PROGRESS_TTL)
+
+
+def get_progress(video_id: int):
+    """
+    Returns the latest progress of every encoding job of a video.
+
+    Jobs still marked running that have not reported for
+    ``VIDEO_PROGRESS_STALL_SECONDS`` are flagged as stalled.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        dict: Mapping of job label to progress record (``None`` if the
+        job has not started yet).
+    """
+    labels = cache.get(_labels_key(video_id)) or []
+    records = cache.get_many([_progress_key(video_id, label) for label in labels])
+    now = time.time()
+
+    progress = {}
+    for label in labels:
+        record = records.get(_progress_key(video_id, label))
+        if record and record['state'] == 'running':
+            record['stalled'] = now - record['updated_at'] > settings.VIDEO_PROGRESS_STALL_SECONDS
+        progress[label] = record
+    return progress
+
+
+def run_with_progress(
+    stream, video_id: int, label: str, duration: float = None, on_progress=None,
+):
+    """
+    Runs an ffmpeg graph and publishes its progress while it encodes.
+
+    Args:
+        stream: ffmpeg-python output node to run.
+        video_id (int): Primary key of the video being encoded.
+        label (str): Label of the job (e.g. '720p' or 'chunk0003').
+        duration (float, optional): Length of the input in seconds.
+        on_progress (callable, optional): Called without arguments after
+            every published update.
+
+    Raises:
+        ffmpeg.Error: If ffmpeg exits with a non-zero status.
+    """
+    process = (
+        stream
+        .global_args('-progress', 'pipe:1', '-nostats')
+        .run_async(pipe_stdout=True, overwrite_output=True)
+    )
+
+    stats = {}
+    for line in process.stdout:
+        key, _, value = line.decode().strip().partition('=')
+        stats[key] = value
+        if key == 'progress':
+            publish(video_id, label, snapshot(stats, duration))
+            if on_progress is not None:
+                on_progress()
+
+    if process.wait():
+        record = snapshot(stats, duration)
+        record['state'] = 'failed'
+        publish(video_id, label, record)
+        raise ffmpeg.Error('ffmpeg', None, None)
@@ -0,0 +1,118 @@
+"""
+video_app.scheduler
+~~~~~~~~~~~~~~~~~~~
+
+Cost-based scheduling of transcoding jobs over the django_rq queues.
+
+The cost of an encode is measured in "1080p seconds": the input duration
+multiplied by the pixel count of every rendition, relative to 1080p. The
+cost decides the queue (``high`` for short content, ``low`` for feature
+length) and the job timeout. Workers listen on ``high default low`` in that
+order, so short uploads never wait behind a long film. The number of
+workers per host is capped by ``VIDEO_MAX_CONCURRENT_ENCODES``, and every
+encode gets an equal share of the host's CPU threads.
+"""
+
+import os
+
+import django_rq
+from django.conf import settings
+
+REFERENCE_PIXELS = 1920 * 1080
+
+
+def rendition_weight(size: str):
+    """
+    Returns the pixel count of a frame size relative to 1080p.
+
+    Args:
+        size (str): Frame size (e.g. '1280x720').
+
+    Returns:
+        float: Relative weight of the rendition.
+    """
+    width, height = (int(value) for value in size.split('x'))
+    return width * height / REFERENCE_PIXELS
+
+
+def estimate_cost(duration: float, ladder: dict):
+    """
+    Estimates the cost of encoding a piece of video into a ladder.
+
+    Args:
+        duration (float): Length of the input in seconds.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        float: Estimated cost in 1080p seconds.
+    """
+    return duration * sum(rendition_weight(size) for size in ladder.values())
+
+
+def select_queue(cost: float):
+    """
+    Picks the queue for a job of the given cost.
+
+    Args:
+        cost (float): Estimated cost in 1080p seconds.
+
+    Returns:
+        str: 'high', 'default' or 'low'.
+    """
+    if cost <= settings.VIDEO_SCHEDULER_SHORT_COST:
+        return 'high'
+    if cost <= settings.VIDEO_SCHEDULER_LONG_COST:
+        return 'default'
+    return 'low'
+
+
+def job_timeout(cost: float):
+    """
+    Derives the RQ job timeout from the estimated cost.
+
+    Args:
+        cost (float): Estimated cost in 1080p seconds.
+
+    Returns:
+        int: Timeout in seconds, never below ``VIDEO_SCHEDULER_MIN_TIMEOUT``.
+    """
+    expected = cost * settings.VIDEO_ENCODE_SECONDS_PER_COST * settings.VIDEO_SCHEDULER_TIMEOUT_FACTOR
+    return max(settings.VIDEO_SCHEDULER_MIN_TIMEOUT, int(expected))
+
+
+def encoder_threads(outputs: int = 1):
+    """
+    Returns the number of threads one encoder of an ffmpeg process may use,
+    so that the maximum number of concurrent encodes shares the host's CPUs
+    evenly. A process encoding several renditions at once splits its share
+    between their encoders.
+
+    Args:
+        outputs (int): Number of video encoders in the ffmpeg process.
+
+    Returns:
+        int: Thread count for each encoder's ``-threads`` option.
+    """
+    return max(1, (os.cpu_count() or 1) // settings.VIDEO_MAX_CONCURRENT_ENCODES // outputs)
+
+
+def enqueue_encode(func, *args, cost: float, title_cost: float = None, **job_options):
+    """
+    Enqueues an encoding job on the queue matching the cost of its title,
+    with a timeout derived from the job's own cost.
+
+    Args:
+        func: Job function.
+        *args: Positional arguments of the job.
+        cost (float): Estimated cost of the job in 1080p seconds.
+        title_cost (float, optional): Estimated cost of the whole title,
+            defaults to ``cost``. All jobs of a title share its queue, so
+            the chunks or renditions of a feature film never land on the
+            queue of short content.
+        **job_options: Further options for ``Queue.enqueue``.
+
+    Returns:
+        rq.job.Job: The enqueued job.
+    """
+    queue = django_rq.get_queue(select_queue(title_cost or cost), autocommit=True)
+    return queue.enqueue(func, *args, job_timeout=job_timeout(cost), **job_options)
@@ -0,0 +1,222 @@
+"""
+video_app.segmentcache
+~~~~~~~~~~~~~~~~~~~~~~
+
+In-memory cache of popular segment bytes.
+
+Segment traffic follows a steep popularity curve: a few titles, and
+mostly their first minutes, get most requests. Every worker process keeps
+the segments at the head of that curve in memory, bounded by
+``VIDEO_SEGMENT_CACHE_BYTES``, so directly streamed segments (see
+``VIDEO_DELIVERY_MODE``) are sent without reading the media volume.
+
+Admission is frequency based: requests are counted per (video, segment)
+and a segment is only read into memory once it was requested
+``VIDEO_SEGMENT_CACHE_ADMIT_HITS`` times. When the cache is full, the
+least recently used entries are evicted, but only for a candidate that was
+requested more often than they were, so a burst of one-off requests cannot
+flush the popular segments. Counts are halved regularly, so popularity
+decays.
+
+Titles whose master playlist is requested ``VIDEO_SEGMENT_CACHE_TRENDING_PLAYS``
+times are trending: the first ``VIDEO_SEGMENT_CACHE_WARM_SEGMENTS`` segments
+of each of their renditions are read ahead of the players in a background
+thread.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from video_app.hls import parse_media_playlist
+from video_app.metrics import record_cache
+
+# Number of recorded requests after which all counts are halved.
+SAMPLE_SIZE = 10000
+
+
+class FrequencyCounter:
+    """
+    Request counts with periodic halving, so they track recent popularity
+    and stay bounded in size.
+    """
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._counts = {}
+        self._recorded = 0
+
+    def record(self, key):
+        """
+        Counts a request and returns the key's current count.
+        """
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        self._recorded += 1
+        if self._recorded >= self.sample_size:
+            self._counts = {key: value // 2 for key, value in self._counts.items() if value > 1}
+            self._recorded = 0
+        return count
+
+    def count(self, key):
+        """
+        Returns the current count of a key.
+        """
+        return self._counts.get(key, 0)
+
+    def clear(self):
+        self._counts.clear()
+        self._recorded = 0
+
+
+class SegmentCache:
+    """
+    Per-process, byte-bounded cache of segment files with frequency-based
+    admission and LRU eviction.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int, admit_hits: int):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.admit_hits = admit_hits
+        self.size = 0
+        self._entries = OrderedDict()
+        self._frequency = FrequencyCounter()
+        self._plays = FrequencyCounter()
+        self._warmed = set()
+        self._lock = threading.Lock()
+
+    def cacheable(self, size: int):
+        """
+        Returns whether a file of the given size may be cached at all.
+        """
+        return 0 < size <= min(self.max_item_bytes, self.max_bytes)
+
+    def _admit(self, key, version, content: bytes, frequency: int):
+        # Called with the lock held. Evicts least recently used entries only
+        # if all of them were requested less often than the candidate.
+        if key in self._entries:
+            self.size -= len(self._entries.pop(key)[1])
+        victims = []
+        freed = 0
+        for victim, (_, cached) in self._entries.items():
+            if self.size - freed + len(content) <= self.max_bytes:
+                break
+            if self._frequency.count(victim) >= frequency:
+                return False
+            victims.append(victim)
+            freed += len(cached)
+        for victim in victims:
+            del self._entries[victim]
+        self._entries[key] = (version, content)
+        self.size += len(content) - freed
+        return True
+
+    def load(self, key, path: str, stat):
+        """
+        Returns the content of a segment from memory, reading and admitting
+        it if it is popular enough.
+
+        Args:
+            key (tuple): ``(video_id, name)`` of the segment.
+            path (str): Path of the segment file.
+            stat (os.stat_result): Current stat (or ``FileStat``) of the file.
+
+        Returns:
+            bytes: The segment, or ``None`` if it is not cached and was not
+            admitted; the caller then streams it from disk.
+        """
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            frequency = self._frequency.record(key)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                record_cache('segment', True)
+                return entry[1]
+        record_cache('segment', False)
+        if frequency < self.admit_hits or not self.cacheable(stat.st_size):
+            return None
+
+        with open(path, 'rb') as file:
+            content = file.read()
+        with self._lock:
+            self._admit(key, version, content, frequency)
+        return content
+
+    def warm(self, video_id: int, output_dir: str, index: dict, count: int):
+        """
+        Reads the first segments of every rendition of a video into memory.
+
+        Args:
+            video_id (int): Primary key of the video.
+            output_dir (str): HLS directory of the video.
+            index (dict): Manifest index of the video.
+            count (int): Number of segments per rendition.
+        """
+        for playlist in sorted(name for name in index if name.endswith('/index.m3u8')):
+            rendition = playlist.rsplit('/', 1)[0]
+            uris = []
+            for _, uri, _ in parse_media_playlist(os.path.join(output_dir, playlist)):
+                if uri not in uris:
+                    uris.append(uri)
+            for uri in uris[:count]:
+                name = f'{rendition}/{uri}'
+                if name not in index or not self.cacheable(index[name][0]):
+                    continue
+                size, mtime_ns = index[name]
+                try:
+                    with open(os.path.join(output_dir, rendition, uri), 'rb') as file:
+                        content = file.read()
+                except OSError:
+                    continue
+                with self._lock:
+                    self._admit((video_id, name), (mtime_ns, size), content, self.admit_hits)
+
+    def record_play(self, video_id: int, output_dir: str, index: dict):
+        """
+        Counts a playback start of a video and warms its first segments in
+        a background thread once it is trending.
+
+        Args:
+            video_id (int): Primary key of the video.
+            output_dir (str): HLS directory of the video.
+            index (dict): Manifest index of the video.
+
+        Returns:
+            threading.Thread: The warming thread, or ``None`` if nothing
+            is warmed.
+        """
+        if not self.max_bytes:
+            return None
+        with self._lock:
+            plays = self._plays.record(video_id)
+            if plays < settings.VIDEO_SEGMENT_CACHE_TRENDING_PLAYS or video_id in self._warmed:
+                return None
+            self._warmed.add(video_id)
+        thread = threading.Thread(
+            target=self.warm, daemon=True,
+            args=(video_id, output_dir, index, settings.VIDEO_SEGMENT_CACHE_WARM_SEGMENTS),
+        )
+        thread.start()
+        return thread
+
+    def clear(self):
+        """
+        Empties the cache and forgets all counts of this process.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self._frequency.clear()
+            self._plays.clear()
+            self._warmed.clear()
+
+
+segment_cache = SegmentCache(
+    settings.VIDEO_SEGMENT_CACHE_BYTES,
+    settings.VIDEO_SEGMENT_CACHE_MAX_ITEM_BYTES,
+    settings.VIDEO_SEGMENT_CACHE_ADMIT_HITS,
+)
@@ -4,16 +4,26 @@ video_app.signals
 
 This module defines Django signal receivers for the Video model.
 
-- On video creation: enqueue HLS conversion task (via django_rq)
+- On video creation: enqueue the HLS transcoding parent job and the
+  thumbnail variant rendering (via django_rq)
+- On thumbnail change: enqueue the thumbnail variant rendering again
 - On video deletion: remove the associated video file from the file system
+- On thumbnail variant deletion: remove the variant image file
+- On video save and deletion: drop the cached HLS path and playlists
+- On manifest save and deletion: drop the cached manifest index
+- On video and thumbnail variant save and deletion: invalidate the
+  cached catalog pages
 """
 
 import os
 import django_rq
+from django.core.cache import cache
 from django.dispatch import receiver
-from django.db.models.signals import post_save, post_delete
-from .models import Video
-from video_app.tasks import convert_to_hls
+from django.db.models.signals import post_save, post_delete, pre_save
+from .models import HlsManifest, ThumbnailVariant, Video
+from video_app.catalog import bump_catalog_version
+from video_app.streamcache import invalidate_manifest, invalidate_video
+from video_app.tasks import generate_thumbnail_variants, hls_output_dir, start_transcode
 
 
 @receiver(post_save, sender=Video)
@@ -21,12 +31,46 @@ def video_post_save(sender, instance, created, **kwargs):
     """
     Signal triggered after a Video instance is saved.
 
-    If the instance is newly created, it enqueues a background task
-    to convert the uploaded video into HLS format using django_rq.
+    If the instance is newly created, it enqueues the parent job that
+    fans out the HLS conversion of the uploaded video using django_rq.
+    A cache marker prevents repeated signals from enqueuing the same
+    video twice.
     """
-    if created:
-        queue = django_rq.get_queue('default', autocommit=True)
-        queue.enqueue(convert_to_hls, instance.video.path)
+    if created and cache.add(f'transcode-enqueued:{instance.pk}', True, 60 * 60):
+        queue = django_rq.get_queue('high', autocommit=True)
+        queue.enqueue(start_transcode, instance.pk)
+        queue.enqueue(generate_thumbnail_variants, instance.pk)
+
+
+@receiver(pre_save, sender=Video)
+def remember_thumbnail(sender, instance, raw=False, **kwargs):
+    """
+    Signal triggered before a Video instance is saved.
+
+    Remembers the stored thumbnail name of an existing video, so that
+    ``render_changed_thumbnail`` can tell whether the image was replaced.
+    """
+    if instance.pk and not raw:
+        instance._stored_thumbnail = (
+            Video.objects.filter(pk=instance.pk).values_list('thumbnail', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Video)
+def render_changed_thumbnail(sender, instance, created, **kwargs):
+    """
+    Signal triggered after a Video instance is saved.
+
+    If the thumbnail of an existing video was replaced, it enqueues the
+    rendering of new thumbnail variants, so the catalog never serves
+    variants of the previous image.
+    """
+    stored = getattr(instance, '_stored_thumbnail', None)
+    if created or stored is None:
+        return
+    del instance._stored_thumbnail
+    if instance.thumbnail.name != stored:
+        django_rq.get_queue('high', autocommit=True).enqueue(generate_thumbnail_variants, instance.pk)
 
 
 @receiver(post_delete, sender=Video)
@@ -39,3 +83,54 @@ def auto_delete_file_on_delete(sender, instance, **kwargs):
     """
     if instance.video and os.path.isfile(instance.video.path):
         os.remove(instance.video.path)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def invalidate_stream_cache(sender, instance, **kwargs):
+    """
+    Signal triggered after a Video instance is saved or deleted.
+
+    Drops the cached HLS directory and playlist bodies of the video, so the
+    streaming endpoints never serve a path or playlist of a replaced file.
+    """
+    invalidate_video(instance.pk, hls_output_dir(instance.video.path) if instance.video else None)
+
+
+@receiver(post_delete, sender=ThumbnailVariant)
+def auto_delete_variant_on_delete(sender, instance, **kwargs):
+    """
+    Signal triggered after a ThumbnailVariant instance is deleted.
+
+    Removes the variant image from storage, so regenerated or deleted
+    thumbnails leave no orphaned files behind.
+    """
+    if instance.image:
+        instance.image.delete(save=False)
+
+
+@receiver(post_save, sender=HlsManifest)
+@receiver(post_delete, sender=HlsManifest)
+def invalidate_manifest_index(sender, instance, **kwargs):
+    """
+    Signal triggered after an HlsManifest instance is saved or deleted.
+
+    Drops the cached manifest index of the video, so files of a finished
+    transcode are found and files of a removed one are rejected.
+    """
+    invalidate_manifest(instance.video_id)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+@receiver(post_save, sender=ThumbnailVariant)
+@receiver(post_delete, sender=ThumbnailVariant)
+def invalidate_catalog(sender, instance, **kwargs):
+    """
+    Signal triggered after a Video or ThumbnailVariant instance is saved
+    or deleted.
+
+    Bumps the catalog version, so the next catalog request renders fresh
+    pages (with a new ETag) instead of the cached ones.
+    """
+    bump_catalog_version()
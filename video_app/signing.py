@@ -0,0 +1,119 @@
+"""
+video_app.signing
+~~~~~~~~~~~~~~~~~
+
+Stateless signed segment URLs.
+
+Media playlists are rewritten when they are served: every segment URI
+points to the signed segment endpoint and carries the viewer's user id, an
+expiry timestamp and an HMAC over user, video and expiry (keyed with
+``SECRET_KEY``). The segment endpoint only checks the signature, so serving
+a segment needs neither a JWT nor the database, and the URL itself can be
+cached by browsers and edge caches until it expires.
+
+Expiry timestamps are aligned to windows of ``VIDEO_SIGNED_URL_TTL``
+seconds, so a viewer gets the same URLs for the whole window (which keeps
+them cacheable) and every URL stays valid for at least one full window.
+"""
+
+import re
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SIGNATURE_SALT = 'video_app.signing.segment'
+MAP_URI_RE = re.compile(r'URI="([^"]+)"')
+
+
+def signed_expiry(now: float = None):
+    """
+    Returns the expiry timestamp for URLs signed now.
+
+    Args:
+        now (float, optional): Current UNIX time, defaults to ``time.time()``.
+
+    Returns:
+        int: Expiry between one and two windows from now.
+    """
+    window = settings.VIDEO_SIGNED_URL_TTL
+    return (int(now if now is not None else time.time()) // window + 2) * window
+
+
+def signature(user_id: int, video_id: int, expires: int):
+    """
+    Computes the signature of a segment URL.
+
+    Args:
+        user_id (int): ID of the viewer.
+        video_id (int): Primary key of the video.
+        expires (int): Expiry as UNIX timestamp.
+
+    Returns:
+        str: Hex encoded HMAC.
+    """
+    return salted_hmac(SIGNATURE_SALT, f'{user_id}:{video_id}:{expires}').hexdigest()[:32]
+
+
+def signed_query(user_id: int, video_id: int, expires: int):
+    """
+    Builds the query string that authorizes segment requests.
+
+    Args:
+        user_id (int): ID of the viewer.
+        video_id (int): Primary key of the video.
+        expires (int): Expiry as UNIX timestamp.
+
+    Returns:
+        str: Query string without leading '?'.
+    """
+    return f'u={user_id}&exp={expires}&sig={signature(user_id, video_id, expires)}'
+
+
+def verify(params, video_id: int, now: float = None):
+    """
+    Checks the signature of a segment request.
+
+    Args:
+        params (QueryDict): Query parameters of the request.
+        video_id (int): Primary key of the requested video.
+        now (float, optional): Current UNIX time, defaults to ``time.time()``.
+
+    Returns:
+        bool: True if the signature is valid and has not expired.
+    """
+    try:
+        user_id = int(params['u'])
+        expires = int(params['exp'])
+        sig = params['sig']
+    except (KeyError, ValueError):
+        return False
+    if expires < (now if now is not None else time.time()):
+        return False
+    return constant_time_compare(sig, signature(user_id, video_id, expires))
+
+
+def sign_playlist(content: bytes, prefix: str, query: str):
+    """
+    Rewrites the segment URIs of a media playlist to signed URLs.
+
+    Args:
+        content (bytes): The media playlist.
+        prefix (str): URL path of the signed segment endpoint for the
+            playlist's rendition, without trailing slash.
+        query (str): Signed query string (see ``signed_query``).
+
+    Returns:
+        bytes: The rewritten playlist.
+    """
+    def signed(uri):
+        return f'{prefix}/{uri}?{query}'
+
+    lines = []
+    for line in content.decode().splitlines():
+        if line and not line.startswith('#'):
+            line = signed(line)
+        elif line.startswith('#EXT-X-MAP:'):
+            line = MAP_URI_RE.sub(lambda match: f'URI="{signed(match.group(1))}"', line)
+        lines.append(line)
+    return ('\n'.join(lines) + '\n').encode()
@@ -0,0 +1,328 @@
+"""
+video_app.streamcache
+~~~~~~~~~~~~~~~~~~~~~
+
+Two-tier cache for the streaming hot path.
+
+Every playlist and segment request needs the HLS directory and the
+manifest index (see ``video_app.manifest``) of its video, and players
+refetch the same playlists over and over. All of them are kept in a
+small per-process LRU in front of the shared Django cache (Redis in
+production), so a request usually resolves without SQL and without
+reading the playlist from disk. Unknown video ids are cached as a miss
+for ``VIDEO_STREAM_MISS_TIMEOUT`` seconds, so requests for them are
+answered without SQL as well.
+
+Entries are invalidated from the ``Video`` signals. The signal only reaches
+the local tier of its own process, so local entries also expire after
+``VIDEO_LOCAL_CACHE_TTL`` seconds. Cached playlist bodies are stored with
+the modification time and size of their file and dropped when the file
+changed, since the transcoding jobs rewrite playlists without saving the
+video.
+"""
+
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from video_app.hls import MASTER_PLAYLIST
+from video_app.manifest import LiveIndex
+from video_app.metrics import record_cache
+from video_app.models import HlsManifest, Video
+from video_app.tasks import hls_output_dir
+
+_MISSING = object()
+
+
+class TwoTierCache:
+    """
+    Per-process LRU with expiry in front of the shared Django cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, default=None):
+        """
+        Returns a value from the local tier, falling back to the shared
+        cache and keeping what was found there locally.
+        """
+        value = self._get_local(key)
+        if value is _MISSING:
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._set_local(key, value)
+        return value
+
+    async def aget(self, key: str, default=None):
+        """
+        Async variant of ``get``; only the shared tier is awaited.
+        """
+        value = self._get_local(key)
+        if value is _MISSING:
+            value = await cache.aget(key, _MISSING)
+            if value is _MISSING:
+                return default
+            self._set_local(key, value)
+        return value
+
+    def set(self, key: str, value, timeout: int):
+        """
+        Stores a value in both tiers.
+        """
+        self._set_local(key, value)
+        cache.set(key, value, timeout)
+
+    async def aset(self, key: str, value, timeout: int):
+        """
+        Async variant of ``set``.
+        """
+        self._set_local(key, value)
+        await cache.aset(key, value, timeout)
+
+    def delete_many(self, keys: list):
+        """
+        Removes keys from both tiers.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        cache.delete_many(keys)
+
+    def clear_local(self):
+        """
+        Empties the local tier of this process.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+stream_cache = TwoTierCache(settings.VIDEO_LOCAL_CACHE_SIZE, settings.VIDEO_LOCAL_CACHE_TTL)
+
+
+def _path_key(video_id: int):
+    return f'hls-path:{video_id}'
+
+
+def _playlist_key(video_id: int, name: str):
+    return f'hls-playlist:{video_id}:{name}'
+
+
+def _manifest_key(video_id: int):
+    return f'hls-manifest:{video_id}'
+
+
+def _index(row, output_dir: str):
+    if row is None:
+        return {}
+    files, live = row
+    index = {name: (entry['size'], entry['mtime_ns']) for name, entry in files.items()}
+    return LiveIndex(index, output_dir, live) if live else index
+
+
+def _missing_video():
+    return Video.DoesNotExist('Video matching query does not exist.')
+
+
+def hls_dir(video_id: int):
+    """
+    Resolves the HLS directory of a video, querying the database only on
+    a miss in both cache tiers. Unknown ids are cached as an empty path.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        str: Path of the video's HLS output directory.
+    Raises:
+        Video.DoesNotExist: If there is no video with that key.
+    """
+    path = stream_cache.get(_path_key(video_id))
+    if path is None:
+        video = Video.objects.only('video').filter(pk=video_id).first()
+        if video is None:
+            stream_cache.set(_path_key(video_id), '', settings.VIDEO_STREAM_MISS_TIMEOUT)
+            raise _missing_video()
+        path = hls_output_dir(video.video.path)
+        stream_cache.set(_path_key(video_id), path, settings.VIDEO_STREAM_CACHE_TIMEOUT)
+    if not path:
+        raise _missing_video()
+    return path
+
+
+async def ahls_dir(video_id: int):
+    """
+    Async variant of ``hls_dir`` for the ASGI views.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        str: Path of the video's HLS output directory.
+    Raises:
+        Video.DoesNotExist: If there is no video with that key.
+    """
+    path = await stream_cache.aget(_path_key(video_id))
+    if path is None:
+        video = await Video.objects.only('video').filter(pk=video_id).afirst()
+        if video is None:
+            await stream_cache.aset(_path_key(video_id), '', settings.VIDEO_STREAM_MISS_TIMEOUT)
+            raise _missing_video()
+        path = hls_output_dir(video.video.path)
+        await stream_cache.aset(_path_key(video_id), path, settings.VIDEO_STREAM_CACHE_TIMEOUT)
+    if not path:
+        raise _missing_video()
+    return path
+
+
+def manifest_index(video_id: int):
+    """
+    Returns the manifest index of a video, querying the database only on
+    a miss in both cache tiers. Videos without a manifest get an empty
+    index, which is cached as well.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        dict: Mapping of file name relative to the HLS directory
+        (e.g. '480p/480p0.ts') to its ``(size, mtime_ns)``, a ``LiveIndex``
+        while the video is watched during transcoding.
+    """
+    index = stream_cache.get(_manifest_key(video_id))
+    hit = index is not None and (not isinstance(index, LiveIndex) or index.is_current())
+    record_cache('manifest', hit)
+    if not hit:
+        row = HlsManifest.objects.filter(video_id=video_id).values_list('files', 'live').first()
+        index = _index(row, hls_dir(video_id) if row and row[1] else None)
+        stream_cache.set(_manifest_key(video_id), index, settings.VIDEO_STREAM_CACHE_TIMEOUT)
+    return index
+
+
+async def amanifest_index(video_id: int):
+    """
+    Async variant of ``manifest_index`` for the ASGI views.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        dict: Mapping of file name to its ``(size, mtime_ns)``.
+    """
+    index = await stream_cache.aget(_manifest_key(video_id))
+    hit = index is not None and (not isinstance(index, LiveIndex) or index.is_current())
+    record_cache('manifest', hit)
+    if not hit:
+        row = await HlsManifest.objects.filter(video_id=video_id).values_list('files', 'live').afirst()
+        index = _index(row, await ahls_dir(video_id) if row and row[1] else None)
+        await stream_cache.aset(_manifest_key(video_id), index, settings.VIDEO_STREAM_CACHE_TIMEOUT)
+    return index
+
+
+def stream_files(video_id: int):
+    """
+    Returns what the streaming endpoints need to resolve a file name.
+
+    Args:
+        video_id (int): Primary key of the video.
+
+    Returns:
+        tuple: ``(output_dir, index)``, see ``hls_dir`` and ``manifest_index``.
+    Raises:
+        Video.DoesNotExist: If there is no video with that key.
+    """
+    return hls_dir(video_id), manifest_index(video_id)
+
+
+async def astream_files(video_id: int):
+    """
+    Async variant of ``stream_files`` for the ASGI views.
+    """
+    return await ahls_dir(video_id), await amanifest_index(video_id)
+
+
+def playlist_body(video_id: int, name: str, path: str, stat: os.stat_result):
+    """
+    Returns the content of a playlist, read from disk only if it is not
+    cached or the file changed since it was cached.
+
+    Args:
+        video_id (int): Primary key of the video.
+        name (str): Name of the playlist relative to the HLS directory
+            (e.g. 'master.m3u8' or '480p/index.m3u8').
+        path (str): Path of the playlist file.
+        stat (os.stat_result): Current stat of the playlist file.
+
+    Returns:
+        bytes: The playlist content.
+    """
+    key = _playlist_key(video_id, name)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = stream_cache.get(key)
+    record_cache('playlist', cached is not None and cached[0] == version)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(path, 'rb') as playlist:
+        content = playlist.read()
+    stream_cache.set(key, (version, content), settings.VIDEO_STREAM_CACHE_TIMEOUT)
+    return content
+
+
+def invalidate_manifest(video_id: int):
+    """
+    Drops the cached manifest index of a video.
+
+    Args:
+        video_id (int): Primary key of the video.
+    """
+    stream_cache.delete_many([_manifest_key(video_id)])
+
+
+def invalidate_video(video_id: int, output_dir: str = None):
+    """
+    Drops the cached HLS directory, manifest index and playlists of a video.
+
+    Args:
+        video_id (int): Primary key of the video.
+        output_dir (str, optional): HLS directory of the video, used to find
+            the names of its rendition playlists.
+    """
+    names = [MASTER_PLAYLIST]
+    if output_dir:
+        names += [
+            os.path.relpath(path, output_dir).replace(os.sep, '/')
+            for path in glob.glob(os.path.join(output_dir, '*', 'index.m3u8'))
+        ]
+    stream_cache.delete_many(
+        [_path_key(video_id), _manifest_key(video_id)]
+        + [_playlist_key(video_id, name) for name in names]
+    )
@@ -6,54 +6,782 @@ This module provides background tasks related to video processing.
 
 The main task converts uploaded MP4 videos into segmented HLS format
 (HTTP Live Streaming) in multiple resolutions using ffmpeg.
+
+Transcoding modes (see ``VIDEO_TRANSCODE_MODE``):
+
+- ``single_pass``: the source is decoded once and split into all
+  renditions inside one ffmpeg filter graph.
+- ``sequential``: one ffmpeg process per rendition (legacy behaviour).
+- ``fan_out``: one RQ job per rendition, so several workers encode
+  the same video in parallel.
+- ``chunked``: the source is cut at keyframes into pieces of
+  ``VIDEO_CHUNK_SECONDS``, every piece is encoded by its own RQ job and the
+  results are stitched into continuous playlists. Meant for long titles.
+
+Video renditions are video-only. Audio is encoded once into a shared
+``audio`` rendition that the master playlist references as an audio group.
+
+Segments are written as MPEG-TS files (one file per segment) or, with
+``VIDEO_HLS_SEGMENT_TYPE = 'fmp4'``, as one fragmented MP4 file per
+rendition that is addressed with ``#EXT-X-BYTERANGE``.
+
+``start_transcode`` is the parent job enqueued on upload. It fans out the
+encoding jobs and enqueues ``finalize_transcode`` as fan-in job, which runs
+once all encoding jobs have finished.
+
+Encoder settings come from the configured encoding profile; with per-title
+encoding the bitrate caps follow the measured complexity of the source
+(see ``video_app.encoding``).
+
+Trickplay sprite sheets (see ``video_app.trickplay``) are rendered from the
+same decode as the renditions: as an extra branch of the single-pass graph
+or together with the lowest rendition. Only chunked mode renders them in a
+separate job.
+
+Encoding jobs are routed to the ``high``, ``default`` or ``low`` queue by
+their estimated cost (see ``video_app.scheduler``); the parent and fan-in
+jobs are cheap and always run on ``high``.
+
+Encodes running inside an RQ job publish their progress through
+``video_app.progress``.
+
+With ``VIDEO_WATCH_WHILE_TRANSCODING`` the lowest rendition and the audio
+are written as growing ``EVENT`` playlists. As soon as both list their
+first segment, a master playlist with only that rendition and a live
+manifest are written and the video becomes ``streamable``; the fan-in job
+later replaces both with the full ladder.
+
+Transcodes are idempotent: a video that is already processed is skipped,
+and re-uploads of identical content reuse the existing output
+(see ``video_app.dedup``).
 """
 
+import glob
 import os
+import shutil
+from datetime import timedelta
 import ffmpeg
+import django_rq
+from django.conf import settings
+from django.core.files.base import ContentFile
+from rq import get_current_job
+
+from video_app.dedup import acquire_lock, content_hash, link_output, release_lock
+from video_app.encoding import measure_complexity, video_options
+from video_app.hls import (
+    AUDIO_RENDITION,
+    MASTER_PLAYLIST,
+    STAGED_MASTER_PLAYLIST,
+    parse_media_playlist,
+    stitch_chunk_playlists,
+    write_master_playlist,
+)
+from video_app.manifest import write_manifest
+from video_app.models import HlsManifest, ThumbnailVariant, Video, VideoSource
+from video_app.probe import build_ladder, probe_source
+from video_app.progress import register_jobs, run_with_progress
+from video_app.scheduler import encoder_threads, enqueue_encode, estimate_cost
+from video_app.thumbnails import render_variants
+from video_app.trickplay import build_sprites, sprite_output, write_thumbnail_track
 
 
-def convert_to_hls(source: str):
+def hls_output_dir(source: str):
+    """
+    Returns the HLS output directory for a source video file.
+
+    Args:
+        source (str): The full path to the source MP4 video file.
+
+    Returns:
+        str: Path of the ``<name>_hls`` folder next to the source file.
+    """
+    base_name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(os.path.dirname(source), base_name + '_hls')
+
+
+def chunk_work_dir(source: str):
+    """
+    Returns the scratch directory used by the chunked transcoding mode.
+
+    Args:
+        source (str): The full path to the source MP4 video file.
+
+    Returns:
+        str: Path of the ``_chunks`` folder inside the HLS directory.
+    """
+    return os.path.join(hls_output_dir(source), '_chunks')
+
+
+def _segment_options(res_dir: str, name: str, segment_type: str = None, live: bool = False):
+    """
+    Returns the HLS muxer options shared by video and audio renditions.
+
+    Args:
+        res_dir (str): Directory of the rendition.
+        name (str): Rendition name, used as segment file prefix.
+        segment_type (str, optional): 'mpegts' or 'fmp4', defaults to
+            ``settings.VIDEO_HLS_SEGMENT_TYPE``.
+        live (bool): Whether the rendition is watched while it is encoded.
+            Its playlist is marked as ``EVENT`` playlist and segments are
+            written under a temporary name until they are complete.
+
+    Returns:
+        dict: ffmpeg output options of the ``hls`` muxer.
+    """
+    options = {
+        'hls_time': settings.VIDEO_HLS_SEGMENT_SECONDS,
+        'hls_list_size': 0,
+        'start_number': 0,
+        'f': 'hls',
+        'hls_segment_filename': os.path.join(res_dir, f'{name}%d.ts'),
+    }
+    if (segment_type or settings.VIDEO_HLS_SEGMENT_TYPE) == 'fmp4':
+        options.update(
+            hls_segment_type='fmp4',
+            hls_flags='single_file',
+            hls_segment_filename=os.path.join(res_dir, f'{name}.mp4'),
+        )
+    if live:
+        options['hls_playlist_type'] = 'event'
+        if 'hls_flags' not in options:
+            options['hls_flags'] = 'temp_file'
+    return options
+
+
+def _hls_output(
+    stream, output_dir: str, res: str, size: str,
+    segment_type: str = None, complexity: float = None, live: bool = False, threads: int = None,
+):
+    """
+    Builds the video-only HLS output node for a single rendition.
+
+    Keyframes are forced on every segment boundary (and scene-cut
+    keyframes disabled) so that all renditions share identical
+    segment boundaries and players can switch between them cleanly.
+
+    Args:
+        stream: Scaled ffmpeg video stream of this rendition.
+        output_dir (str): The HLS root directory of the video.
+        res (str): Rendition name (e.g. '720p').
+        size (str): Target frame size (e.g. '1280x720').
+        segment_type (str, optional): 'mpegts' or 'fmp4', defaults to
+            ``settings.VIDEO_HLS_SEGMENT_TYPE``.
+        complexity (float, optional): Per-title complexity scaling the bitrate cap.
+        live (bool): Whether the rendition is watched while it is encoded.
+        threads (int, optional): Encoder threads, defaults to the share of
+            one encode (see ``scheduler.encoder_threads``).
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    res_dir = os.path.join(output_dir, res)
+    os.makedirs(res_dir, exist_ok=True)
+
+    options = {
+        'vcodec': 'h264',
+        **video_options(size, complexity),
+        'force_key_frames': f'expr:gte(t,n_forced*{settings.VIDEO_HLS_SEGMENT_SECONDS})',
+        'sc_threshold': 0,
+        'threads': threads or encoder_threads(),
+        **_segment_options(res_dir, res, segment_type, live),
+    }
+    return ffmpeg.output(stream, os.path.join(res_dir, 'index.m3u8'), **options)
+
+
+def _audio_output(stream, output_dir: str, segment_type: str = None, live: bool = False):
+    """
+    Builds the HLS output node of the shared audio rendition, which all
+    video renditions reference as one audio group.
+
+    Args:
+        stream: ffmpeg audio stream of the source.
+        output_dir (str): The HLS root directory of the video.
+        segment_type (str, optional): 'mpegts' or 'fmp4', defaults to
+            ``settings.VIDEO_HLS_SEGMENT_TYPE``.
+        live (bool): Whether the rendition is watched while it is encoded.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    res_dir = os.path.join(output_dir, AUDIO_RENDITION)
+    os.makedirs(res_dir, exist_ok=True)
+
+    return ffmpeg.output(
+        stream,
+        os.path.join(res_dir, 'index.m3u8'),
+        acodec='aac',
+        audio_bitrate=settings.VIDEO_AUDIO_BITRATE,
+        **_segment_options(res_dir, AUDIO_RENDITION, segment_type, live),
+    )
+
+
+def build_single_pass(
+    source: str, output_dir: str, resolutions: dict, segment_type: str = None,
+    trickplay: bool = False, complexity: float = None, audio: bool = True, live: str = None,
+):
+    """
+    Builds one ffmpeg graph that decodes the source once and
+    scales it into every rendition.
+
+    Args:
+        source (str): The full path to the source video file.
+        output_dir (str): The HLS root directory of the video.
+        resolutions (dict): Mapping of rendition name to frame size.
+        segment_type (str, optional): 'mpegts' or 'fmp4', defaults to
+            ``settings.VIDEO_HLS_SEGMENT_TYPE``.
+        trickplay (bool): Whether to render sprite sheets from the same decode.
+        complexity (float, optional): Per-title complexity scaling the bitrate caps.
+        audio (bool): Whether to encode the shared audio rendition.
+            Must be False for sources without an audio stream.
+        live (str, optional): Rendition watched while it is encoded,
+            together with the audio.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The merged output of all renditions.
+    """
+    source_input = ffmpeg.input(source)
+    split = source_input.video.filter_multi_output('split', len(resolutions) + trickplay)
+
+    outputs = [
+        _hls_output(
+            split[index].filter('scale', size=size),
+            output_dir, res, size, segment_type, complexity, res == live,
+            encoder_threads(len(resolutions)),
+        )
+        for index, (res, size) in enumerate(resolutions.items())
+    ]
+    if trickplay:
+        outputs.append(sprite_output(split[len(resolutions)], output_dir, resolutions))
+    if audio:
+        outputs.append(_audio_output(source_input.audio, output_dir, segment_type, live is not None))
+    return ffmpeg.merge_outputs(*outputs)
+
+
+def build_rendition(
+    source: str, output_dir: str, res: str, size: str,
+    trickplay: bool = False, complexity: float = None, audio: bool = False, live: bool = False,
+):
+    """
+    Builds the ffmpeg graph for a single rendition.
+
+    Args:
+        source (str): The full path to the source video file.
+        output_dir (str): The HLS root directory of the video.
+        res (str): Rendition name (e.g. '720p').
+        size (str): Target frame size (e.g. '1280x720').
+        trickplay (bool): Whether to render sprite sheets from the same decode.
+        complexity (float, optional): Per-title complexity scaling the bitrate cap.
+        audio (bool): Whether to encode the shared audio rendition as well.
+        live (bool): Whether the rendition (and audio) is watched while it
+            is encoded.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    source_input = ffmpeg.input(source)
+    video = source_input.video
+    if trickplay:
+        split = video.filter_multi_output('split', 2)
+        video = split[0]
+
+    outputs = [
+        _hls_output(video.filter('scale', size=size), output_dir, res, size, complexity=complexity, live=live)
+    ]
+    if trickplay:
+        outputs.append(sprite_output(split[1], output_dir, {res: size}))
+    if audio:
+        outputs.append(_audio_output(source_input.audio, output_dir, live=live))
+    return ffmpeg.merge_outputs(*outputs) if len(outputs) > 1 else outputs[0]
+
+
+def streamable_watcher(video_id: int, output_dir: str, res: str, size: str):
+    """
+    Returns a progress callback that makes a video streamable once the
+    live rendition and the audio (if encoded) list their first segment.
+
+    Args:
+        video_id (int): Primary key of the video.
+        output_dir (str): The HLS root directory of the video.
+        res (str): Name of the live rendition.
+        size (str): Frame size of the live rendition.
+
+    Returns:
+        callable: Callback without arguments, run on every progress update.
+    """
+    playlists = [os.path.join(output_dir, res, 'index.m3u8')]
+    audio_dir = os.path.join(output_dir, AUDIO_RENDITION)
+    if os.path.isdir(audio_dir):
+        playlists.append(os.path.join(audio_dir, 'index.m3u8'))
+    done = []
+
+    def check():
+        if done:
+            return
+        try:
+            if not all(parse_media_playlist(playlist) for playlist in playlists):
+                return
+        except FileNotFoundError:
+            return
+        done.append(True)
+        mark_streamable(video_id, output_dir, res, size)
+
+    return check
+
+
+def mark_streamable(video_id: int, output_dir: str, res: str, size: str):
+    """
+    Publishes the live rendition of a video that is still being encoded:
+    writes a master playlist with only that rendition and a live manifest,
+    and marks the video as streamable.
+
+    Args:
+        video_id (int): Primary key of the video.
+        output_dir (str): The HLS root directory of the video.
+        res (str): Name of the live rendition.
+        size (str): Frame size of the live rendition.
+    """
+    write_master_playlist(output_dir, {res: size})
+    live = [res]
+    if os.path.isdir(os.path.join(output_dir, AUDIO_RENDITION)):
+        live.append(AUDIO_RENDITION)
+    write_manifest(video_id, output_dir, live=live)
+    (
+        Video.objects
+        .filter(pk=video_id, hls_status=Video.HLSStatus.PROCESSING)
+        .update(hls_status=Video.HLSStatus.STREAMABLE)
+    )
+
+
+def _run(stream, label: str, duration: float = None, live: tuple = None):
+    """
+    Runs an ffmpeg graph. Inside a transcoding job the progress is
+    published for the job's video, otherwise ffmpeg simply runs.
+
+    Args:
+        stream: ffmpeg-python output node to run.
+        label (str): Progress label of the encode (e.g. '720p').
+        duration (float, optional): Length of the input in seconds,
+            defaults to the source duration stored in the job meta.
+        live (tuple, optional): ``(output_dir, res, size)`` of a rendition
+            watched while it is encoded (see ``streamable_watcher``).
+    """
+    job = get_current_job()
+    if job is None or 'video_id' not in job.meta:
+        stream.run(overwrite_output=True)
+        return
+
+    if duration is None:
+        duration = job.meta.get('duration')
+    on_progress = streamable_watcher(job.meta['video_id'], *live) if live else None
+    run_with_progress(stream, job.meta['video_id'], label, duration, on_progress)
+
+
+def convert_to_hls(
+    source: str, mode: str = None, ladder: dict = None,
+    complexity: float = None, audio: bool = None,
+):
     """
     Converts an uploaded MP4 video into HLS format with multiple resolutions.
 
     Args:
         source (str): The full path to the source MP4 video file.
+        mode (str, optional): Transcoding mode, defaults to
+            ``settings.VIDEO_TRANSCODE_MODE``.
+        ladder (dict, optional): Mapping of rendition name to frame size.
+            Built from an ffprobe of the source if omitted.
+        complexity (float, optional): Per-title complexity scaling the bitrate caps.
+        audio (bool, optional): Whether the source has audio to encode.
+            Probed from the source if omitted.
 
     Output:
-        Creates directories for 480p, 720p, and 1080p containing:
+        Creates one directory per rendition (e.g. 480p, 720p, 1080p) containing:
         - index.m3u8 manifest
         - .ts segments for each resolution
+        plus an ``audio`` directory with the shared audio rendition.
     """
-    resolutions = {
-        '480p': '854x480',
-        '720p': '1280x720',
-        '1080p': '1920x1080',
-    }
+    mode = mode or settings.VIDEO_TRANSCODE_MODE
+    if ladder is None or audio is None:
+        info = probe_source(source)
+        ladder = ladder or build_ladder(info['width'], info['height'])
+        audio = bool(info['audio_codec']) if audio is None else audio
 
-    base_name = os.path.splitext(os.path.basename(source))[0]
-    output_dir = os.path.join(os.path.dirname(source), base_name + '_hls')
+    output_dir = hls_output_dir(source)
     os.makedirs(output_dir, exist_ok=True)
+    trickplay = settings.VIDEO_TRICKPLAY_ENABLED
 
-    for res, size in resolutions.items():
-        res_dir = os.path.join(output_dir, res)
-        os.makedirs(res_dir, exist_ok=True)
-
-        out_playlist = os.path.join(res_dir, 'index.m3u8')
-        out_segments = os.path.join(res_dir, f'{res}%d.ts')
-
-        (
-            ffmpeg
-            .input(source)
-            .output(
-                out_playlist,
-                vf=f'scale={size}',
-                acodec='aac',
-                vcodec='h264',
-                hls_time=10,
-                hls_list_size=0,
-                start_number=0,
-                f='hls',
-                hls_segment_filename=out_segments
+    watch = settings.VIDEO_WATCH_WHILE_TRANSCODING
+
+    if mode == 'sequential':
+        for index, (res, size) in enumerate(ladder.items()):
+            first = index == 0
+            encode_rendition(
+                source, res, size, trickplay and first, complexity, audio and first, watch and first,
             )
-            .run(overwrite_output=True)
+        return
+
+    live = next(iter(ladder)) if watch else None
+    _run(
+        build_single_pass(
+            source, output_dir, ladder, trickplay=trickplay, complexity=complexity,
+            audio=audio, live=live,
+        ),
+        'ladder',
+        live=(output_dir, live, ladder[live]) if live else None,
+    )
+
+
+def encode_rendition(
+    source: str, res: str, size: str, trickplay: bool = False,
+    complexity: float = None, audio: bool = False, live: bool = False,
+):
+    """
+    Encodes a single rendition of a video. Used as fan-out job.
+
+    Args:
+        source (str): The full path to the source video file.
+        res (str): Rendition name (e.g. '720p').
+        size (str): Target frame size (e.g. '1280x720').
+        trickplay (bool): Whether to render sprite sheets from the same decode.
+        complexity (float, optional): Per-title complexity scaling the bitrate cap.
+        audio (bool): Whether to encode the shared audio rendition as well.
+        live (bool): Whether the rendition is watched while it is encoded.
+    """
+    output_dir = hls_output_dir(source)
+    os.makedirs(output_dir, exist_ok=True)
+    _run(
+        build_rendition(source, output_dir, res, size, trickplay, complexity, audio, live),
+        res,
+        live=(output_dir, res, size) if live else None,
+    )
+
+
+def encode_trickplay(source: str, ladder: dict):
+    """
+    Renders the trickplay sprite sheets in a job of their own.
+
+    Args:
+        source (str): The full path to the source video file.
+        ladder (dict): Mapping of rendition name to frame size.
+    """
+    _run(build_sprites(source, hls_output_dir(source), ladder), 'trickplay')
+
+
+def split_source(source: str, chunk_seconds: int):
+    """
+    Cuts the source into pieces of roughly ``chunk_seconds`` without
+    re-encoding. Cuts only happen on keyframes, so every piece can be
+    decoded on its own.
+
+    Args:
+        source (str): The full path to the source video file.
+        chunk_seconds (int): Target length of a piece in seconds.
+
+    Returns:
+        list: Paths of the pieces in playback order.
+    """
+    work_dir = chunk_work_dir(source)
+    os.makedirs(work_dir, exist_ok=True)
+
+    (
+        ffmpeg
+        .input(source)
+        .output(
+            os.path.join(work_dir, 'chunk%04d.mp4'),
+            c='copy',
+            map=0,
+            f='segment',
+            segment_time=chunk_seconds,
+            reset_timestamps=1,
         )
+        .run(overwrite_output=True)
+    )
+    return sorted(glob.glob(os.path.join(work_dir, 'chunk*.mp4')))
+
+
+def encode_chunk(chunk: str, ladder: dict, complexity: float = None):
+    """
+    Encodes one piece of a chunked transcode into all renditions.
+    The output is written next to the piece and stitched later. Pieces are
+    always written as MPEG-TS, since stitching renumbers segment files.
+
+    Args:
+        chunk (str): Path of the source piece.
+        ladder (dict): Mapping of rendition name to frame size.
+        complexity (float, optional): Per-title complexity of the whole
+            source, so all pieces share the same bitrate caps.
+    """
+    output_dir = os.path.splitext(chunk)[0]
+    os.makedirs(output_dir, exist_ok=True)
+    info = probe_source(chunk)
+    _run(
+        build_single_pass(
+            chunk, output_dir, ladder, 'mpegts',
+            complexity=complexity, audio=bool(info['audio_codec']),
+        ),
+        os.path.basename(output_dir),
+        info['duration'],
+    )
+
+
+def stitch_chunks(source: str, ladder: dict):
+    """
+    Joins the encoded pieces of a chunked transcode into continuous
+    rendition (and audio) playlists and removes the scratch directory.
+
+    Args:
+        source (str): The full path to the source video file.
+        ladder (dict): Mapping of rendition name to frame size.
+    """
+    work_dir = chunk_work_dir(source)
+    chunk_dirs = [
+        os.path.splitext(chunk)[0]
+        for chunk in sorted(glob.glob(os.path.join(work_dir, 'chunk*.mp4')))
+    ]
+    renditions = list(ladder)
+    if chunk_dirs and os.path.isdir(os.path.join(chunk_dirs[0], AUDIO_RENDITION)):
+        renditions.append(AUDIO_RENDITION)
+    for res in renditions:
+        stitch_chunk_playlists(hls_output_dir(source), chunk_dirs, res)
+    shutil.rmtree(work_dir)
+
+
+def probe_video(video: Video):
+    """
+    Runs ffprobe on the video's source file and stores the result.
+
+    Args:
+        video (Video): The uploaded video.
+
+    Returns:
+        VideoSource: The recorded source properties.
+    """
+    source_info, _ = VideoSource.objects.update_or_create(
+        video=video, defaults=probe_source(video.video.path)
+    )
+    return source_info
+
+
+def reuse_duplicate(video: Video):
+    """
+    Reuses the HLS output of an already transcoded video with identical
+    content by hard-linking it.
+
+    Args:
+        video (Video): The uploaded video, with ``content_hash`` set.
+
+    Returns:
+        bool: True if an existing output was reused.
+    """
+    duplicates = (
+        Video.objects
+        .filter(content_hash=video.content_hash, hls_status=Video.HLSStatus.READY)
+        .exclude(pk=video.pk)
+        .select_related('source_info')
+    )
+    for original in duplicates:
+        original_dir = hls_output_dir(original.video.path)
+        if not os.path.isdir(original_dir):
+            continue
+
+        output_dir = hls_output_dir(video.video.path)
+        link_output(original_dir, output_dir)
+        source_info = getattr(original, 'source_info', None)
+        if source_info is not None:
+            source_info.pk = None
+            source_info.video = video
+            source_info.save()
+        write_manifest(video.pk, output_dir, HlsManifest.objects.filter(video=original).first())
+        Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.READY)
+        return True
+    return False
+
+
+def start_transcode(video_id: int):
+    """
+    Parent job: probes the source, builds its rendition ladder, fans out
+    the encoding work onto the queue and enqueues the fan-in job that runs
+    after all of it succeeded.
+
+    Videos that are already processing, streamable or ready are skipped. Identical
+    content is linked from an existing output instead of being encoded,
+    and while another video with the same content is being encoded the
+    job retries later. If probing or planning the encode fails, the video
+    is marked as failed and its content lock released.
+
+    Args:
+        video_id (int): Primary key of the uploaded video.
+    """
+    video = Video.objects.get(pk=video_id)
+    if video.hls_status in (
+        Video.HLSStatus.PROCESSING, Video.HLSStatus.STREAMABLE, Video.HLSStatus.READY,
+    ):
+        return
+
+    source = video.video.path
+    if not video.content_hash:
+        video.content_hash = content_hash(source)
+        Video.objects.filter(pk=video_id).update(content_hash=video.content_hash)
+
+    queue = django_rq.get_queue('high', autocommit=True)
+    if reuse_duplicate(video):
+        return
+    if not acquire_lock(video.content_hash, video_id):
+        queue.enqueue_in(timedelta(seconds=settings.VIDEO_DEDUP_RETRY_SECONDS), start_transcode, video_id)
+        return
+
+    Video.objects.filter(pk=video_id).update(hls_status=Video.HLSStatus.PROCESSING)
+    try:
+        plan_transcode(video)
+    except Exception:
+        # Without this the video would stay processing and its content
+        # lock would block re-uploads until it expires.
+        fail_transcode(video_id, video.content_hash)
+        raise
+
+
+def plan_transcode(video: Video):
+    """
+    Probes the source of a video that holds its content lock, builds the
+    rendition ladder and enqueues the encoding jobs and the fan-in job.
+
+    Args:
+        video (Video): The video to transcode, with ``content_hash`` set.
+    """
+    video_id = video.pk
+    source = video.video.path
+    queue = django_rq.get_queue('high', autocommit=True)
+
+    source_info = probe_video(video)
+    ladder = build_ladder(source_info.width, source_info.height)
+    complexity = None
+    if settings.VIDEO_PER_TITLE_ENCODING:
+        complexity = measure_complexity(source, source_info.duration)
+        VideoSource.objects.filter(pk=source_info.pk).update(complexity=complexity)
+    job_options = {
+        'meta': {
+            'video_id': video_id,
+            'duration': source_info.duration,
+            'content_hash': video.content_hash,
+        },
+        'on_failure': mark_failed,
+    }
+
+    duration = source_info.duration
+    title_cost = estimate_cost(duration, ladder)
+    audio = bool(source_info.audio_codec)
+    mode = settings.VIDEO_TRANSCODE_MODE
+    trickplay = settings.VIDEO_TRICKPLAY_ENABLED
+    if mode == 'chunked':
+        chunk_seconds = settings.VIDEO_CHUNK_SECONDS
+        chunks = split_source(source, chunk_seconds)
+        labels = [os.path.splitext(os.path.basename(chunk))[0] for chunk in chunks]
+        jobs = [
+            enqueue_encode(
+                encode_chunk, chunk, ladder, complexity,
+                cost=estimate_cost(min(chunk_seconds, duration), ladder), title_cost=title_cost,
+                **job_options
+            )
+            for chunk in chunks
+        ]
+        if trickplay:
+            labels.append('trickplay')
+            lowest = dict(list(ladder.items())[:1])
+            jobs.append(enqueue_encode(
+                encode_trickplay, source, ladder,
+                cost=estimate_cost(duration, lowest), title_cost=title_cost, **job_options
+            ))
+        register_jobs(video_id, labels)
+    elif mode == 'fan_out':
+        register_jobs(video_id, list(ladder))
+        jobs = [
+            enqueue_encode(
+                encode_rendition, source, res, size,
+                trickplay and index == 0, complexity, audio and index == 0,
+                settings.VIDEO_WATCH_WHILE_TRANSCODING and index == 0,
+                cost=estimate_cost(duration, {res: size}), title_cost=title_cost, **job_options
+            )
+            for index, (res, size) in enumerate(ladder.items())
+        ]
+    else:
+        register_jobs(video_id, list(ladder) if mode == 'sequential' else ['ladder'])
+        jobs = [
+            enqueue_encode(
+                convert_to_hls, source, mode, ladder, complexity, audio,
+                cost=title_cost, **job_options
+            )
+        ]
+
+    queue.enqueue(
+        finalize_transcode, video_id, ladder, chunked=mode == 'chunked',
+        depends_on=jobs, **job_options
+    )
+
+
+def finalize_transcode(video_id: int, ladder: dict, chunked: bool = False):
+    """
+    Fan-in job: stitches chunked output if needed, writes the master
+    playlist, the trickplay thumbnail track and the manifest index and
+    marks the video as ready.
+
+    Args:
+        video_id (int): Primary key of the transcoded video.
+        ladder (dict): Mapping of rendition name to frame size.
+        chunked (bool): Whether the video was encoded in chunked mode.
+    """
+    video = Video.objects.get(pk=video_id)
+    if chunked:
+        stitch_chunks(video.video.path, ladder)
+    output_dir = hls_output_dir(video.video.path)
+    # Players keep getting the live master playlist (and its index stays
+    # current) until the final manifest is stored; the rename keeps the
+    # size and modification time that were recorded.
+    staged = write_master_playlist(output_dir, ladder, name=STAGED_MASTER_PLAYLIST)
+    source_info = getattr(video, 'source_info', None)
+    if source_info is not None:
+        write_thumbnail_track(output_dir, source_info.duration, ladder)
+    write_manifest(video_id, output_dir)
+    os.replace(staged, os.path.join(output_dir, MASTER_PLAYLIST))
+    Video.objects.filter(pk=video_id).update(hls_status=Video.HLSStatus.READY)
+    release_lock(video.content_hash, video_id)
+
+
+def mark_failed(job, connection, type, value, traceback):
+    """
+    RQ failure callback that marks the job's video as failed, withdraws
+    its manifest and releases its content lock.
+    """
+    fail_transcode(job.meta['video_id'], job.meta.get('content_hash'))
+
+
+def fail_transcode(video_id: int, digest: str = None):
+    """
+    Marks a video as failed, withdraws its manifest and releases its
+    content lock.
+
+    Args:
+        video_id (int): Primary key of the video.
+        digest (str, optional): Content hash of the video's source.
+    """
+    Video.objects.filter(pk=video_id).update(hls_status=Video.HLSStatus.FAILED)
+    # A live manifest would keep serving the incomplete playlists.
+    HlsManifest.objects.filter(video_id=video_id).delete()
+    release_lock(digest, video_id)
+
+
+def generate_thumbnail_variants(video_id: int):
+    """
+    Renders the responsive thumbnail variants of a video and replaces
+    any previously generated ones.
+
+    Args:
+        video_id (int): Primary key of the video.
+    """
+    video = Video.objects.get(pk=video_id)
+    with video.thumbnail.open('rb') as thumbnail:
+        variants = render_variants(thumbnail)
+
+    for old in video.thumbnail_variants.all():
+        old.delete()
+    for name, width, fmt, data in variants:
+        variant = ThumbnailVariant(video=video, width=width, format=fmt)
+        variant.image.save(name, ContentFile(data))
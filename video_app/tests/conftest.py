@@ -0,0 +1,126 @@
+"""
+video_app.tests.conftest
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Shared fixtures for the video_app test suite.
+"""
+
+from pathlib import Path
+
+import django_rq
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from video_app.metrics import stream_metrics
+from video_app.models import Video
+from video_app.segmentcache import segment_cache
+from video_app.streamcache import stream_cache
+from video_app.tasks import finalize_transcode
+
+
+class FakeJob:
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.meta = kwargs.get("meta", {})
+
+
+class FakeQueue:
+    """
+    Records enqueued jobs instead of sending them to Redis.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.jobs = []
+
+    def enqueue(self, func, *args, **kwargs):
+        job = FakeJob(func, args, kwargs)
+        self.jobs.append(job)
+        return job
+
+    def enqueue_in(self, delay, func, *args, **kwargs):
+        job = self.enqueue(func, *args, **kwargs)
+        job.delay = delay
+        return job
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    stream_cache.clear_local()
+    segment_cache.clear()
+    stream_metrics.clear()
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    created = {}
+
+    def get_queue(name="default", **kwargs):
+        return created.setdefault(name, FakeQueue(name))
+
+    monkeypatch.setattr(django_rq, "get_queue", get_queue)
+    return created
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def video(db, queues, media_root):
+    return Video.objects.create(
+        title="Big Buck Bunny",
+        description="A short film.",
+        category="Animation",
+        thumbnail=SimpleUploadedFile("bunny.jpg", b"jpeg", content_type="image/jpeg"),
+        video=SimpleUploadedFile("bunny.mp4", b"mp4", content_type="video/mp4"),
+    )
+
+
+def write_rendition(res_dir, res, segment_sizes, duration=10.0):
+    """
+    Writes a fake encoded rendition: a VOD media playlist plus segments
+    of the given sizes in bytes.
+    """
+    res_dir.mkdir(parents=True, exist_ok=True)
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{int(duration)}"]
+    for index, size in enumerate(segment_sizes):
+        (res_dir / f"{res}{index}.ts").write_bytes(b"\0" * size)
+        lines += [f"#EXTINF:{duration:.6f},", f"{res}{index}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    (res_dir / "index.m3u8").write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def hls_dir(video, monkeypatch):
+    monkeypatch.setattr("video_app.hls.probe_codecs", lambda path: ["avc1.64001F", "mp4a.40.2"])
+    base = video.video.path.rsplit(".", 1)[0] + "_hls"
+    for res, sizes in {"480p": [12500, 25000], "720p": [50000, 37500]}.items():
+        write_rendition(Path(base) / res, res, sizes)
+    return Path(base)
+
+
+@pytest.fixture
+def ready_video(video, hls_dir):
+    finalize_transcode(video.pk, {"480p": "854x480", "720p": "1280x720"})
+    return video
+
+
+@pytest.fixture
+def viewer(db):
+    return User.objects.create_user(username="viewer@example.com", password="securepassword")
+
+
+@pytest.fixture
+def api_client(viewer):
+    client = APIClient()
+    client.force_authenticate(user=viewer)
+    return client
@@ -0,0 +1,81 @@
+"""
+video_app.tests.test_async_views
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the async catalog and streaming views used under ASGI.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import Http404
+from django.test import AsyncRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from video_app.api import async_views
+
+
+def _request(user=None, **headers):
+    request = AsyncRequestFactory().get("/", headers=headers)
+    if user is not None:
+        request.COOKIES["access_token"] = str(RefreshToken.for_user(user).access_token)
+    return request
+
+
+def _call(view, request, **kwargs):
+    async def run():
+        response = await view(request, **kwargs)
+        if response.streaming:
+            assert response.is_async
+            response.body = b"".join([block async for block in response.streaming_content])
+        else:
+            response.body = response.content
+        return response
+
+    return async_to_sync(run)()
+
+
+def test_requires_authentication(ready_video):
+    response = _call(async_views.stream_master, _request(), movie_id=ready_video.pk)
+    assert response.status_code == 401
+
+
+def test_segment_is_streamed_asynchronously(viewer, ready_video):
+    response = _call(
+        async_views.stream_segment, _request(viewer),
+        movie_id=ready_video.pk, resolution="480p", segment="480p0.ts",
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"] == "video/MP2T"
+    assert "immutable" in response["Cache-Control"]
+    assert len(response.body) == 12500
+
+
+def test_segment_range_and_revalidation(viewer, ready_video):
+    kwargs = {"movie_id": ready_video.pk, "resolution": "480p", "segment": "480p0.ts"}
+    partial = _call(async_views.stream_segment, _request(viewer, Range="bytes=0-99"), **kwargs)
+    assert partial.status_code == 206
+    assert len(partial.body) == 100
+
+    etag = partial["ETag"]
+    cached = _call(async_views.stream_segment, _request(viewer, If_None_Match=etag), **kwargs)
+    assert cached.status_code == 304
+
+
+def test_media_playlist_is_signed(viewer, ready_video, settings):
+    settings.VIDEO_SIGNED_URLS = True
+    response = _call(
+        async_views.stream_m3u8, _request(viewer), movie_id=ready_video.pk, resolution="480p",
+    )
+    assert response.status_code == 200
+    assert f"/api/video/{ready_video.pk}/signed/480p/480p0.ts?u={viewer.id}&" in response.body.decode()
+
+
+def test_missing_video_is_not_found(viewer, db):
+    with pytest.raises(Http404):
+        _call(async_views.stream_master, _request(viewer), movie_id=999)
+
+
+def test_video_list(viewer, video):
+    response = _call(async_views.video_list, _request(viewer))
+    assert response.status_code == 200
+    assert b'"title":"Big Buck Bunny"' in response.body
@@ -0,0 +1,77 @@
+"""
+video_app.tests.test_benchmark
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the transcoding benchmark. Tests marked ``benchmark`` run
+real encodes and are only collected with ``pytest -m benchmark``.
+"""
+
+import shutil
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from video_app import benchmark
+from video_app.tests.conftest import write_rendition
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+
+def test_synthetic_source_uses_lavfi(tmp_path):
+    args = benchmark.build_synthetic_source(str(tmp_path / "clip.mp4"), "1280x720", 30).compile()
+
+    assert args[args.index("-f") + 1] == "lavfi"
+    assert "testsrc2=size=1280x720:rate=25:duration=30" in args
+    assert "sine=frequency=440:duration=30" in args
+
+
+def test_rendition_bytes(tmp_path):
+    write_rendition(tmp_path / "480p", "480p", [1000, 2000])
+
+    sizes = benchmark.rendition_bytes(str(tmp_path), {"480p": "854x480", "720p": "1280x720"})
+
+    assert sizes["480p"] > 3000
+    assert sizes["720p"] == 0
+
+
+def test_measure_applies_profile(tmp_path, monkeypatch):
+    seen = []
+
+    def transcode(source, mode, ladder):
+        from django.conf import settings
+
+        seen.append((mode, settings.VIDEO_ENCODING_PROFILE))
+        write_rendition(tmp_path / "clip_hls" / "480p", "480p", [500])
+
+    monkeypatch.setattr(benchmark, "transcode", transcode)
+
+    run = benchmark.measure(str(tmp_path / "clip.mp4"), 10, "sequential", "size", {"480p": "854x480"})
+
+    assert seen == [("sequential", "size")]
+    assert run["mode"] == "sequential" and run["profile"] == "size"
+    assert run["wall_seconds"] >= 0 and run["cpu_seconds"] >= 0
+    assert run["rendition_bytes"]["480p"] > 500
+
+
+def test_command_rejects_unknown_mode():
+    with pytest.raises(CommandError):
+        call_command("benchmark_transcode", modes=["turbo"])
+
+
+def test_command_rejects_unknown_profile():
+    with pytest.raises(CommandError):
+        call_command("benchmark_transcode", profiles=["lossless"])
+
+
+@pytest.mark.benchmark
+@requires_ffmpeg
+@pytest.mark.parametrize("mode", benchmark.MODES)
+def test_benchmark_modes(mode, settings, tmp_path):
+    settings.VIDEO_CHUNK_SECONDS = 2
+
+    report = benchmark.run_benchmark(["640x360"], [4], [mode], ["speed"], work_dir=str(tmp_path))
+
+    run = report["results"][0]["runs"][0]
+    assert run["realtime_factor"] > 0
+    assert run["rendition_bytes"]["360p"] > 0
+    assert (tmp_path / "synthetic_640x360_4s_hls" / "master.m3u8").exists()
@@ -0,0 +1,130 @@
+"""
+video_app.tests.test_catalog
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for keyset pagination, sparse fieldsets and category
+filtering of the video catalog.
+"""
+
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from video_app.catalog import catalog_query
+from video_app.models import Video
+
+
+@pytest.fixture
+def catalog(db):
+    """
+    Seven videos, the last three created at the same instant.
+    """
+    now = timezone.now()
+    videos = Video.objects.bulk_create(
+        Video(
+            title=f"Video {index}", description="A long description.",
+            category="Drama" if index % 2 else "Comedy",
+            thumbnail=f"thumbnails/{index}.jpg", video=f"videos/{index}.mp4",
+        )
+        for index in range(7)
+    )
+    for index, video in enumerate(videos):
+        created_at = now - timedelta(minutes=min(index, 4))
+        Video.objects.filter(pk=video.pk).update(created_at=created_at)
+    return [video.pk for video in videos]
+
+
+def _next(response):
+    match = re.match(r'<http://testserver(.+)>; rel="next"', response.get("Link", ""))
+    return match.group(1) if match else None
+
+
+def test_pages_follow_the_cursor(api_client, catalog):
+    url, seen, pages = "/api/video/?limit=3", [], 0
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        seen += [video["id"] for video in response.json()]
+        url, pages = _next(response), pages + 1
+
+    assert pages == 3
+    # Newest first; videos created at the same time are ordered by id.
+    assert seen == catalog[:4] + sorted(catalog[4:], reverse=True)
+
+
+def test_default_response_is_unchanged(api_client, catalog):
+    response = api_client.get("/api/video/")
+
+    assert "Link" not in response
+    assert len(response.json()) == 7
+    assert set(response.json()[0]) == {
+        "id", "created_at", "title", "description", "thumbnail_url", "thumbnail_srcset", "category",
+    }
+
+
+def test_sparse_fields_skip_columns(api_client, catalog):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get("/api/video/?fields=id,title")
+
+    assert response.json()[0] == {"id": catalog[0], "title": "Video 0"}
+    catalog_sql = [query["sql"] for query in queries if '"video_app_video"' in query["sql"]]
+    assert len(catalog_sql) == 1
+    assert '"description"' not in catalog_sql[0]
+
+
+def test_category_filter(api_client, catalog):
+    response = api_client.get("/api/video/?category=Drama&limit=2&fields=id,category")
+
+    assert [video["category"] for video in response.json()] == ["Drama", "Drama"]
+    rest = api_client.get(_next(response))
+    assert [video["id"] for video in rest.json()] == [catalog[5]]
+
+
+@pytest.mark.parametrize("query", ["cursor=not-a-cursor", "fields=id,secret", "limit=0"])
+def test_invalid_parameters(api_client, catalog, query):
+    response = api_client.get(f"/api/video/?{query}")
+    assert response.status_code == 400
+
+
+def test_page_query_uses_the_catalog_index(catalog):
+    queryset, _, _ = catalog_query({"category": "Drama"})
+    assert "video_category_catalog_idx" in queryset.explain()
+
+
+def test_pages_are_served_from_cache(api_client, catalog):
+    first = api_client.get("/api/video/?limit=3")
+
+    with CaptureQueriesContext(connection) as queries:
+        second = api_client.get("/api/video/?limit=3")
+
+    assert not [query for query in queries if '"video_app_video"' in query["sql"]]
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+    assert second["Link"] == first["Link"]
+    assert second["Cache-Control"] == "private, no-cache"
+
+
+def test_unchanged_catalog_is_not_modified(api_client, catalog):
+    etag = api_client.get("/api/video/")["ETag"]
+
+    response = api_client.get("/api/video/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+def test_saving_a_video_invalidates_the_cache(api_client, catalog):
+    etag = api_client.get("/api/video/")["ETag"]
+
+    video = Video.objects.get(pk=catalog[0])
+    video.title = "Renamed"
+    video.save()
+
+    response = api_client.get("/api/video/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Renamed"
+    assert response["ETag"] != etag
@@ -0,0 +1,99 @@
+"""
+video_app.tests.test_dedup
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for content-hash deduplication and idempotent transcodes.
+"""
+
+import hashlib
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from video_app.dedup import acquire_lock, content_hash
+from video_app.models import Video, VideoSource
+from video_app.signals import video_post_save
+from video_app.tasks import hls_output_dir, start_transcode
+
+
+def _upload(title="Copy"):
+    return Video.objects.create(
+        title=title,
+        description="Same file again.",
+        category="Animation",
+        thumbnail=SimpleUploadedFile("copy.jpg", b"jpeg", content_type="image/jpeg"),
+        video=SimpleUploadedFile("copy.mp4", b"mp4", content_type="video/mp4"),
+    )
+
+
+@pytest.fixture
+def transcoded(video, hls_dir):
+    video.content_hash = content_hash(video.video.path)
+    video.hls_status = Video.HLSStatus.READY
+    video.save()
+    VideoSource.objects.create(
+        video=video, duration=20, width=1280, height=720, frame_rate=25, video_codec="h264"
+    )
+    (hls_dir / "master.m3u8").write_text("#EXTM3U\n")
+    return video
+
+
+def test_content_hash_matches_sha256(video):
+    assert content_hash(video.video.path) == hashlib.sha256(b"mp4").hexdigest()
+
+
+def test_duplicate_upload_links_existing_output(transcoded, queues):
+    duplicate = _upload()
+    queues["high"].jobs.clear()
+
+    start_transcode(duplicate.pk)
+
+    duplicate.refresh_from_db()
+    assert duplicate.hls_status == Video.HLSStatus.READY
+    assert duplicate.content_hash == transcoded.content_hash
+    assert duplicate.source_info.width == 1280
+    assert queues["high"].jobs == []
+
+    original = os.path.join(hls_output_dir(transcoded.video.path), "480p", "480p0.ts")
+    linked = os.path.join(hls_output_dir(duplicate.video.path), "480p", "480p0.ts")
+    assert os.path.samefile(original, linked)
+
+
+def test_running_transcode_of_same_content_is_retried_later(video, queues):
+    acquire_lock(content_hash(video.video.path), video_id=-1)
+    queues["high"].jobs.clear()
+
+    start_transcode(video.pk)
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.PENDING
+    [retry] = queues["high"].jobs
+    assert retry.func is start_transcode
+    assert retry.delay.total_seconds() > 0
+
+
+def test_failed_probe_releases_the_video(video, queues, monkeypatch):
+    def broken_probe(path):
+        raise RuntimeError("ffprobe failed")
+
+    monkeypatch.setattr("video_app.tasks.probe_source", broken_probe)
+
+    with pytest.raises(RuntimeError):
+        start_transcode(video.pk)
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.FAILED
+    assert acquire_lock(video.content_hash, video_id=-1)
+
+
+def test_processed_video_is_not_transcoded_again(transcoded, queues):
+    queues["high"].jobs.clear()
+    start_transcode(transcoded.pk)
+    assert queues["high"].jobs == []
+
+
+def test_repeated_post_save_enqueues_once(video, queues):
+    video.save()
+    video_post_save(sender=Video, instance=video, created=True)
+    assert [job.func for job in queues["high"].jobs].count(start_transcode) == 1
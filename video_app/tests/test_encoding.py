@@ -0,0 +1,84 @@
+"""
+video_app.tests.test_encoding
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for encoding profiles and per-title complexity analysis.
+"""
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from video_app.encoding import complexity_from_sample, video_options
+from video_app.tasks import build_rendition, build_single_pass, encode_rendition, start_transcode
+from video_app.tests.test_transcoding import RESOLUTIONS, SOURCE_INFO
+
+
+def _option(args, name):
+    return [args[i + 1] for i, arg in enumerate(args) if arg == f"-{name}"]
+
+
+def test_profile_caps_scale_with_pixels(settings):
+    settings.VIDEO_ENCODING_PROFILE = "balanced"
+
+    assert video_options("1920x1080") == {
+        "preset": "medium", "crf": 23, "maxrate": "5000k", "bufsize": "10000k"
+    }
+    assert video_options("1280x720")["maxrate"] == "2222k"
+    assert video_options("1920x1080", profile="size")["preset"] == "slow"
+
+
+def test_complexity_lowers_caps():
+    assert video_options("1920x1080", complexity=0.5, profile="balanced")["maxrate"] == "2500k"
+
+
+def test_unknown_profile_is_rejected(settings):
+    settings.VIDEO_ENCODING_PROFILE = "lossless"
+    with pytest.raises(ImproperlyConfigured):
+        video_options("1920x1080")
+
+
+def test_complexity_from_sample():
+    assert complexity_from_sample(2250000, 10) == 1.0
+    assert complexity_from_sample(1125000, 10) == 0.5
+    assert complexity_from_sample(10000, 10) == 0.3
+
+
+def test_single_pass_applies_profile(tmp_path, settings):
+    settings.VIDEO_ENCODING_PROFILE = "speed"
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), RESOLUTIONS).compile()
+
+    assert _option(args, "preset") == ["veryfast"] * 3
+    assert _option(args, "crf") == ["23"] * 3
+    assert _option(args, "maxrate") == ["1186k", "2667k", "6000k"]
+
+
+def test_rendition_applies_complexity(tmp_path):
+    args = build_rendition(
+        str(tmp_path / "movie.mp4"), str(tmp_path), "1080p", "1920x1080", complexity=0.4
+    ).compile()
+
+    assert _option(args, "maxrate") == ["2000k"]
+    assert _option(args, "bufsize") == ["4000k"]
+
+
+def test_per_title_measures_and_passes_complexity(video, queues, settings, monkeypatch):
+    settings.VIDEO_TRANSCODE_MODE = "fan_out"
+    settings.VIDEO_PER_TITLE_ENCODING = True
+    monkeypatch.setattr("video_app.tasks.probe_source", lambda path: dict(SOURCE_INFO))
+    monkeypatch.setattr("video_app.tasks.measure_complexity", lambda source, duration: 0.42)
+
+    start_transcode(video.pk)
+
+    video.refresh_from_db()
+    assert video.source_info.complexity == 0.42
+    jobs = [job for queue in queues.values() for job in queue.jobs if job.func is encode_rendition]
+    assert {job.args[4] for job in jobs} == {0.42}
+
+
+def test_per_title_is_off_by_default(video, queues, monkeypatch):
+    monkeypatch.setattr("video_app.tasks.probe_source", lambda path: dict(SOURCE_INFO))
+
+    start_transcode(video.pk)
+
+    video.refresh_from_db()
+    assert video.source_info.complexity is None
@@ -0,0 +1,145 @@
+"""
+video_app.tests.test_live
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for watching a video while it is transcoded: the growing
+EVENT playlist of the lowest rendition and the streamable status.
+"""
+
+import shutil
+
+import pytest
+
+from video_app import tasks
+from video_app.models import HlsManifest, Video
+from video_app.tasks import (
+    build_single_pass,
+    finalize_transcode,
+    mark_failed,
+    start_transcode,
+    streamable_watcher,
+)
+from video_app.tests.conftest import FakeJob, write_rendition
+
+LADDER = {"480p": "854x480", "720p": "1280x720"}
+
+
+@pytest.fixture
+def encoding(video, hls_dir):
+    """
+    HLS output of a video whose 480p rendition is half encoded: its
+    playlist lists one segment and has no end tag yet.
+    """
+    Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.PROCESSING)
+    shutil.rmtree(hls_dir / "720p")
+    (hls_dir / "480p" / "index.m3u8").write_text(
+        "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:10\n#EXT-X-PLAYLIST-TYPE:EVENT\n"
+        "#EXTINF:10.000000,\n480p0.ts\n"
+    )
+    return hls_dir
+
+
+def test_live_rendition_is_an_event_playlist(tmp_path):
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), LADDER, live="480p").compile()
+
+    assert args.count("-hls_playlist_type") == 2
+    assert args.count("temp_file") == 2
+    video_output = args.index(str(tmp_path / "480p" / "index.m3u8"))
+    assert args[:video_output].count("-hls_playlist_type") == 1
+
+
+def test_watcher_marks_video_streamable(video, encoding):
+    watcher = streamable_watcher(video.pk, str(encoding), "480p", "854x480")
+    watcher()
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.STREAMABLE
+    manifest = HlsManifest.objects.get(video=video)
+    assert manifest.live == ["480p"]
+    master = (encoding / "master.m3u8").read_text()
+    assert "480p/index.m3u8" in master
+    assert "720p" not in master
+
+
+def test_watcher_waits_for_first_segment(video, encoding):
+    (encoding / "480p" / "index.m3u8").write_text("#EXTM3U\n#EXT-X-PLAYLIST-TYPE:EVENT\n")
+
+    streamable_watcher(video.pk, str(encoding), "480p", "854x480")()
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.PROCESSING
+    assert not HlsManifest.objects.filter(video=video).exists()
+
+
+def test_only_listed_segments_are_served(api_client, video, encoding):
+    streamable_watcher(video.pk, str(encoding), "480p", "854x480")()
+    base = f"/api/video/{video.pk}"
+
+    playlist = api_client.get(f"{base}/480p/index.m3u8")
+    assert playlist.status_code == 200
+    assert playlist["Cache-Control"] == "no-cache"
+    segment = api_client.get(f"{base}/480p/480p0.ts/")
+    assert segment.status_code == 200
+    assert "immutable" not in segment["Cache-Control"]
+    assert api_client.get(f"{base}/480p/480p1.ts/").status_code == 404
+    assert api_client.get(f"{base}/720p/index.m3u8").status_code == 404
+
+
+def test_finalize_replaces_live_manifest(api_client, video, encoding):
+    streamable_watcher(video.pk, str(encoding), "480p", "854x480")()
+    api_client.get(f"/api/video/{video.pk}/master.m3u8")
+
+    (encoding / "480p" / "index.m3u8").write_text(
+        "#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:10\n"
+        "#EXTINF:10.000000,\n480p0.ts\n#EXTINF:10.000000,\n480p1.ts\n#EXT-X-ENDLIST\n"
+    )
+    finalize_transcode(video.pk, {"480p": "854x480"})
+
+    assert HlsManifest.objects.get(video=video).live == []
+    segment = api_client.get(f"/api/video/{video.pk}/480p/480p1.ts/")
+    assert segment.status_code == 200
+    assert "immutable" in segment["Cache-Control"]
+
+
+def test_live_manifest_is_served_until_the_final_one_is_stored(
+    api_client, video, encoding, monkeypatch, django_assert_num_queries
+):
+    streamable_watcher(video.pk, str(encoding), "480p", "854x480")()
+    live_master = api_client.get(f"/api/video/{video.pk}/master.m3u8").content
+    write_manifest = tasks.write_manifest
+
+    def request_while_indexing(video_id, output_dir):
+        with django_assert_num_queries(0):
+            master = api_client.get(f"/api/video/{video.pk}/master.m3u8")
+            playlist = api_client.get(f"/api/video/{video.pk}/480p/index.m3u8")
+        assert master.content == live_master
+        assert playlist.status_code == 200
+        return write_manifest(video_id, output_dir)
+
+    monkeypatch.setattr("video_app.tasks.write_manifest", request_while_indexing)
+    write_rendition(encoding / "720p", "720p", [50000])
+    finalize_transcode(video.pk, LADDER)
+
+    master = api_client.get(f"/api/video/{video.pk}/master.m3u8")
+    assert b"720p/index.m3u8" in master.content
+    assert api_client.get(f"/api/video/{video.pk}/720p/index.m3u8").status_code == 200
+    assert not (encoding / "master.m3u8.staged").exists()
+
+
+def test_streamable_video_is_not_transcoded_again(video, queues):
+    Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.STREAMABLE)
+    queues.clear()
+
+    start_transcode(video.pk)
+
+    assert not any(queue.jobs for queue in queues.values())
+
+
+def test_failure_withdraws_live_manifest(video, encoding):
+    streamable_watcher(video.pk, str(encoding), "480p", "854x480")()
+
+    mark_failed(FakeJob(None, (), {"meta": {"video_id": video.pk}}), None, None, None, None)
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.FAILED
+    assert not HlsManifest.objects.filter(video=video).exists()
@@ -0,0 +1,90 @@
+"""
+video_app.tests.test_manifest
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the HLS manifest index and the validation of streamed
+file names against it.
+"""
+
+import hashlib
+import os
+
+from django.core.management import call_command
+
+from video_app.manifest import build_manifest
+from video_app.models import HlsManifest, Video
+
+
+def test_build_manifest(hls_dir):
+    renditions, files = build_manifest(str(hls_dir))
+
+    assert renditions == ["480p", "720p"]
+    segment = files["480p/480p1.ts"]
+    assert segment["size"] == 25000
+    assert segment["duration"] == 10.0
+    assert segment["sha256"] == hashlib.sha256(b"\0" * 25000).hexdigest()
+    assert files["480p/index.m3u8"]["duration"] is None
+
+
+def test_finalize_writes_manifest(ready_video):
+    manifest = HlsManifest.objects.get(video=ready_video)
+    assert "master.m3u8" in manifest.files
+    assert "720p/720p1.ts" in manifest.files
+
+
+def test_unknown_names_never_reach_the_disk(api_client, ready_video, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("file system accessed")
+
+    monkeypatch.setattr("video_app.api.views.file_response", fail)
+    base = f"/api/video/{ready_video.pk}"
+    assert api_client.get(f"{base}/480p/480p9.ts/").status_code == 404
+    assert api_client.get(f"{base}/..%2F..%2Fsecret/480p0.ts/").status_code == 404
+    assert api_client.get(f"{base}/1080p/index.m3u8").status_code == 404
+
+
+def test_segments_are_sent_with_size_from_index(api_client, ready_video, monkeypatch):
+    stat = os.stat
+    stated = []
+
+    def recording_stat(path, *args, **kwargs):
+        stated.append(str(path))
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", recording_stat)
+
+    response = api_client.get(f"/api/video/{ready_video.pk}/480p/480p0.ts/", HTTP_RANGE="bytes=0-9")
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 0-9/12500"
+    assert not [path for path in stated if path.endswith("480p0.ts")]
+
+
+def test_video_without_manifest_is_not_served(api_client, video, hls_dir):
+    assert api_client.get(f"/api/video/{video.pk}/480p/480p0.ts/").status_code == 404
+
+
+def test_index_command_backfills_ready_videos(api_client, video, hls_dir):
+    Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.READY)
+
+    call_command("index_hls", stdout=None)
+
+    assert HlsManifest.objects.filter(video=video).exists()
+    assert api_client.get(f"/api/video/{video.pk}/480p/480p0.ts/").status_code == 200
+
+
+def test_index_command_backfills_untracked_videos(video, hls_dir):
+    # Videos transcoded before hls_status existed were migrated as pending.
+    call_command("index_hls", stdout=None)
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.READY
+    assert HlsManifest.objects.filter(video=video).exists()
+
+
+def test_index_command_skips_running_transcodes(video, hls_dir):
+    Video.objects.filter(pk=video.pk).update(hls_status=Video.HLSStatus.PROCESSING)
+
+    call_command("index_hls", stdout=None)
+
+    assert not HlsManifest.objects.filter(video=video).exists()
@@ -0,0 +1,132 @@
+"""
+video_app.tests.test_metrics
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the request metrics of the streaming endpoints and their
+Prometheus scrape endpoint.
+"""
+
+from collections import defaultdict
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import Http404
+from rest_framework.test import APIClient
+
+from video_app.metrics import METRICS_KEY, MetricsBuffer, instrument, observe, render
+
+
+@pytest.fixture
+def scrape(settings):
+    settings.VIDEO_METRICS_TOKEN = "scrape-token"
+
+    def get():
+        response = APIClient().get("/api/metrics/", headers={"Authorization": "Bearer scrape-token"})
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        return response.content.decode().splitlines()
+
+    return get
+
+
+class FakePipeline:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.commands = []
+
+    def hincrby(self, key, field, amount):
+        self.commands.append((key, field, amount))
+
+    hincrbyfloat = hincrby
+
+    def execute(self):
+        for key, field, amount in self.commands:
+            self.hashes[key][field.encode()] += amount
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = defaultdict(lambda: defaultdict(float))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.hashes)
+
+    def hgetall(self, key):
+        return {field: str(value).encode() for field, value in self.hashes[key].items()}
+
+
+def test_streaming_requests_are_recorded(api_client, ready_video, scrape):
+    base = f"/api/video/{ready_video.pk}"
+    api_client.get(f"{base}/480p/index.m3u8")
+    api_client.get(f"{base}/480p/480p0.ts/")
+    api_client.get(f"{base}/480p/480p0.ts/")
+    missing = api_client.get(f"{base}/480p/480p9.ts/")
+
+    lines = scrape()
+    sent = 2 * 12500 + len(missing.content)
+
+    assert 'videoflix_http_requests_total{status="200",endpoint="segment",resolution="480p"} 2' in lines
+    assert 'videoflix_http_not_found_total{endpoint="segment",resolution="480p"} 1' in lines
+    assert f'videoflix_http_response_bytes_total{{endpoint="segment",resolution="480p"}} {sent}' in lines
+    assert 'videoflix_http_request_duration_seconds_count{endpoint="segment"} 3' in lines
+    assert 'videoflix_http_request_duration_seconds_count{endpoint="playlist"} 1' in lines
+    assert 'videoflix_cache_requests_total{cache="manifest",result="hit"} 3' in lines
+    assert "# TYPE videoflix_http_request_duration_seconds histogram" in lines
+
+
+def test_catalog_requests_are_recorded(api_client, video, scrape):
+    assert api_client.get("/api/video/").status_code == 200
+
+    lines = scrape()
+
+    assert 'videoflix_http_requests_total{status="200",endpoint="video_list",resolution=""} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative(settings):
+    settings.VIDEO_METRICS_TOKEN = "scrape-token"
+    observe("segment", "480p", 200, 100, 0.003)
+    observe("segment", "480p", 200, 100, 0.2)
+
+    buckets = [line for line in render().splitlines() if "_bucket" in line]
+
+    assert buckets[0] == 'videoflix_http_request_duration_seconds_bucket{endpoint="segment",le="0.005"} 1'
+    assert 'videoflix_http_request_duration_seconds_bucket{endpoint="segment",le="0.25"} 2' in buckets
+    assert buckets[-1] == 'videoflix_http_request_duration_seconds_bucket{endpoint="segment",le="+Inf"} 2'
+
+
+def test_unknown_resolutions_share_one_label():
+    observe("segment", "../../secret", 404, 0, 0.001)
+
+    assert 'videoflix_http_not_found_total{endpoint="segment",resolution="other"} 1' in render()
+
+
+def test_workers_are_aggregated_in_redis(settings, monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr("video_app.metrics.get_redis_connection", lambda alias: redis)
+    settings.CACHES = {"default": {"BACKEND": "django_redis.cache.RedisCache"}}
+    first, second = MetricsBuffer(), MetricsBuffer()
+
+    first.add({'videoflix_http_requests_total{status="200"}': 1})
+    second.add({'videoflix_http_requests_total{status="200"}': 2})
+    second.flush()
+
+    assert first.totals() == {'videoflix_http_requests_total{status="200"}': 3.0}
+    assert list(redis.hashes) == [METRICS_KEY]
+
+
+def test_metrics_endpoint_requires_token(db, settings):
+    assert APIClient().get("/api/metrics/").status_code == 404
+
+    settings.VIDEO_METRICS_TOKEN = "scrape-token"
+    response = APIClient().get("/api/metrics/", headers={"Authorization": "Bearer wrong"})
+    assert response.status_code == 403
+
+
+def test_async_views_are_recorded():
+    async def view(request, movie_id, resolution, segment):
+        raise Http404()
+
+    with pytest.raises(Http404):
+        async_to_sync(instrument("segment")(view))(None, movie_id=1, resolution="720p", segment="720p9.ts")
+
+    assert 'videoflix_http_not_found_total{endpoint="segment",resolution="720p"} 1' in render()
@@ -0,0 +1,103 @@
+"""
+video_app.tests.test_progress
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for ffmpeg progress parsing, publishing and the
+transcode status endpoint.
+"""
+
+import ffmpeg
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from video_app.progress import get_progress, register_jobs, run_with_progress, snapshot
+
+PROGRESS_OUTPUT = [
+    b"frame=240\n", b"fps=48.00\n", b"out_time_us=10000000\n", b"speed=2.01x\n", b"progress=continue\n",
+    b"frame=480\n", b"fps=47.50\n", b"out_time_us=20000000\n", b"speed=1.98x\n", b"progress=end\n",
+]
+
+
+class FakeProcess:
+    def __init__(self, lines, returncode=0):
+        self.stdout = iter(lines)
+        self.returncode = returncode
+
+    def wait(self):
+        return self.returncode
+
+
+class FakeStream:
+    def __init__(self, process):
+        self.process = process
+        self.args = None
+
+    def global_args(self, *args):
+        self.args = args
+        return self
+
+    def run_async(self, **kwargs):
+        return self.process
+
+
+def test_snapshot_parses_progress_block():
+    record = snapshot({"out_time_us": "30000000", "fps": "25.0", "speed": "1.5x", "progress": "continue"}, 120)
+    assert record["out_time"] == 30.0
+    assert record["percent"] == 25.0
+    assert record["fps"] == 25.0
+    assert record["speed"] == 1.5
+    assert record["state"] == "running"
+
+
+def test_snapshot_handles_missing_values():
+    record = snapshot({"out_time_us": "N/A", "speed": "N/A", "progress": "continue"})
+    assert record["out_time"] is None
+    assert record["speed"] is None
+    assert record["percent"] is None
+
+
+def test_run_with_progress_publishes_latest_block():
+    register_jobs(7, ["720p", "1080p"])
+    stream = FakeStream(FakeProcess(PROGRESS_OUTPUT))
+
+    run_with_progress(stream, 7, "720p", duration=20)
+
+    assert stream.args == ("-progress", "pipe:1", "-nostats")
+    progress = get_progress(7)
+    assert progress["1080p"] is None
+    assert progress["720p"]["state"] == "finished"
+    assert progress["720p"]["percent"] == 100.0
+    assert progress["720p"]["fps"] == 47.5
+
+
+def test_run_with_progress_marks_failed_encode():
+    register_jobs(7, ["720p"])
+    with pytest.raises(ffmpeg.Error):
+        run_with_progress(FakeStream(FakeProcess(PROGRESS_OUTPUT[:5], returncode=1)), 7, "720p")
+    assert get_progress(7)["720p"]["state"] == "failed"
+
+
+def test_stalled_encode_is_flagged(settings):
+    settings.VIDEO_PROGRESS_STALL_SECONDS = -1
+    register_jobs(7, ["720p"])
+    run_with_progress(FakeStream(FakeProcess(PROGRESS_OUTPUT[:5])), 7, "720p")
+    assert get_progress(7)["720p"]["stalled"] is True
+
+
+def test_status_endpoint(video):
+    register_jobs(video.pk, ["ladder"])
+    run_with_progress(FakeStream(FakeProcess(PROGRESS_OUTPUT[:5])), video.pk, "ladder", 40)
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="editor@example.com"))
+
+    response = client.get(f"/api/video/{video.pk}/status/")
+
+    assert response.status_code == 200
+    assert response.data["hls_status"] == "pending"
+    assert response.data["jobs"]["ladder"]["percent"] == 25.0
+
+
+def test_status_endpoint_requires_authentication(video):
+    response = APIClient().get(f"/api/video/{video.pk}/status/")
+    assert response.status_code in (401, 403)
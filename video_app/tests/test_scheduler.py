@@ -0,0 +1,47 @@
+"""
+video_app.tests.test_scheduler
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for cost-based routing of transcoding jobs.
+"""
+
+from video_app.scheduler import encoder_threads, enqueue_encode, estimate_cost, job_timeout, select_queue
+
+LADDER = {"480p": "854x480", "720p": "1280x720", "1080p": "1920x1080"}
+
+
+def encode(*args):
+    pass
+
+
+def test_cost_scales_with_duration_and_ladder():
+    assert estimate_cost(60, {"1080p": "1920x1080"}) == 60
+    assert round(estimate_cost(60, LADDER), 1) == round(60 * (1 + 4 / 9 + 854 * 480 / (1920 * 1080)), 1)
+    assert estimate_cost(7200, LADDER) == 120 * estimate_cost(60, LADDER)
+
+
+def test_queue_selection(settings):
+    settings.VIDEO_SCHEDULER_SHORT_COST = 600
+    settings.VIDEO_SCHEDULER_LONG_COST = 3600
+    assert select_queue(estimate_cost(90, LADDER)) == "high"
+    assert select_queue(estimate_cost(1200, LADDER)) == "default"
+    assert select_queue(estimate_cost(7200, LADDER)) == "low"
+
+
+def test_timeout_grows_with_cost(settings):
+    settings.VIDEO_ENCODE_SECONDS_PER_COST = 1.0
+    assert job_timeout(10) == settings.VIDEO_SCHEDULER_MIN_TIMEOUT
+    assert job_timeout(10000) == 10000 * settings.VIDEO_SCHEDULER_TIMEOUT_FACTOR
+
+
+def test_encoder_threads_share_cpus(settings, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 16)
+    settings.VIDEO_MAX_CONCURRENT_ENCODES = 4
+    assert encoder_threads() == 4
+    assert encoder_threads(outputs=3) == 1
+
+
+def test_enqueue_encode_sets_queue_and_timeout(queues):
+    job = enqueue_encode(encode, "x", cost=100000)
+    assert queues["low"].jobs == [job]
+    assert job.kwargs["job_timeout"] == job_timeout(100000)
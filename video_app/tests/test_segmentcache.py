@@ -0,0 +1,88 @@
+"""
+video_app.tests.test_segmentcache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the in-memory hot-segment cache.
+"""
+
+from video_app.api.streaming import FileStat
+from video_app.segmentcache import SegmentCache, segment_cache
+from video_app.streamcache import manifest_index
+
+
+def _segment(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"\0" * size)
+    return str(path), FileStat(size, path.stat().st_mtime_ns)
+
+
+def test_admits_after_repeated_requests(tmp_path):
+    cache = SegmentCache(max_bytes=1000, max_item_bytes=1000, admit_hits=2)
+    path, stat = _segment(tmp_path, "a.ts", 100)
+
+    assert cache.load("a", path, stat) is None
+    assert cache.load("a", path, stat) == b"\0" * 100
+    (tmp_path / "a.ts").unlink()
+    assert cache.load("a", path, stat) == b"\0" * 100
+    assert cache.size == 100
+
+
+def test_rare_segments_do_not_evict_popular_ones(tmp_path):
+    cache = SegmentCache(max_bytes=250, max_item_bytes=250, admit_hits=1)
+    popular, popular_stat = _segment(tmp_path, "popular.ts", 100)
+    other, other_stat = _segment(tmp_path, "other.ts", 100)
+    rare, rare_stat = _segment(tmp_path, "rare.ts", 100)
+    cache.load("other", other, other_stat)
+    cache.load("other", other, other_stat)
+    for _ in range(3):
+        cache.load("popular", popular, popular_stat)
+
+    assert cache.load("rare", rare, rare_stat) is not None
+    assert set(cache._entries) == {"popular", "other"}
+
+    for _ in range(3):
+        cache.load("rare", rare, rare_stat)
+    assert set(cache._entries) == {"popular", "rare"}
+    assert cache.size == 200
+
+
+def test_changed_file_is_reread(tmp_path):
+    cache = SegmentCache(max_bytes=1000, max_item_bytes=1000, admit_hits=1)
+    path, stat = _segment(tmp_path, "a.ts", 100)
+    cache.load("a", path, stat)
+
+    path, stat = _segment(tmp_path, "a.ts", 50)
+    assert cache.load("a", path, FileStat(50, stat.st_mtime_ns + 1)) == b"\0" * 50
+    assert cache.size == 50
+
+
+def test_oversized_segments_are_streamed_from_disk(tmp_path):
+    cache = SegmentCache(max_bytes=1000, max_item_bytes=50, admit_hits=1)
+    path, stat = _segment(tmp_path, "a.ts", 100)
+    assert cache.load("a", path, stat) is None
+
+
+def test_popular_segment_is_served_from_memory(api_client, ready_video, hls_dir):
+    url = f"/api/video/{ready_video.pk}/480p/480p0.ts/"
+    assert api_client.get(url).streaming
+    api_client.get(url)
+    (hls_dir / "480p" / "480p0.ts").unlink()
+
+    response = api_client.get(url, HTTP_RANGE="bytes=0-99")
+    assert response.status_code == 206
+    assert len(response.content) == 100
+
+
+def test_trending_title_is_warmed(api_client, ready_video, hls_dir, settings):
+    settings.VIDEO_SEGMENT_CACHE_TRENDING_PLAYS = 2
+    settings.VIDEO_SEGMENT_CACHE_WARM_SEGMENTS = 1
+    index = manifest_index(ready_video.pk)
+
+    assert segment_cache.record_play(ready_video.pk, str(hls_dir), index) is None
+    segment_cache.record_play(ready_video.pk, str(hls_dir), index).join()
+
+    assert set(segment_cache._entries) == {
+        (ready_video.pk, "480p/480p0.ts"),
+        (ready_video.pk, "720p/720p0.ts"),
+    }
+    assert segment_cache.record_play(ready_video.pk, str(hls_dir), index) is None
@@ -0,0 +1,85 @@
+"""
+video_app.tests.test_signing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for signed segment URLs and the signed segment endpoint.
+"""
+
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from rest_framework.test import APIClient
+
+from video_app.signing import sign_playlist, signed_expiry, signed_query, verify
+
+
+def _segment_urls(playlist):
+    return [line for line in playlist.content.decode().splitlines() if line and not line.startswith("#")]
+
+
+def test_expiry_is_aligned_to_windows(settings):
+    settings.VIDEO_SIGNED_URL_TTL = 3600
+    assert signed_expiry(7200) == 14400
+    assert signed_expiry(10799) == 14400
+    assert signed_expiry(10800) == 18000
+
+
+def test_verify_signature():
+    params = QueryDict(signed_query(5, 7, 2000))
+
+    assert verify(params, 7, now=1000)
+    assert not verify(params, 8, now=1000)
+    assert not verify(params, 7, now=2001)
+    assert not verify(QueryDict("u=6&exp=2000&sig=" + params["sig"]), 7, now=1000)
+    assert not verify(QueryDict("u=5&exp=2000"), 7, now=1000)
+
+
+def test_sign_playlist_rewrites_uris():
+    playlist = b'#EXTM3U\n#EXT-X-MAP:URI="480p.mp4",BYTERANGE="812@0"\n#EXTINF:10.0,\n480p.mp4\n#EXT-X-ENDLIST\n'
+
+    lines = sign_playlist(playlist, "/api/video/1/signed/480p", "u=1&exp=2&sig=x").decode().splitlines()
+
+    assert lines[1] == '#EXT-X-MAP:URI="/api/video/1/signed/480p/480p.mp4?u=1&exp=2&sig=x",BYTERANGE="812@0"'
+    assert lines[3] == "/api/video/1/signed/480p/480p.mp4?u=1&exp=2&sig=x"
+    assert lines[4] == "#EXT-X-ENDLIST"
+
+
+def test_signed_segment_needs_no_authentication(api_client, viewer, ready_video, django_assert_num_queries):
+    playlist = api_client.get(f"/api/video/{ready_video.pk}/480p/index.m3u8")
+    urls = _segment_urls(playlist)
+    assert urls[0].startswith(f"/api/video/{ready_video.pk}/signed/480p/480p0.ts?u={viewer.pk}&exp=")
+
+    with django_assert_num_queries(0):
+        response = APIClient().get(urls[0])
+
+    assert response.status_code == 200
+    assert len(b"".join(response.streaming_content)) == 12500
+    assert response["Cache-Control"].startswith("public, max-age=")
+
+
+def test_signed_playlist_etag_differs_per_user(api_client, ready_video, db):
+    other = APIClient()
+    other.force_authenticate(user=User.objects.create_user(username="other@example.com"))
+    url = f"/api/video/{ready_video.pk}/480p/index.m3u8"
+
+    assert api_client.get(url)["ETag"] != other.get(url)["ETag"]
+
+
+def test_signed_segment_rejects_bad_signatures(api_client, ready_video):
+    url = _segment_urls(api_client.get(f"/api/video/{ready_video.pk}/480p/index.m3u8"))[0]
+    client = APIClient()
+
+    assert client.get(url.replace("sig=", "sig=0")).status_code == 403
+    assert client.get(url.split("?")[0]).status_code == 403
+    assert client.get(url.replace(f"/{ready_video.pk}/", f"/{ready_video.pk + 1}/")).status_code == 403
+
+
+def test_signed_segment_rejects_path_traversal(api_client, ready_video):
+    query = signed_query(1, ready_video.pk, signed_expiry())
+    response = APIClient().get(f"/api/video/{ready_video.pk}/signed/480p/..mp4?{query}")
+    assert response.status_code == 404
+
+
+def test_unsigned_playlists_when_disabled(api_client, ready_video, settings):
+    settings.VIDEO_SIGNED_URLS = False
+    playlist = api_client.get(f"/api/video/{ready_video.pk}/480p/index.m3u8")
+    assert _segment_urls(playlist) == ["480p0.ts", "480p1.ts"]
@@ -0,0 +1,89 @@
+"""
+video_app.tests.test_streamcache
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the two-tier cache of HLS paths and playlist bodies.
+"""
+
+import os
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from video_app import streamcache
+from video_app.models import Video
+from video_app.streamcache import TwoTierCache
+
+
+@pytest.fixture
+def cookie_client(db):
+    user = User.objects.create_user(username="viewer@example.com", password="securepassword")
+    client = APIClient()
+    client.cookies["access_token"] = str(RefreshToken.for_user(user).access_token)
+    return client
+
+
+def test_local_tier_evicts_least_recently_used():
+    tiers = TwoTierCache(maxsize=2, ttl=60)
+    tiers.set("a", 1, 60)
+    tiers.set("b", 2, 60)
+    tiers.get("a")
+    tiers.set("c", 3, 60)
+    cache.clear()
+
+    assert tiers.get("a") == 1
+    assert tiers.get("b") is None
+    assert tiers.get("c") == 3
+
+
+def test_local_tier_falls_back_to_shared_cache():
+    tiers = TwoTierCache(maxsize=2, ttl=0)
+    tiers.set("a", 1, 60)
+
+    assert tiers.get("a") == 1
+    cache.clear()
+    assert tiers.get("a") is None
+
+
+def test_streaming_runs_no_sql_once_cached(cookie_client, ready_video, django_assert_num_queries):
+    base = f"/api/video/{ready_video.pk}"
+    cookie_client.get(f"{base}/480p/index.m3u8")
+
+    with django_assert_num_queries(0):
+        playlist = cookie_client.get(f"{base}/480p/index.m3u8")
+        segment = cookie_client.get(f"{base}/480p/480p0.ts/")
+
+    assert playlist.status_code == 200
+    assert segment.status_code == 200
+
+
+def test_changed_playlist_is_reread(cookie_client, ready_video, hls_dir):
+    url = f"/api/video/{ready_video.pk}/480p/index.m3u8"
+    cookie_client.get(url)
+
+    playlist = hls_dir / "480p" / "index.m3u8"
+    playlist.write_text(playlist.read_text() + "#EXT-X-COMMENT\n")
+    stat = playlist.stat()
+    os.utime(playlist, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    assert cookie_client.get(url).content.decode().endswith("#EXT-X-COMMENT\n")
+
+
+def test_save_invalidates_cached_path(ready_video, hls_dir, django_assert_num_queries):
+    assert streamcache.hls_dir(ready_video.pk) == str(hls_dir)
+    ready_video.save()
+
+    with django_assert_num_queries(1):
+        streamcache.hls_dir(ready_video.pk)
+
+
+def test_unknown_video_is_cached_as_miss(db, django_assert_num_queries):
+    with pytest.raises(Video.DoesNotExist):
+        streamcache.hls_dir(4711)
+
+    with django_assert_num_queries(0):
+        with pytest.raises(Video.DoesNotExist):
+            streamcache.hls_dir(4711)
@@ -0,0 +1,138 @@
+"""
+video_app.tests.test_streaming
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the HLS streaming endpoints: master playlist,
+media playlists and segments.
+"""
+
+import pytest
+from rest_framework.test import APIClient
+
+from video_app.api.streaming import offload_response
+from video_app.manifest import write_manifest
+
+
+def test_master_playlist_requires_authentication(ready_video):
+    response = APIClient().get(f"/api/video/{ready_video.pk}/master.m3u8")
+    assert response.status_code in (401, 403)
+
+
+def test_master_playlist(api_client, ready_video):
+    response = api_client.get(f"/api/video/{ready_video.pk}/master.m3u8")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.apple.mpegurl"
+    body = response.content.decode()
+    assert "480p/index.m3u8" in body
+    assert "BANDWIDTH=" in body
+
+
+def test_master_playlist_missing(api_client, video):
+    response = api_client.get(f"/api/video/{video.pk}/master.m3u8")
+    assert response.status_code == 404
+
+
+def test_media_playlist_and_segment(api_client, ready_video):
+    playlist = api_client.get(f"/api/video/{ready_video.pk}/480p/index.m3u8")
+    assert playlist.status_code == 200
+
+    segment = api_client.get(f"/api/video/{ready_video.pk}/480p/480p0.ts/")
+    assert segment.status_code == 200
+    assert segment["Content-Type"] == "video/MP2T"
+    assert len(b"".join(segment.streaming_content)) == 12500
+
+
+def test_segment_byte_range(api_client, ready_video):
+    response = api_client.get(
+        f"/api/video/{ready_video.pk}/480p/480p0.ts/", HTTP_RANGE="bytes=100-199"
+    )
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 100-199/12500"
+    assert len(response.content) == 100
+
+
+def test_segment_suffix_range_of_single_file(api_client, ready_video, hls_dir):
+    (hls_dir / "480p" / "480p.mp4").write_bytes(bytes(range(256)) * 4)
+    write_manifest(ready_video.pk, str(hls_dir))
+
+    response = api_client.get(f"/api/video/{ready_video.pk}/480p/480p.mp4/", HTTP_RANGE="bytes=-16")
+    assert response.status_code == 206
+    assert response["Content-Type"] == "video/mp4"
+    assert response.content == bytes(range(240, 256))
+
+
+def test_segment_unsatisfiable_range(api_client, ready_video):
+    response = api_client.get(
+        f"/api/video/{ready_video.pk}/480p/480p0.ts/", HTTP_RANGE="bytes=20000-"
+    )
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */12500"
+
+
+def test_x_accel_offloads_segment(api_client, ready_video, settings):
+    settings.VIDEO_DELIVERY_MODE = "x-accel"
+
+    response = api_client.get(f"/api/video/{ready_video.pk}/480p/480p0.ts/", HTTP_RANGE="bytes=0-99")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response["Content-Type"] == "video/MP2T"
+    assert response["X-Accel-Redirect"] == "/protected-media/videos/bunny_hls/480p/480p0.ts"
+
+
+def test_x_sendfile_offloads_playlist(api_client, ready_video, settings, hls_dir):
+    settings.VIDEO_DELIVERY_MODE = "x-sendfile"
+
+    response = api_client.get(f"/api/video/{ready_video.pk}/master.m3u8")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.apple.mpegurl"
+    assert response["X-Sendfile"] == str((hls_dir / "master.m3u8").resolve())
+
+
+def test_offload_rejects_missing_and_outside_files(api_client, ready_video, settings, tmp_path_factory):
+    settings.VIDEO_DELIVERY_MODE = "x-accel"
+    outside = tmp_path_factory.mktemp("outside") / "secret.ts"
+    outside.write_bytes(b"ts")
+
+    assert api_client.get(f"/api/video/{ready_video.pk}/480p/480p9.ts/").status_code == 404
+    with pytest.raises(FileNotFoundError):
+        offload_response(str(outside), "video/MP2T")
+
+
+def test_segment_is_cached_as_immutable(api_client, ready_video):
+    response = api_client.get(f"/api/video/{ready_video.pk}/480p/480p0.ts/")
+
+    assert response["Cache-Control"] == "private, max-age=31536000, immutable"
+    assert response["ETag"].startswith('"')
+    assert "Last-Modified" in response
+
+
+def test_playlist_is_cached_briefly(api_client, ready_video):
+    response = api_client.get(f"/api/video/{ready_video.pk}/480p/index.m3u8")
+    assert response["Cache-Control"] == "private, max-age=10"
+
+
+def test_conditional_requests_are_not_modified(api_client, ready_video):
+    url = f"/api/video/{ready_video.pk}/480p/480p0.ts/"
+    first = api_client.get(url)
+
+    by_etag = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    by_date = api_client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+
+    assert by_etag.status_code == 304
+    assert by_etag["ETag"] == first["ETag"]
+    assert by_etag["Cache-Control"] == first["Cache-Control"]
+    assert by_date.status_code == 304
+
+
+def test_if_range_mismatch_sends_whole_file(api_client, ready_video):
+    url = f"/api/video/{ready_video.pk}/480p/480p0.ts/"
+    etag = api_client.get(url)["ETag"]
+
+    matching = api_client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+    stale = api_client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"outdated"')
+
+    assert matching.status_code == 206
+    assert stale.status_code == 200
+    assert len(stale.getvalue()) == 12500
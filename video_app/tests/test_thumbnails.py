@@ -0,0 +1,93 @@
+"""
+video_app.tests.test_thumbnails
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for responsive thumbnail variants and the catalog srcset.
+"""
+
+import io
+import os
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.test import APIClient
+
+from video_app.models import Video
+from video_app.tasks import generate_thumbnail_variants
+from video_app.thumbnails import available_formats, variant_widths
+
+
+def _jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "orange").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def catalog_video(db, queues, media_root):
+    return Video.objects.create(
+        title="Sintel",
+        description="A short film.",
+        category="Animation",
+        thumbnail=SimpleUploadedFile("sintel.jpg", _jpeg(800, 450), content_type="image/jpeg"),
+        video=SimpleUploadedFile("sintel.mp4", b"mp4", content_type="video/mp4"),
+    )
+
+
+def test_variant_widths_never_upscale(settings):
+    settings.VIDEO_THUMBNAIL_WIDTHS = (320, 640, 1280)
+    assert variant_widths(800) == [320, 640, 800]
+    assert variant_widths(3000) == [320, 640, 1280]
+    assert variant_widths(200) == [200]
+
+
+def test_generate_variants(catalog_video):
+    generate_thumbnail_variants(catalog_video.pk)
+
+    variants = list(catalog_video.thumbnail_variants.all())
+    assert {(variant.width, variant.format) for variant in variants} == {
+        (width, fmt) for width in (320, 640, 800) for fmt in available_formats()
+    }
+    names = {variant.image.name.rsplit("/", 1)[1].split("-")[0] for variant in variants}
+    assert len(names) == 1
+    with variants[0].image.open("rb") as image:
+        assert Image.open(image).size == (320, 180)
+
+
+def test_replacing_the_thumbnail_renders_new_variants(catalog_video, queues):
+    queues["high"].jobs.clear()
+
+    catalog_video.title = "Sintel (2010)"
+    catalog_video.save()
+    assert not queues["high"].jobs
+
+    catalog_video.thumbnail = SimpleUploadedFile("poster.jpg", _jpeg(640, 360), content_type="image/jpeg")
+    catalog_video.save()
+    assert [(job.func, job.args) for job in queues["high"].jobs] == [
+        (generate_thumbnail_variants, (catalog_video.pk,))
+    ]
+
+
+def test_regenerating_variants_replaces_files(catalog_video):
+    generate_thumbnail_variants(catalog_video.pk)
+    generate_thumbnail_variants(catalog_video.pk)
+
+    variants = catalog_video.thumbnail_variants.all()
+    assert variants.count() == 3 * len(available_formats())
+    stored = os.listdir(os.path.dirname(variants[0].image.path))
+    assert sorted(stored) == sorted(os.path.basename(variant.image.name) for variant in variants)
+
+
+def test_catalog_returns_srcset(catalog_video):
+    generate_thumbnail_variants(catalog_video.pk)
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="viewer@example.com"))
+
+    response = client.get("/api/video/")
+
+    assert response.status_code == 200
+    srcset = response.json()[0]["thumbnail_srcset"]["webp"].split(", ")
+    assert [entry.rsplit(" ", 1)[1] for entry in srcset] == ["320w", "640w", "800w"]
+    assert srcset[0].startswith("http://testserver/media/thumbnails/variants/")
@@ -0,0 +1,256 @@
+"""
+video_app.tests.test_transcoding
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for the HLS transcoding pipeline. The ffmpeg command lines
+are compiled and inspected, no encoder is executed.
+"""
+
+import os
+
+import pytest
+
+from video_app.hls import parse_media_playlist, stitch_chunk_playlists
+from video_app.models import Video
+from video_app.probe import build_ladder
+from video_app.tasks import (
+    build_single_pass,
+    encode_rendition,
+    finalize_transcode,
+    generate_thumbnail_variants,
+    start_transcode,
+)
+from video_app.tests.conftest import write_rendition
+
+RESOLUTIONS = build_ladder(1920, 1080)
+
+SOURCE_INFO = {
+    "duration": 596.5,
+    "width": 1920,
+    "height": 1080,
+    "frame_rate": 24.0,
+    "bit_rate": 8000000,
+    "video_codec": "h264",
+    "audio_codec": "aac",
+}
+
+
+@pytest.fixture
+def probed(monkeypatch):
+    monkeypatch.setattr("video_app.tasks.probe_source", lambda path: dict(SOURCE_INFO))
+
+
+def test_ladder_for_full_hd_source():
+    assert RESOLUTIONS == {"480p": "854x480", "720p": "1280x720", "1080p": "1920x1080"}
+
+
+def test_ladder_never_upscales():
+    assert build_ladder(854, 480) == {"480p": "854x480"}
+    assert build_ladder(640, 360) == {"360p": "640x360"}
+
+
+def test_ladder_keeps_aspect_ratio():
+    assert build_ladder(1440, 1080) == {"480p": "640x480", "720p": "960x720", "1080p": "1440x1080"}
+    assert build_ladder(720, 1280) == {"480p": "480x854", "720p": "720x1280"}
+
+
+def test_ladder_keeps_widescreen_sources_at_full_width():
+    assert build_ladder(1920, 800) == {"480p": "854x356", "720p": "1280x534", "1080p": "1920x800"}
+    assert build_ladder(1280, 536) == {"480p": "854x358", "720p": "1280x536"}
+
+
+def test_ladder_fits_large_widescreen_sources_into_the_top_rung():
+    assert build_ladder(3840, 1600) == {"480p": "854x356", "720p": "1280x534", "1080p": "1920x800"}
+
+
+def test_single_pass_decodes_source_once(tmp_path):
+    source = str(tmp_path / "movie.mp4")
+    args = build_single_pass(source, str(tmp_path / "movie_hls"), RESOLUTIONS).compile()
+
+    assert args.count("-i") == 1
+    assert any(arg.startswith("[0:v]split=3") for arg in args)
+    for res in RESOLUTIONS:
+        assert str(tmp_path / "movie_hls" / res / "index.m3u8") in args
+
+
+def test_single_pass_aligns_keyframes(tmp_path):
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), RESOLUTIONS).compile()
+
+    keyframe_args = [args[i + 1] for i, arg in enumerate(args) if arg == "-force_key_frames"]
+    assert len(keyframe_args) == len(RESOLUTIONS)
+    assert len(set(keyframe_args)) == 1
+
+
+def test_upload_enqueues_parent_job(video, queues):
+    jobs = queues["high"].jobs
+    assert [job.func for job in jobs] == [start_transcode, generate_thumbnail_variants]
+    assert jobs[0].args == (video.pk,)
+
+
+def test_start_transcode_records_source_info(video, queues, probed):
+    start_transcode(video.pk)
+
+    video.refresh_from_db()
+    assert video.source_info.width == 1920
+    assert video.source_info.duration == 596.5
+
+
+def test_fan_out_enqueues_one_job_per_rendition(video, queues, settings, probed):
+    settings.VIDEO_TRANSCODE_MODE = "fan_out"
+    settings.VIDEO_SCHEDULER_SHORT_COST = 200
+    queues["high"].jobs.clear()
+
+    start_transcode(video.pk)
+
+    # The jobs are routed by the cost of the whole title, not per rendition.
+    high, default = queues["high"].jobs, queues["default"].jobs
+    assert [(job.func, job.args[1]) for job in default] == [
+        (encode_rendition, "480p"), (encode_rendition, "720p"), (encode_rendition, "1080p")
+    ]
+    assert [job.func for job in high] == [finalize_transcode]
+    assert high[-1].kwargs["depends_on"] == default
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.PROCESSING
+
+
+def test_finalize_writes_measured_master_playlist(video, hls_dir):
+    finalize_transcode(video.pk, {"480p": "854x480", "720p": "1280x720"})
+
+    video.refresh_from_db()
+    assert video.hls_status == Video.HLSStatus.READY
+    lines = (hls_dir / "master.m3u8").read_text().splitlines()
+    assert lines[0] == "#EXTM3U"
+    assert lines[3:] == [
+        '#EXT-X-STREAM-INF:BANDWIDTH=20000,AVERAGE-BANDWIDTH=15000,'
+        'RESOLUTION=854x480,CODECS="avc1.64001F,mp4a.40.2"',
+        "480p/index.m3u8",
+        '#EXT-X-STREAM-INF:BANDWIDTH=40000,AVERAGE-BANDWIDTH=35000,'
+        'RESOLUTION=1280x720,CODECS="avc1.64001F,mp4a.40.2"',
+        "720p/index.m3u8",
+    ]
+
+
+def _write_chunk(chunk_dir, res, durations):
+    res_dir = chunk_dir / res
+    res_dir.mkdir(parents=True)
+    lines = ["#EXTM3U", "#EXT-X-TARGETDURATION:10"]
+    for index, duration in enumerate(durations):
+        (res_dir / f"{res}{index}.ts").write_bytes(b"ts")
+        lines += [f"#EXTINF:{duration},", f"{res}{index}.ts"]
+    lines.append("#EXT-X-ENDLIST")
+    (res_dir / "index.m3u8").write_text("\n".join(lines))
+
+
+def test_chunks_of_a_long_title_share_its_queue(video, queues, settings, probed, monkeypatch):
+    settings.VIDEO_TRANSCODE_MODE = "chunked"
+    settings.VIDEO_TRICKPLAY_ENABLED = False
+    settings.VIDEO_SCHEDULER_LONG_COST = 600
+    monkeypatch.setattr(
+        "video_app.tasks.split_source", lambda source, seconds: ["/tmp/chunk0000.mp4", "/tmp/chunk0001.mp4"],
+    )
+    queues["high"].jobs.clear()
+
+    start_transcode(video.pk)
+
+    assert [job.args[0] for job in queues["low"].jobs] == ["/tmp/chunk0000.mp4", "/tmp/chunk0001.mp4"]
+    assert [job.func for job in queues["high"].jobs] == [finalize_transcode]
+
+
+def test_single_pass_splits_encoder_threads(tmp_path, settings, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 16)
+    settings.VIDEO_MAX_CONCURRENT_ENCODES = 2
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), RESOLUTIONS).compile()
+
+    assert [args[index + 1] for index, arg in enumerate(args) if arg == "-threads"] == ["2", "2", "2"]
+
+
+def test_stitch_renumbers_segments_across_chunks(tmp_path):
+    _write_chunk(tmp_path / "chunk0000", "480p", [10.0, 10.0, 4.5])
+    _write_chunk(tmp_path / "chunk0001", "480p", [10.0, 7.25])
+
+    playlist = stitch_chunk_playlists(
+        str(tmp_path / "out"), [str(tmp_path / "chunk0000"), str(tmp_path / "chunk0001")], "480p"
+    )
+
+    assert [segment[:2] for segment in parse_media_playlist(playlist)] == [
+        (10.0, "480p0.ts"), (10.0, "480p1.ts"), (4.5, "480p2.ts"),
+        (10.0, "480p3.ts"), (7.25, "480p4.ts"),
+    ]
+    lines = open(playlist).read().splitlines()
+    assert lines.count("#EXT-X-DISCONTINUITY") == 1
+    assert lines[lines.index("#EXT-X-DISCONTINUITY") + 2] == "480p3.ts"
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    assert sorted(os.listdir(tmp_path / "out" / "480p")) == [
+        "480p0.ts", "480p1.ts", "480p2.ts", "480p3.ts", "480p4.ts", "index.m3u8"
+    ]
+
+
+def test_fmp4_mode_writes_single_file_per_rendition(tmp_path, settings):
+    settings.VIDEO_HLS_SEGMENT_TYPE = "fmp4"
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), {"480p": "854x480"}).compile()
+
+    assert args[args.index("-hls_segment_type") + 1] == "fmp4"
+    assert args[args.index("-hls_flags") + 1] == "single_file"
+    assert args[args.index("-hls_segment_filename") + 1] == str(tmp_path / "480p" / "480p.mp4")
+
+
+def test_parse_byterange_playlist(tmp_path):
+    playlist = tmp_path / "index.m3u8"
+    playlist.write_text(
+        "#EXTM3U\n#EXT-X-VERSION:7\n"
+        '#EXT-X-MAP:URI="480p.mp4",BYTERANGE="812@0"\n'
+        "#EXTINF:10.0,\n#EXT-X-BYTERANGE:1000@812\n480p.mp4\n"
+        "#EXTINF:8.0,\n#EXT-X-BYTERANGE:500\n480p.mp4\n"
+        "#EXT-X-ENDLIST\n"
+    )
+
+    assert parse_media_playlist(str(playlist)) == [
+        (10.0, "480p.mp4", (812, 1000)),
+        (8.0, "480p.mp4", (1812, 500)),
+    ]
+
+
+def test_audio_is_encoded_once(tmp_path):
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), RESOLUTIONS).compile()
+
+    assert args.count("-acodec") == 1
+    assert args.count("-vcodec") == len(RESOLUTIONS)
+    assert "0:a" in args
+    assert str(tmp_path / "audio" / "index.m3u8") in args
+    assert str(tmp_path / "audio" / "audio%d.ts") in args
+
+
+def test_silent_source_has_no_audio_rendition(tmp_path):
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), RESOLUTIONS, audio=False).compile()
+
+    assert "-acodec" not in args
+    assert str(tmp_path / "audio" / "index.m3u8") not in args
+
+
+def test_fan_out_encodes_audio_with_first_rendition(video, queues, settings, probed):
+    settings.VIDEO_TRANSCODE_MODE = "fan_out"
+
+    start_transcode(video.pk)
+
+    jobs = [job for queue in queues.values() for job in queue.jobs if job.func is encode_rendition]
+    assert {job.args[1]: job.args[5] for job in jobs} == {"480p": True, "720p": False, "1080p": False}
+
+
+def test_master_playlist_references_audio_group(video, hls_dir, monkeypatch):
+    write_rendition(hls_dir / "audio", "audio", [20000, 20000])
+    monkeypatch.setattr(
+        "video_app.hls.probe_codecs",
+        lambda path: ["mp4a.40.2"] if "/audio/" in path else ["avc1.64001F"],
+    )
+
+    finalize_transcode(video.pk, {"480p": "854x480", "720p": "1280x720"})
+
+    lines = (hls_dir / "master.m3u8").read_text().splitlines()
+    assert lines[3] == (
+        '#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="audio",NAME="Default",'
+        'DEFAULT=YES,AUTOSELECT=YES,URI="audio/index.m3u8"'
+    )
+    assert lines[4] == (
+        '#EXT-X-STREAM-INF:BANDWIDTH=36000,AVERAGE-BANDWIDTH=31000,'
+        'RESOLUTION=854x480,CODECS="avc1.64001F,mp4a.40.2",AUDIO="audio"'
+    )
@@ -0,0 +1,69 @@
+"""
+video_app.tests.test_trickplay
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Test suite for trickplay sprite sheets and the WebVTT thumbnail track.
+"""
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from video_app.manifest import write_manifest
+from video_app.tasks import build_rendition, build_single_pass
+from video_app.trickplay import thumbnail_size, write_thumbnail_track
+
+LADDER = {"480p": "854x480", "720p": "1280x720"}
+
+
+def test_sprites_share_the_single_pass_decode(tmp_path):
+    args = build_single_pass(str(tmp_path / "movie.mp4"), str(tmp_path), LADDER, trickplay=True).compile()
+
+    assert args.count("-i") == 1
+    graph = args[args.index("-filter_complex") + 1]
+    assert "split=3" in graph
+    assert "tile=10x10" in graph
+    assert str(tmp_path / "trickplay" / "sprite%d.jpg") in args
+
+
+def test_sprites_share_a_rendition_decode(tmp_path):
+    args = build_rendition(str(tmp_path / "movie.mp4"), str(tmp_path), "480p", "854x480", True).compile()
+    assert args.count("-i") == 1
+    assert "split=2" in args[args.index("-filter_complex") + 1]
+
+
+def test_thumbnail_size_keeps_aspect_ratio():
+    assert thumbnail_size(LADDER) == (160, 90)
+    assert thumbnail_size({"480p": "640x480"}) == (160, 120)
+
+
+def test_thumbnail_track_maps_sprite_regions(tmp_path, settings):
+    settings.VIDEO_TRICKPLAY_COLUMNS = 2
+    settings.VIDEO_TRICKPLAY_ROWS = 2
+    (tmp_path / "trickplay").mkdir()
+    (tmp_path / "trickplay" / "sprite0.jpg").write_bytes(b"jpeg")
+
+    track = write_thumbnail_track(str(tmp_path), 45, LADDER)
+
+    lines = open(track).read().splitlines()
+    assert lines[0] == "WEBVTT"
+    assert lines[2:4] == ["00:00:00.000 --> 00:00:10.000", "sprite0.jpg#xywh=0,0,160,90"]
+    assert lines[8:10] == ["00:00:20.000 --> 00:00:30.000", "sprite0.jpg#xywh=0,90,160,90"]
+    assert lines[14:16] == ["00:00:40.000 --> 00:00:45.000", "sprite1.jpg#xywh=0,0,160,90"]
+
+
+def test_thumbnail_track_requires_sprites(tmp_path):
+    assert write_thumbnail_track(str(tmp_path), 45, LADDER) is None
+
+
+def test_sprite_endpoint(video, hls_dir):
+    (hls_dir / "trickplay").mkdir()
+    (hls_dir / "trickplay" / "sprite0.jpg").write_bytes(b"jpeg")
+    write_manifest(video.pk, str(hls_dir))
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="viewer@example.com"))
+
+    response = client.get(f"/api/video/{video.pk}/trickplay/sprite0.jpg")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/jpeg"
+
+    assert client.get(f"/api/video/{video.pk}/trickplay/..").status_code == 404
@@ -0,0 +1,96 @@
+"""
+video_app.thumbnails
+~~~~~~~~~~~~~~~~~~~~
+
+Responsive thumbnail variants for the catalog.
+
+Uploaded thumbnails are resized once into several widths and encoded as
+WebP and, if Pillow was built with it, AVIF. Variant files are named after
+the content hash of the original, so their URLs change whenever the image
+changes and can be cached forever by clients.
+"""
+
+import hashlib
+import io
+
+from django.conf import settings
+from PIL import Image, ImageOps, features
+
+FORMATS = {
+    'avif': {'format': 'AVIF', 'quality': 55},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+
+def available_formats():
+    """
+    Returns the variant formats supported by the installed Pillow.
+
+    Returns:
+        list: Format names, e.g. ``['avif', 'webp']``.
+    """
+    return [name for name in FORMATS if features.check(name)]
+
+
+def variant_widths(original_width: int):
+    """
+    Returns the widths to render for an original of the given width.
+    Images are never upscaled.
+
+    Args:
+        original_width (int): Width of the uploaded thumbnail.
+
+    Returns:
+        list: Ascending target widths.
+    """
+    widths = [width for width in settings.VIDEO_THUMBNAIL_WIDTHS if width < original_width]
+    widths.append(min(original_width, max(settings.VIDEO_THUMBNAIL_WIDTHS)))
+    return sorted(set(widths))
+
+
+def render_variants(file):
+    """
+    Renders all variants of a thumbnail image.
+
+    Args:
+        file: Open binary file of the uploaded thumbnail.
+
+    Returns:
+        list: ``(name, width, format, data)`` tuples, where ``name`` is the
+        content-hashed file name of the variant.
+    """
+    data = file.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    variants = []
+    for width in variant_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for name in available_formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, **FORMATS[name])
+            variants.append((f'{digest}-{width}w.{name}', width, name, buffer.getvalue()))
+    return variants
+
+
+def thumbnail_srcset(video, request):
+    """
+    Builds srcset strings of a video's thumbnail variants per format.
+
+    Args:
+        video (Video): The video, ideally with prefetched ``thumbnail_variants``.
+        request (HttpRequest): The request used to build absolute URLs.
+
+    Returns:
+        dict: Mapping of format to srcset string
+        (e.g. ``{'webp': 'https://.../a-320w.webp 320w, ...'}``).
+    """
+    srcset = {}
+    for variant in sorted(video.thumbnail_variants.all(), key=lambda variant: variant.width):
+        entry = f'{request.build_absolute_uri(variant.image.url)} {variant.width}w'
+        srcset.setdefault(variant.format, []).append(entry)
+    return {name: ', '.join(entries) for name, entries in srcset.items()}
@@ -0,0 +1,135 @@
+"""
+video_app.trickplay
+~~~~~~~~~~~~~~~~~~~
+
+Trickplay (scrub preview) generation.
+
+Frames are sampled every ``VIDEO_TRICKPLAY_INTERVAL`` seconds, scaled to
+``VIDEO_TRICKPLAY_WIDTH`` and tiled into JPEG sprite sheets. A WebVTT
+thumbnail track maps every interval to its region in a sprite, so players
+fetch one small image for many scrub positions.
+"""
+
+import glob
+import math
+import os
+
+import ffmpeg
+from django.conf import settings
+
+TRICKPLAY_DIR = 'trickplay'
+THUMBNAIL_TRACK = 'thumbnails.vtt'
+
+
+def trickplay_dir(output_dir: str):
+    """
+    Returns the directory holding sprites and thumbnail track of a video.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+
+    Returns:
+        str: Path of the trickplay directory.
+    """
+    return os.path.join(output_dir, TRICKPLAY_DIR)
+
+
+def thumbnail_size(ladder: dict):
+    """
+    Returns the size of one thumbnail, keeping the source aspect ratio.
+
+    Args:
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        tuple: ``(width, height)`` of a thumbnail in pixels.
+    """
+    width, height = (int(value) for value in list(ladder.values())[-1].split('x'))
+    thumb_width = settings.VIDEO_TRICKPLAY_WIDTH
+    return thumb_width, max(2, int(round(thumb_width * height / width / 2)) * 2)
+
+
+def sprite_output(stream, output_dir: str, ladder: dict):
+    """
+    Builds the sprite sheet output for a decoded video stream.
+
+    Args:
+        stream: Decoded ffmpeg video stream (e.g. one branch of a split).
+        output_dir (str): The HLS root directory of the video.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    directory = trickplay_dir(output_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    width, height = thumbnail_size(ladder)
+    columns, rows = settings.VIDEO_TRICKPLAY_COLUMNS, settings.VIDEO_TRICKPLAY_ROWS
+    return ffmpeg.output(
+        stream
+        .filter('fps', fps=f'1/{settings.VIDEO_TRICKPLAY_INTERVAL}')
+        .filter('scale', width, height)
+        .filter('tile', f'{columns}x{rows}'),
+        os.path.join(directory, 'sprite%d.jpg'),
+        start_number=0,
+        **{'q:v': 5},
+    )
+
+
+def build_sprites(source: str, output_dir: str, ladder: dict):
+    """
+    Builds a standalone ffmpeg graph that only renders the sprite sheets.
+    Used where trickplay cannot share the decode of an encode.
+
+    Args:
+        source (str): The full path to the source video file.
+        output_dir (str): The HLS root directory of the video.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        ffmpeg.nodes.OutputStream: The configured output node.
+    """
+    return sprite_output(ffmpeg.input(source).video, output_dir, ladder)
+
+
+def _timestamp(seconds: float):
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}'
+
+
+def write_thumbnail_track(output_dir: str, duration: float, ladder: dict):
+    """
+    Writes the WebVTT track that maps time ranges to sprite regions.
+
+    Args:
+        output_dir (str): The HLS root directory of the video.
+        duration (float): Length of the video in seconds.
+        ladder (dict): Mapping of rendition name to frame size.
+
+    Returns:
+        str: Path of the written track, or ``None`` if no sprites exist.
+    """
+    directory = trickplay_dir(output_dir)
+    if not glob.glob(os.path.join(directory, 'sprite*.jpg')):
+        return None
+
+    width, height = thumbnail_size(ladder)
+    interval = settings.VIDEO_TRICKPLAY_INTERVAL
+    columns, rows = settings.VIDEO_TRICKPLAY_COLUMNS, settings.VIDEO_TRICKPLAY_ROWS
+    per_sprite = columns * rows
+
+    lines = ['WEBVTT', '']
+    for index in range(math.ceil(duration / interval)):
+        sprite, position = divmod(index, per_sprite)
+        row, column = divmod(position, columns)
+        start, end = index * interval, min((index + 1) * interval, duration)
+        lines.append(f'{_timestamp(start)} --> {_timestamp(end)}')
+        lines.append(f'sprite{sprite}.jpg#xywh={column * width},{row * height},{width},{height}')
+        lines.append('')
+
+    path = os.path.join(directory, THUMBNAIL_TRACK)
+    with open(path, 'w') as track:
+        track.write('\n'.join(lines))
+    return path